@@ -4,10 +4,258 @@
 # and using the data inside to create graphs that can used and analyzed by the functions
 # in TSPAlgo.py
 
+import math
+import os
+import json
+import struct
+import hashlib
+import io
+import zipfile
+import numpy as np
 import TSP
 
+# Number of values in the EDGE_WEIGHT_SECTION of an N-vertex instance for each EDGE_WEIGHT_FORMAT,
+# and the triangle (as the k argument of np.triu_indices / np.tril_indices) that the values fill in
+# row-major order. Column-wise formats list the same values as the opposite row-wise format, since
+# the matrix is symmetric.
+EXPLICITFORMATS = {"UPPER_ROW": ("upper", 1), "LOWER_COL": ("upper", 1),
+                   "LOWER_ROW": ("lower", -1), "UPPER_COL": ("lower", -1),
+                   "UPPER_DIAG_ROW": ("upper", 0), "LOWER_DIAG_COL": ("upper", 0),
+                   "LOWER_DIAG_ROW": ("lower", 0), "UPPER_DIAG_COL": ("lower", 0)}
+
+# Number of EDGE_WEIGHT_SECTION lines that ParseTSPLIB converts to numbers at a time.
+WEIGHTBATCH = 4096
+
+# Layout of the binary cache files written by SaveCache: the magic bytes, the length of a JSON
+# description as a little-endian 64-bit integer, the description itself, then the raw arrays, each
+# starting on a CACHEALIGN byte boundary so that they can be memory-mapped.
+CACHEMAGIC = b"TSPCACHE"
+CACHEVERSION = 1
+CACHEALIGN = 64
+CACHEEXTENSION = ".tspcache"
+
+# The archive of TSPLIB instances that ships with this repository, read by the Zip functions below.
+TSPLIBZIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tsplib-master.zip")
+
+# Index of each archive read so far (see ZipIndex), keyed by the archive's path.
+ZipIndexCache = {}
+
+class TSPLIBInstance:
+    # The contents of a TSPLIB file as read by ParseTSPLIB: the specification header (keyword to value
+    # string) and whichever of the node coordinates, explicit edge weights and display coordinates the
+    # file holds. Row i of each array belongs to the i-th name in self.names.
+    def __init__(self):
+        self.header = {}
+        self.names = []
+        self.coords = None
+        self.weights = None
+        self.displaycoords = None
+        # Candidate neighbor lists and the SHA-1 of the source file, only present when the instance
+        # was read through a cache file.
+        self.neighbors = None
+        self.sourcehash = None
+        # Vertex names in the order of the TOUR_SECTION, for .tour and .opt.tour files.
+        self.tour = None
+
+    def GetHeader(self, Keyword, Default=None):
+        return self.header.get(Keyword, Default)
+
+    def GetName(self):
+        return self.header.get("NAME")
+
+    def GetDimension(self):
+        # Number of vertices, from the DIMENSION keyword or else from the data that was read.
+        if "DIMENSION" in self.header:
+            return int(self.header["DIMENSION"])
+
+        return len(self.names)
+
+    def GetEdgeWeightType(self):
+        return self.header.get("EDGE_WEIGHT_TYPE")
+
+    def GetNames(self):
+        return self.names
+
+    def GetCoordinates(self):
+        return self.coords
+
+    def GetWeights(self):
+        return self.weights
+
+    def GetDisplayCoordinates(self):
+        return self.displaycoords
+
+    def GetNeighbors(self):
+        return self.neighbors
+
+    def GetTour(self):
+        return self.tour
+
+    def DrawingCoordinates(self):
+        # Positions to give the vertices of a graph built from this instance: the node coordinates, or
+        # the display coordinates, or else a square grid for instances with only a weight matrix.
+        if self.coords is not None:
+            return self.coords
+        if self.displaycoords is not None:
+            return self.displaycoords
+
+        NumVerts = self.GetDimension()
+        Width = max(1, math.ceil(math.sqrt(NumVerts)))
+        Inds = np.arange(NumVerts)
+        return np.column_stack((Inds % Width, Inds // Width)).astype(np.float64)
+
+def GrowRows(Arr, NumRows):
+    # Return Arr with room for at least NumRows rows, doubling its size if it is too small.
+    if NumRows <= len(Arr):
+        return Arr
+
+    Grown = np.zeros((max(NumRows, 2*len(Arr)),) + Arr.shape[1:], dtype=Arr.dtype)
+    Grown[:len(Arr)] = Arr
+    return Grown
+
+def AppendValues(Values, NumValues, Lines):
+    # Convert a batch of lines of whitespace separated numbers and append them to the flat array
+    # Values, which holds NumValues numbers so far. Returns the (possibly grown) array and new count.
+    Batch = np.fromstring(" ".join(Lines), dtype=np.float64, sep=" ")
+    Values = GrowRows(Values, NumValues+len(Batch))
+    Values[NumValues:NumValues+len(Batch)] = Batch
+    return Values, NumValues+len(Batch)
+
+def WeightMatrix(Values, Format, NumVerts):
+    # Build the full symmetric NumVerts x NumVerts matrix from the numbers of an EDGE_WEIGHT_SECTION.
+    # Returns None if the format is not supported or the number of values does not match it.
+    Matrix = None
+    if Format == "FULL_MATRIX":
+        if len(Values) == NumVerts*NumVerts:
+            Matrix = Values.reshape(NumVerts, NumVerts)
+    elif Format in EXPLICITFORMATS:
+        Triangle, Diagonal = EXPLICITFORMATS[Format]
+        if Triangle == "upper":
+            Rows, Cols = np.triu_indices(NumVerts, Diagonal)
+        else:
+            Rows, Cols = np.tril_indices(NumVerts, Diagonal)
+        if len(Values) == len(Rows):
+            Matrix = np.zeros((NumVerts, NumVerts), dtype=np.float64)
+            Matrix[Rows, Cols] = Values
+            Matrix[Cols, Rows] = Values
+    else:
+        print("Unsupported edge weight format", Format)
+        return None
+
+    if Matrix is None:
+        print("Expected a", Format, "matrix for", NumVerts, "vertices but found", len(Values), "edge weights.")
+
+    return Matrix
+
+def ParseTSPLIB(Lines):
+    # Read a TSPLIB instance from an iterable of text lines (e.g. an open file) in one pass.
+    # Keyword lines fill the header. The NODE_COORD_SECTION and DISPLAY_DATA_SECTION are written
+    # straight into coordinate arrays sized from DIMENSION, and the numbers of the EDGE_WEIGHT_SECTION
+    # into a flat array that is turned into a matrix at the end (see WeightMatrix). The weight lines are
+    # converted in batches of WEIGHTBATCH lines. The vertex names of a TOUR_SECTION are kept up to the
+    # -1 that ends it. Other sections are skipped. Returns a TSPLIBInstance.
+    Instance = TSPLIBInstance()
+    Section = None
+    Names = []
+    Coords = np.zeros((0, 2), dtype=np.float64)
+    Display = np.zeros((0, 2), dtype=np.float64)
+    Values = np.zeros(0, dtype=np.float64)
+    NumCoords = 0
+    NumDisplay = 0
+    NumValues = 0
+    Pending = []
+    Tour = []
+
+    for Line in Lines:
+        Stripped = Line.strip()
+        if Stripped == "":
+            continue
+
+        if Stripped[0].isalpha() == True:
+            # A keyword line, either "KEYWORD : value" or the name of a data section.
+            Keyword, Colon, Value = Stripped.partition(":")
+            Keyword = Keyword.strip().upper()
+            if Keyword == "EOF":
+                break
+            Section = None
+            if Keyword.endswith("_SECTION"):
+                Section = Keyword
+                NumVerts = Instance.GetDimension()
+                if Section == "NODE_COORD_SECTION":
+                    Coords = np.zeros((NumVerts, 2), dtype=np.float64)
+                elif Section == "DISPLAY_DATA_SECTION":
+                    Display = np.zeros((NumVerts, 2), dtype=np.float64)
+                elif Section == "EDGE_WEIGHT_SECTION":
+                    Values = np.zeros(NumVerts*NumVerts, dtype=np.float64)
+            else:
+                Instance.header[Keyword] = Value.strip()
+            continue
+
+        if Section == "NODE_COORD_SECTION":
+            Parts = Stripped.split()
+            Coords = GrowRows(Coords, NumCoords+1)
+            Coords[NumCoords, 0] = float(Parts[1])
+            Coords[NumCoords, 1] = float(Parts[2])
+            Names.append(Parts[0])
+            NumCoords += 1
+        elif Section == "DISPLAY_DATA_SECTION":
+            Parts = Stripped.split()
+            Display = GrowRows(Display, NumDisplay+1)
+            Display[NumDisplay, 0] = float(Parts[1])
+            Display[NumDisplay, 1] = float(Parts[2])
+            NumDisplay += 1
+        elif Section == "EDGE_WEIGHT_SECTION":
+            # Rows of the matrix may be split over several lines, so the numbers are simply appended.
+            Pending.append(Stripped)
+            if len(Pending) >= WEIGHTBATCH:
+                Values, NumValues = AppendValues(Values, NumValues, Pending)
+                Pending = []
+        elif Section == "TOUR_SECTION":
+            for Part in Stripped.split():
+                if Part == "-1":
+                    Section = None
+                    break
+                Tour.append(Part)
+
+    if len(Pending) > 0:
+        Values, NumValues = AppendValues(Values, NumValues, Pending)
+
+    if NumCoords > 0:
+        Instance.coords = Coords[:NumCoords]
+        Instance.names = Names
+    if NumDisplay > 0:
+        Instance.displaycoords = Display[:NumDisplay]
+    if Instance.names == []:
+        Instance.names = [str(i) for i in range(1, Instance.GetDimension()+1)]
+    if NumValues > 0:
+        Format = Instance.GetHeader("EDGE_WEIGHT_FORMAT", "FULL_MATRIX").upper()
+        Instance.weights = WeightMatrix(Values[:NumValues], Format, Instance.GetDimension())
+    if len(Tour) > 0:
+        Instance.tour = Tour
+
+    return Instance
+
+def ParseHeader(Lines):
+    # Read only the specification part of a TSPLIB file, stopping at the first data section.
+    # Returns the header (keyword to value string) and the name of that section, or None if the
+    # lines end first.
+    Header = {}
+    for Line in Lines:
+        Keyword, Colon, Value = Line.strip().partition(":")
+        Keyword = Keyword.strip().upper()
+        if Keyword.endswith("_SECTION"):
+            return Header, Keyword
+        if Keyword == "EOF":
+            break
+        if Keyword != "":
+            Header[Keyword] = Value.strip()
+
+    return Header, None
+
 def FileReadTest(path):
     # Make sure the file we want to read from is readable and in the right format.
+    # Only the specification part at the top of the file is read (see ParseHeader): the test passes
+    # if the first data section holds node coordinates or edge weights.
     CorrectFormat = False
     CanRead = False
 
@@ -18,12 +266,11 @@ def FileReadTest(path):
         if filename[-4:(len(filename))] == ".tsp":
             CanRead = True
             with open(path, "r") as File:
-                contents = File.read()
-                #print(contents)
-                if "node_coord_section" in contents.lower():
-                    CorrectFormat = True
-                else:
-                    print("File is not in the correct format.")
+                Header, Section = ParseHeader(File)
+            if Section == "NODE_COORD_SECTION" or Section == "EDGE_WEIGHT_SECTION":
+                CorrectFormat = True
+            if CorrectFormat == False:
+                print("File is not in the correct format.")
         else:
             print("File is not a .tsp file.")
         
@@ -35,78 +282,386 @@ def FileReadTest(path):
 
     return TestPass
 
-def ParseTSPFile(path):
-    # Takes a file name / path as input returns the data from the file as a list of tuples.
-    datalist = []
-    tuplelist = []
-
-    CanRead = FileReadTest(path)
-    delim = " "
-    # These characters are used to format the data in .tsp files but do not encode data itself.
-    specialchars = ["EOF", "", " ", "  ", "\n", "\t"]
-
-    if CanRead == True:
-        startind = None
-        lineind = 0
-        # Read the data in the file and put it into datalist, only adding the data after the "Node_Coord_Section".
+def ReadTSPLIB(path):
+    # Read a .tsp file into a TSPLIBInstance, or return None if it cannot be read.
+    Instance = None
+    if FileReadTest(path) == True:
         with open(path, "r") as File:
-            for line in File:
-                lineind += 1
-                linestring = line[0:len(line)-1]
-                if "node_coord_section" in linestring.lower():
-                    startind = lineind
-
-                if startind != None and lineind > startind:
-                    #print(linestring)
-                    datalist.append(linestring)
-                    #if "EOF" in linestring or linestring == "\n":
-                        #print("End of file at line", str(lineind))
-                
-        for i in range(0, len(datalist)):
-        # Convert the data read from the files into tuples.
-            tupleparts = []
-            currentline = datalist[i]
-            #print(currentline)
-            if "EOF" not in datalist[i] and datalist[i] not in specialchars:
-                for s in currentline.split(delim):
-                    if s not in specialchars:
-                        tupleparts.append(s)
-                #print(s)
-                tupleparts[1] = float(tupleparts[1])
-                tupleparts[2] = float(tupleparts[2])
-            
-                tuplelist.append(tuple(tupleparts))
-                #print(tuplelist)
+            Instance = ParseTSPLIB(File)
     else:
         print("File not found or could not be read.")
+
+    return Instance
+
+def FileHash(path):
+    # SHA-1 digest of a file's contents, read in chunks. Cache files are keyed by it.
+    Digest = hashlib.sha1()
+    with open(path, "rb") as File:
+        for Chunk in iter(lambda: File.read(1 << 20), b""):
+            Digest.update(Chunk)
+
+    return Digest.hexdigest()
+
+def CachePath(path, SourceHash, CacheDir=None):
+    # Location of the cache file for a source file with the given hash: beside the source file, or
+    # in CacheDir if one is given.
+    Folder = os.path.dirname(path) if CacheDir == None else CacheDir
+    return os.path.join(Folder, os.path.basename(path) + "." + SourceHash[:16] + CACHEEXTENSION)
+
+def SaveCache(Instance, CacheFile, SourceHash):
+    # Write an instance to a binary cache file (see CACHEMAGIC). The file is written under a
+    # temporary name and then renamed, so other processes never see a half-written cache.
+    Arrays = {}
+    for Key, Arr in (("coords", Instance.coords), ("weights", Instance.weights),
+                     ("display", Instance.displaycoords), ("neighbors", Instance.neighbors)):
+        if Arr is not None:
+            Arrays[Key] = np.ascontiguousarray(Arr)
+
+    Layout = {}
+    Offset = 0
+    for Key, Arr in Arrays.items():
+        Offset = -(-Offset // CACHEALIGN) * CACHEALIGN
+        Layout[Key] = {"dtype": Arr.dtype.str, "shape": list(Arr.shape), "offset": Offset}
+        Offset += Arr.nbytes
+
+    # Names are only stored when they are not simply "1" to "N".
+    Names = Instance.names
+    if Names == [str(i) for i in range(1, len(Names)+1)]:
+        Names = None
+    Description = json.dumps({"version": CACHEVERSION, "source": SourceHash, "header": Instance.header,
+                              "names": Names, "arrays": Layout}).encode("utf-8")
+    DataStart = -(-(len(CACHEMAGIC) + 8 + len(Description)) // CACHEALIGN) * CACHEALIGN
+
+    TempFile = CacheFile + "." + str(os.getpid()) + ".tmp"
+    try:
+        with open(TempFile, "wb") as File:
+            File.write(CACHEMAGIC)
+            File.write(struct.pack("<Q", len(Description)))
+            File.write(Description)
+            for Key, Arr in Arrays.items():
+                File.seek(DataStart + Layout[Key]["offset"])
+                File.write(Arr.tobytes())
+        os.replace(TempFile, CacheFile)
+    except OSError as Error:
+        print("Could not write cache file", CacheFile, ":", Error)
+        if os.path.exists(TempFile):
+            os.remove(TempFile)
+        return False
+
+    return True
+
+def LoadCache(CacheFile, SourceHash=None):
+    # Read an instance back from a cache file. The arrays are memory-mapped read-only rather than
+    # read, so loading is almost instant and processes that load the same file share its pages.
+    # Returns None if the file is missing, is not a cache file, or was made from a different source.
+    if os.path.exists(CacheFile) == False:
+        return None
+
+    with open(CacheFile, "rb") as File:
+        if File.read(len(CACHEMAGIC)) != CACHEMAGIC:
+            return None
+        DescriptionSize = struct.unpack("<Q", File.read(8))[0]
+        Description = json.loads(File.read(DescriptionSize).decode("utf-8"))
+    if Description.get("version") != CACHEVERSION:
+        return None
+    if SourceHash != None and Description.get("source") != SourceHash:
+        return None
+
+    DataStart = -(-(len(CACHEMAGIC) + 8 + DescriptionSize) // CACHEALIGN) * CACHEALIGN
+    Arrays = {}
+    for Key, Spec in Description["arrays"].items():
+        Shape = tuple(Spec["shape"])
+        if int(np.prod(Shape)) == 0:
+            Arrays[Key] = np.zeros(Shape, dtype=Spec["dtype"])
+        else:
+            Arrays[Key] = np.memmap(CacheFile, dtype=Spec["dtype"], mode="r",
+                                    offset=DataStart + Spec["offset"], shape=Shape)
+
+    Instance = TSPLIBInstance()
+    Instance.header = Description["header"]
+    Instance.coords = Arrays.get("coords")
+    Instance.weights = Arrays.get("weights")
+    Instance.displaycoords = Arrays.get("display")
+    Instance.neighbors = Arrays.get("neighbors")
+    Instance.names = Description["names"]
+    if Instance.names == None:
+        Instance.names = [str(i) for i in range(1, Instance.GetDimension()+1)]
+
+    return Instance
+
+def ReadCachedTSPLIB(path, CacheDir=None):
+    # Read a .tsp file through its cache file, parsing the text and writing the cache the first time
+    # (see SaveCache and LoadCache). Returns (Instance, CacheFile), or (None, None) on failure.
+    if isinstance(path, str) == False or os.path.exists(path) == False:
+        print("File not found or could not be read.")
+        return None, None
+
+    SourceHash = FileHash(path)
+    CacheFile = CachePath(path, SourceHash, CacheDir)
+    Instance = LoadCache(CacheFile, SourceHash)
+    if Instance == None:
+        Instance = ReadTSPLIB(path)
+        if Instance != None:
+            SaveCache(Instance, CacheFile, SourceHash)
+    if Instance != None:
+        Instance.sourcehash = SourceHash
+
+    return Instance, CacheFile
+
+def ParseTSPFile(path):
+    # Takes a file name / path as input returns the node coordinates in the file as a list of
+    # (name, x, y) tuples.
+    tuplelist = []
+    Instance = ReadTSPLIB(path)
+
+    if Instance != None and Instance.GetCoordinates() is not None:
+        for Name, (X, Y) in zip(Instance.GetNames(), Instance.GetCoordinates().tolist()):
+            tuplelist.append((Name, X, Y))
     
     return tuplelist
 
-def GenFromFile(filepath, graphname):
-    # Parses data from a .TSP file. If successful, the data is used to generate
-    # a TSP graph with corresponding bounds, vertex positions, and vertex names.
+def GraphFromInstance(Instance, graphname):
+    # Generate a TSP graph from a TSPLIBInstance and give it the instance's edge weight type.
+    # The graph's vertices must lie in [0, bound), so the positions are shifted to be non-negative if
+    # needed and the bound is set just above the largest coordinate. This keeps distances the same.
+    # Vertices that share a position with another vertex are moved by a tiny offset so that
+    # none of them is lost.
+    Positions = np.array(Instance.DrawingCoordinates(), dtype=np.float64)
+    Names = Instance.GetNames()
+    if len(Positions) != len(Names):
+        print("The instance has", len(Names), "vertices but", len(Positions), "positions.")
+        return None
+
+    if len(Positions) > 0:
+        Positions -= np.minimum(Positions.min(axis=0), 0.0)
+        Unique, Inverse = np.unique(Positions, axis=0, return_inverse=True)
+        if len(Unique) < len(Positions):
+            Inverse = Inverse.ravel()
+            Repeat = np.zeros(len(Positions))
+            Seen = {}
+            for i, Group in enumerate(Inverse.tolist()):
+                Repeat[i] = Seen.get(Group, 0)
+                Seen[Group] = Repeat[i] + 1
+            Positions[:, 0] += 1e-6*Repeat
+            print("Moved", len(Positions) - len(Unique), "vertices that share a position by a tiny offset.")
 
-    CanRead = FileReadTest(filepath)
-    upperbound = 0
+    newgraph = TSP.GraphFromArrays(Names, Positions[:, 0], Positions[:, 1], graphname)
+
+    EdgeWeightType = Instance.GetEdgeWeightType()
+    if EdgeWeightType == "GEO":
+        newgraph.SetMetric("GEO", Instance.GetCoordinates())
+    elif EdgeWeightType == "EXPLICIT":
+        newgraph.SetMetric("EXPLICIT", Instance.GetWeights())
+    elif EdgeWeightType in TSP.EDGEWEIGHTTYPES:
+        newgraph.SetMetric(EdgeWeightType)
+    elif EdgeWeightType != None:
+        print("Edge weight type", EdgeWeightType, "is not supported. Using Euclidean distances.")
+
+    return newgraph
+
+def GenFromFile(filepath, graphname, UseCache=False, NumNeighbors=0, CacheDir=None):
+    # Parses data from a .TSP file. If successful, the data is used to generate
+    # a TSP graph with corresponding bounds, vertex positions, names and edge weights.
+    # If UseCache == True, the file is read through a binary cache file (see ReadCachedTSPLIB).
+    # NumNeighbors > 0 also keeps that many candidate neighbors per vertex in the cache, ready for
+    # the local search algorithms.
     newgraph = None
+    CacheFile = None
+    if UseCache == True:
+        Instance, CacheFile = ReadCachedTSPLIB(filepath, CacheDir)
+    else:
+        Instance = ReadTSPLIB(filepath)
 
-    if CanRead == True:
-        filedata = ParseTSPFile(filepath)
-        for f in filedata:
-            if f[1] > upperbound:
-                upperbound = f[1]
-            if f[2] > upperbound:
-                upperbound = f[2]
-            
-        newgraph = TSP.TSPGraph(upperbound, graphname)
-        for f in filedata:
-            newgraph.GenerateVertex(f[0], f[1], f[2])
+    if Instance != None:
+        newgraph = GraphFromInstance(Instance, graphname)
 
-    if CanRead == False:
+    if newgraph != None and CacheFile != None and NumNeighbors > 0:
+        CachedNeighbors(newgraph, Instance, CacheFile, NumNeighbors)
+
+    if newgraph == None:
         print("File data could not be parsed or is in the wrong format.")
             
     return newgraph
 
+def CachedNeighbors(GraphObj, Instance, CacheFile, NumNeighbors):
+    # Give the graph the candidate neighbor lists stored in the cache, or compute them and add them
+    # to the cache file if it does not hold enough of them.
+    Cached = Instance.GetNeighbors()
+    if Cached is not None and Cached.shape[1] >= min(NumNeighbors, GraphObj.NumVertices()-1):
+        GraphObj.GetDistanceCache().SetNeighbors(Cached)
+    elif GraphObj.NumVertices() == Instance.GetDimension():
+        Instance.neighbors = GraphObj.NearestNeighbors(NumNeighbors)
+        SaveCache(Instance, CacheFile, Instance.sourcehash)
+
+#   #   #   #   #   #   #   #   #   #
+
+def ZipMembers(ZipFile):
+    # Map the instance names in an open archive (the file names without the folder or the .tsp
+    # extension) to their ZipInfo entries.
+    Members = {}
+    for Info in ZipFile.infolist():
+        BaseName = Info.filename.rsplit("/", 1)[-1]
+        if BaseName.lower().endswith(".tsp"):
+            Members[BaseName[:-4]] = Info
+
+    return Members
+
+def ZipIndex(ZipPath=None):
+    # Return a list of (name, dimension, edge weight type, size in bytes) for every .tsp instance in
+    # the archive, sorted by name, for picking instances without extracting them. Only the header of
+    # each member is decompressed. The index is kept for as long as the archive is unchanged.
+    if ZipPath == None:
+        ZipPath = TSPLIBZIP
+    Stamp = (os.path.getmtime(ZipPath), os.path.getsize(ZipPath))
+    if ZipPath in ZipIndexCache and ZipIndexCache[ZipPath][0] == Stamp:
+        return ZipIndexCache[ZipPath][1]
+
+    Index = []
+    with zipfile.ZipFile(ZipPath) as Archive:
+        for Name, Info in sorted(ZipMembers(Archive).items()):
+            with Archive.open(Info) as Member:
+                Header, Section = ParseHeader(io.TextIOWrapper(Member, encoding="latin-1"))
+            Dimension = int(Header["DIMENSION"]) if "DIMENSION" in Header else None
+            Index.append((Name, Dimension, Header.get("EDGE_WEIGHT_TYPE"), Info.file_size))
+
+    ZipIndexCache[ZipPath] = (Stamp, Index)
+    return Index
+
+def ReadZipInstance(InstanceName, ZipPath=None, UseCache=False, CacheDir=None):
+    # Read one instance straight out of the archive, streaming the decompressed text into
+    # ParseTSPLIB. InstanceName is e.g. "a280" or "a280.tsp". If UseCache == True, the instance is
+    # read through a cache file placed beside the archive (or in CacheDir), keyed by the member's
+    # CRC-32 and size so that the member does not need to be decompressed to find it.
+    # Returns (Instance, CacheFile), or (None, None) if there is no such instance.
+    if ZipPath == None:
+        ZipPath = TSPLIBZIP
+    if InstanceName.lower().endswith(".tsp"):
+        InstanceName = InstanceName[:-4]
+    if os.path.exists(ZipPath) == False:
+        print("Could not find the archive", ZipPath)
+        return None, None
+
+    with zipfile.ZipFile(ZipPath) as Archive:
+        Info = ZipMembers(Archive).get(InstanceName)
+        if Info == None:
+            print("There is no instance", InstanceName, "in", ZipPath)
+            return None, None
+
+        CacheFile = None
+        SourceHash = "%08x%08x" % (Info.CRC, Info.file_size & 0xffffffff)
+        if UseCache == True:
+            Folder = os.path.dirname(ZipPath) if CacheDir == None else CacheDir
+            CacheFile = CachePath(os.path.join(Folder, InstanceName + ".tsp"), SourceHash)
+            Instance = LoadCache(CacheFile, SourceHash)
+            if Instance != None:
+                Instance.sourcehash = SourceHash
+                return Instance, CacheFile
+
+        with Archive.open(Info) as Member:
+            Instance = ParseTSPLIB(io.TextIOWrapper(Member, encoding="latin-1"))
+
+    Instance.sourcehash = SourceHash
+    if CacheFile != None:
+        SaveCache(Instance, CacheFile, SourceHash)
+
+    return Instance, CacheFile
+
+def GenFromZip(InstanceName, graphname, ZipPath=None, UseCache=False, NumNeighbors=0, CacheDir=None):
+    # The counterpart of GenFromFile for instances inside the archive (see ReadZipInstance).
+    newgraph = None
+    Instance, CacheFile = ReadZipInstance(InstanceName, ZipPath, UseCache, CacheDir)
+
+    if Instance != None:
+        newgraph = GraphFromInstance(Instance, graphname)
+
+    if newgraph != None and CacheFile != None and NumNeighbors > 0:
+        CachedNeighbors(newgraph, Instance, CacheFile, NumNeighbors)
+
+    return newgraph
+
+#   #   #   #   #   #   #   #   #   #
+
+# Known optimal tour lengths read so far (see LoadOptima), keyed by the path they were read from.
+OptimaCache = {}
+
+def ParseSolutions(Lines):
+    # Read a table of optimal tour lengths with lines of the form "a280 : 2579". Anything after the
+    # number, such as the "(CEIL_2D)" note on dsj1000, is ignored. Returns a dictionary.
+    Optima = {}
+    for Line in Lines:
+        Name, Colon, Value = Line.partition(":")
+        Parts = Value.split()
+        if Colon == ":" and len(Parts) > 0 and Parts[0].isdigit() == True:
+            Optima[Name.strip()] = int(Parts[0])
+
+    return Optima
+
+def LoadOptima(SolutionsPath=None):
+    # Return the table of known optimal tour lengths. SolutionsPath is a solutions file, or an
+    # archive holding one (by default tsplib-master.zip). The table is read once per path.
+    if SolutionsPath == None:
+        SolutionsPath = TSPLIBZIP
+    if SolutionsPath in OptimaCache:
+        return OptimaCache[SolutionsPath]
+
+    Optima = {}
+    if os.path.exists(SolutionsPath) == False:
+        print("Could not find the solutions file", SolutionsPath)
+    elif zipfile.is_zipfile(SolutionsPath):
+        with zipfile.ZipFile(SolutionsPath) as Archive:
+            for Info in Archive.infolist():
+                if Info.filename.rsplit("/", 1)[-1] == "solutions":
+                    with Archive.open(Info) as Member:
+                        Optima = ParseSolutions(io.TextIOWrapper(Member, encoding="latin-1"))
+                    break
+    else:
+        with open(SolutionsPath, "r") as File:
+            Optima = ParseSolutions(File)
+
+    OptimaCache[SolutionsPath] = Optima
+    return Optima
+
+def ReadOptimalTour(InstanceName, Folder=None, ZipPath=None):
+    # Return the optimal tour of an instance as a list of vertex names, read from the file
+    # <InstanceName>.opt.tour in Folder if there is one, or else from the archive. Returns None if
+    # neither has it. (The copy of the archive in this repository holds no .opt.tour files.)
+    FileName = InstanceName + ".opt.tour"
+    if Folder != None and os.path.exists(os.path.join(Folder, FileName)):
+        with open(os.path.join(Folder, FileName), "r") as File:
+            return ParseTSPLIB(File).GetTour()
+
+    if ZipPath == None:
+        ZipPath = TSPLIBZIP
+    if os.path.exists(ZipPath) == True:
+        with zipfile.ZipFile(ZipPath) as Archive:
+            for Info in Archive.infolist():
+                if Info.filename.rsplit("/", 1)[-1] == FileName:
+                    with Archive.open(Info) as Member:
+                        return ParseTSPLIB(io.TextIOWrapper(Member, encoding="latin-1")).GetTour()
+
+    return None
+
+def KnownOptimum(InstanceName, GraphObj=None, Folder=None, ZipPath=None):
+    # Return the optimal tour length of an instance: from the solutions table, or else by measuring
+    # its .opt.tour in GraphObj. Returns None if it is not known.
+    Optima = LoadOptima(ZipPath)
+    if InstanceName in Optima:
+        return Optima[InstanceName]
+
+    if GraphObj != None:
+        Tour = ReadOptimalTour(InstanceName, Folder, ZipPath)
+        if Tour != None and len(Tour) == GraphObj.NumVertices():
+            return GraphObj.PathWeight(Tour + [Tour[0]], False)
+
+    return None
+
+def OptimalityGap(TourLength, Optimum):
+    # Percentage by which a tour is longer than the optimum.
+    if Optimum == None or Optimum <= 0:
+        return None
+
+    return 100.0*(TourLength - Optimum)/Optimum
+
 def test(filename):
     # Tests opening files, reading data from files, then transcribing the data into graphs.
     ReadFile = False
@@ -4,6 +4,15 @@ import math
 import turtle
 import random
 import time
+import collections
+import numpy as np
+
+try:
+    # SciPy is optional. When it is installed, its Delaunay triangulation supplies the candidate
+    # edges for the Euclidean minimum spanning tree.
+    from scipy.spatial import Delaunay
+except ImportError:
+    Delaunay = None
 
 # This file contains the classes for Travelling Salesman graphs (TSP graphs), their vertices, and other types of weighted graphs.
 # It also contains methods for drawing TSP graphs using the turtle module.
@@ -12,10 +21,34 @@ class TSPVertex:
     # Class for objects representing the vertices of a TSP graph.
     # Each TSP vertex has a tuple value representing its position in a 2D Euclidean space.
     # The bounds of the vertex position is determined by the "bound" value of its parent graph.
+    # Once a vertex belongs to a graph it is only a view: its position is read from and written to
+    # row "index" of the graph's coordinate array.
     def __init__(self, MyName):
-        self.position = (None, None)
+        self.detachedposition = (None, None)
+        self.index = None
         self.parentgraph = None
         self.name = MyName
+
+    @property
+    def position(self):
+        if self.index != None and self.parentgraph != None:
+            Row = self.parentgraph.coords[self.index]
+            return (float(Row[0]), float(Row[1]))
+
+        return self.detachedposition
+
+    @position.setter
+    def position(self, NewPosition):
+        if self.index != None and self.parentgraph != None:
+            self.parentgraph.coords[self.index] = NewPosition
+        else:
+            self.detachedposition = NewPosition
+
+    def Detach(self):
+        # Take a copy of the position out of the parent graph's coordinate array and leave the graph.
+        self.detachedposition = self.position
+        self.index = None
+        self.parentgraph = None
         
     def GetGraph(self):
         return self.parentgraph
@@ -32,6 +65,14 @@ class TSPVertex:
             # print("Added vertex " + self.name + " to graph " + newGraph.GetName())
 
     def SetPosition(self, NewX, NewY):
+        OldPosition = self.position
+        # Each vertex of a graph must occupy a unique position (see TSPGraph).
+        if self.parentgraph != None:
+            Occupant = self.parentgraph.GetVertex(NewX, NewY)
+            if Occupant != None and Occupant is not self:
+                print("There is already a vertex in graph", self.parentgraph.GetName(), "with position", (NewX, NewY))
+                return
+
         if NewX >= 0 and NewY >= 0:
 
             if self.parentgraph == None or self.parentgraph.GetBounds() == None:
@@ -48,21 +89,33 @@ class TSPVertex:
             
         else:
             print("The coordinate values must be non-negative reals within the bounds of the graph.")
+
+        # Keep the (x, y) index of the parent graph in step with the new position.
+        if self.parentgraph != None and self.position != OldPosition:
+            self.parentgraph.ReindexVertex(self, self.name, OldPosition)
     
     def SetName(self, newName):
+        OldName = self.name
+        # Names must also be unique within a graph.
+        if self.parentgraph != None and newName != OldName and self.parentgraph.NameInGraph(newName) == True:
+            print("There is already a vertex in graph", self.parentgraph.GetName(), "with name", newName)
+            return
         self.name = newName
         # print("Set name of vertex to " + newName)
 
+        # Keep the name index of the parent graph in step with the new name.
+        if self.parentgraph != None and newName != OldName:
+            self.parentgraph.ReindexVertex(self, OldName, self.position)
+
     def GetDistance(self, OtherVert, RoundBool):
         APos = self.GetPosition()
         BPos = OtherVert.GetPosition()
         Distance = None
         if self.parentgraph == OtherVert.GetGraph():
-            DeltaX = APos[0] - BPos[0]
-            DeltaY = APos[1] - BPos[1]
-            DeltaXSquare = math.pow(DeltaX, 2)
-            DeltaYSquare = math.pow(DeltaY, 2)
-            RealDist = math.sqrt(DeltaXSquare + DeltaYSquare)
+            RealDist = math.hypot(APos[0] - BPos[0], APos[1] - BPos[1])
+            if self.parentgraph != None and self.parentgraph.GetMetric() != None and self.index != None:
+                # Measure with the graph's edge weight type.
+                RealDist = float(self.parentgraph.PairDistances([self.index], [OtherVert.index], False)[0])
 
             if RoundBool == True:
                 Distance = math.ceil(RealDist)
@@ -74,6 +127,82 @@ class TSPVertex:
 
         return Distance
     
+# Edge weight types a TSPGraph can measure distances with (see TSPGraph.SetMetric). The names follow
+# the EDGE_WEIGHT_TYPE keywords of the TSPLIB format. None is the graph's own unrounded Euclidean
+# distance. The planar metrics are all non-decreasing functions of the Euclidean distance between
+# the vertex positions, so nearest neighbors and minimum spanning trees can be found from the
+# positions alone. GEO and EXPLICIT weights come from data stored alongside the graph instead.
+PLANARMETRICS = [None, "EUC_2D", "CEIL_2D", "ATT"]
+EDGEWEIGHTTYPES = PLANARMETRICS + ["GEO", "EXPLICIT"]
+
+# Earth radius in km and the value of pi used by TSPLIB's GEO distance.
+GEORADIUS = 6378.388
+GEOPI = 3.141592
+
+def PlanarWeights(Dists, Metric):
+    # Turn an array of Euclidean distances into the edge weights of a planar metric, in place.
+    if Metric == "EUC_2D":
+        # Nearest integer.
+        Dists += 0.5
+        np.floor(Dists, out=Dists)
+    elif Metric == "CEIL_2D":
+        np.ceil(Dists, out=Dists)
+    elif Metric == "ATT":
+        # Pseudo-Euclidean distance: the scaled distance rounded up whenever nearest-integer
+        # rounding would fall below it.
+        Dists /= math.sqrt(10.0)
+        Rounded = np.floor(Dists + 0.5)
+        Rounded[Rounded < Dists] += 1.0
+        Dists[...] = Rounded
+
+    return Dists
+
+def PlanarWeight(Dist, Metric):
+    # Scalar version of PlanarWeights.
+    if Metric == "EUC_2D":
+        return float(int(Dist + 0.5))
+    if Metric == "CEIL_2D":
+        return float(math.ceil(Dist))
+    if Metric == "ATT":
+        Scaled = Dist / math.sqrt(10.0)
+        Rounded = int(Scaled + 0.5)
+        if Rounded < Scaled:
+            Rounded += 1
+        return float(Rounded)
+
+    return Dist
+
+def GeoRadians(Coords):
+    # Convert (latitude, longitude) pairs in TSPLIB's DDD.MM notation (degrees, then minutes
+    # after the decimal point) into radians.
+    Coords = np.asarray(Coords, dtype=np.float64)
+    Degrees = np.trunc(Coords)
+    Minutes = Coords - Degrees
+    return GEOPI * (Degrees + 5.0*Minutes/3.0) / 180.0
+
+def GeoWeights(RadA, RadB):
+    # TSPLIB GEO distances (in whole km on an idealised sphere) between the points at matching
+    # positions of RadA and RadB, two arrays of (latitude, longitude) radians that broadcast.
+    Q1 = np.cos(RadA[..., 1] - RadB[..., 1])
+    Q2 = np.cos(RadA[..., 0] - RadB[..., 0])
+    Q3 = np.cos(RadA[..., 0] + RadB[..., 0])
+    Cosine = np.clip(0.5*((1.0 + Q1)*Q2 - (1.0 - Q1)*Q3), -1.0, 1.0)
+    return np.floor(GEORADIUS*np.arccos(Cosine) + 1.0)
+
+def GraphFromArrays(Names, XCoords, YCoords, GraphName, Bound=None):
+    # Build a TSP graph from a list of names and arrays of x and y coordinates in O(n) time
+    # (see TSPGraph.AddVertices). If no bound is given, it is set just above the largest coordinate.
+    if Bound == None:
+        Bound = 0
+        if len(Names) > 0:
+            Bound = math.floor(max(np.max(XCoords), np.max(YCoords))) + 1
+
+    NewGraph = TSPGraph(Bound, GraphName)
+    NewGraph.AddVertices(Names, XCoords, YCoords)
+    return NewGraph
+
+#   #   #   #   #   #   #   #   #   #
+
 class TSPGraph:
     # Class for objects representing a TSP graph.
     # Each TSP graph lay in a BxB Euclidian space, where B is the "bound" value of the graph.
@@ -83,6 +212,19 @@ class TSPGraph:
         self.vertices = []
         self.bound = math.floor(MyBounds)
         self.name = MyName
+        # Hash indexes into self.vertices so that lookups by name or by position take constant time.
+        # They are kept up to date by GenerateVertex, AddVertex, RemoveVertex and Clear.
+        self.nameindex = {}
+        self.posindex = {}
+        # Vertex coordinates are stored contiguously in an (N, 2) array, row i belonging to
+        # self.vertices[i]. The array over-allocates so that adding vertices is amortised O(1).
+        self.coords = np.zeros((16, 2), dtype=np.float64)
+        # Distances are cached lazily and dropped whenever the vertices change (see DistanceCache).
+        self.distcache = DistanceCache(self, DEFAULTCACHEBUDGET)
+        # Edge weight type (one of EDGEWEIGHTTYPES) and the data it needs: the (latitude, longitude)
+        # radians of each vertex for GEO, the full weight matrix for EXPLICIT. See SetMetric.
+        self.metric = None
+        self.metricdata = None
 
     def GetBounds(self):
         return self.bound
@@ -94,11 +236,7 @@ class TSPGraph:
         return self.name
     
     def NumVertices(self):
-        VertexNum = 0
-        for V in self.vertices:
-            VertexNum += 1
-
-        return VertexNum
+        return len(self.vertices)
     
     def GetVertexNames(self):
         VertexNames = []
@@ -125,12 +263,12 @@ class TSPGraph:
 
     def NameInGraph(self, SearchName):
         # Search the graph for a vertex with the given name and return a true or false value.
-        FoundVert = False
-        for V in self.vertices:
-            if V.GetName() == SearchName:
-                FoundVert = True
-        
-        return FoundVert
+        return SearchName in self.nameindex
+
+    def GetVertexIndex(self, VertName):
+        # Return the position of the named vertex in the graph's vertex list, or None if
+        # there is no such vertex.
+        return self.nameindex.get(VertName)
 
     def VertexDict(self):
         # Returns the vertices and their positions in the form of a dictionary/associative array.
@@ -142,18 +280,110 @@ class TSPGraph:
 
     def GetVertex(self, VertX, VertY):
         # Search for a vertex based on its position coordinates. If found, return said vertex.
-        FoundVert = None
-        for V in self.vertices:
-            CVPos = V.GetPosition()
-            if CVPos[0] == VertX and CVPos[1] == VertY:
-                FoundVert = V
+        FoundInd = self.posindex.get((VertX, VertY))
+        if FoundInd == None:
+            return None
 
-        return FoundVert
+        return self.vertices[FoundInd]
     
     def Clear(self):
         # Remove all existing vertices from the graph.
         for v in self.vertices:
-            self.vertices.remove(v)
+            if v.GetGraph() is self:
+                v.Detach()
+        self.vertices = []
+        self.nameindex = {}
+        self.posindex = {}
+        self.metric = None
+        self.metricdata = None
+        self.distcache.Invalidate()
+
+    def SetMetric(self, EdgeWeightType, MetricData=None):
+        # Choose how distances between the vertices are measured.
+        # None, "EUC_2D", "CEIL_2D" and "ATT" are computed from the vertex positions.
+        # "GEO" takes an (N, 2) array of (latitude, longitude) in TSPLIB's DDD.MM notation and
+        # "EXPLICIT" an (N, N) weight matrix, row i belonging to self.vertices[i].
+        NumVerts = len(self.vertices)
+        if EdgeWeightType not in EDGEWEIGHTTYPES:
+            print("Unknown edge weight type", EdgeWeightType, "for graph", self.name)
+            return
+
+        NewData = None
+        if EdgeWeightType == "GEO":
+            NewData = GeoRadians(MetricData) if MetricData is not None else None
+            if NewData is None or NewData.shape != (NumVerts, 2):
+                print("GEO distances need a latitude and longitude for each of the", NumVerts, "vertices.")
+                return
+        elif EdgeWeightType == "EXPLICIT":
+            NewData = np.asarray(MetricData, dtype=np.float64) if MetricData is not None else None
+            if NewData is None or NewData.shape != (NumVerts, NumVerts):
+                print("EXPLICIT distances need a", NumVerts, "x", NumVerts, "weight matrix.")
+                return
+
+        self.metric = EdgeWeightType
+        self.metricdata = NewData
+        self.distcache.Invalidate()
+
+    def GetMetric(self):
+        return self.metric
+
+    def IsPlanar(self):
+        # Whether distances are a non-decreasing function of the Euclidean distance between the
+        # vertex positions, so that spatial structures such as SpatialIndex give correct answers.
+        return self.metric in PLANARMETRICS
+
+    def DistanceScale(self):
+        # An upper bound on the distance between any two vertices.
+        if self.metric == "EXPLICIT":
+            return float(self.metricdata.max()) if len(self.metricdata) > 0 else 0.0
+        if self.metric == "GEO":
+            return math.floor(GEOPI*GEORADIUS + 1.0)
+
+        Coords = self.Coordinates()
+        Diagonal = 0.0
+        if len(Coords) > 0:
+            Diagonal = float(np.hypot(*np.ptp(Coords, axis=0)))
+        return PlanarWeight(Diagonal, self.metric) + 1.0
+
+    def IndexVertex(self, NewVert):
+        # Append a vertex to the vertex list, copy its position into the coordinate array and
+        # record it in the name and position indexes.
+        NewInd = len(self.vertices)
+        if NewInd == len(self.coords):
+            NewCoords = np.zeros((2*len(self.coords), 2), dtype=np.float64)
+            NewCoords[:NewInd] = self.coords[:NewInd]
+            self.coords = NewCoords
+
+        self.coords[NewInd] = NewVert.GetPosition()
+        self.nameindex[NewVert.GetName()] = NewInd
+        self.posindex[NewVert.GetPosition()] = NewInd
+        self.vertices.append(NewVert)
+        if NewVert.GetGraph() is self:
+            NewVert.index = NewInd
+        if self.metricdata is not None:
+            # The stored weights do not cover the new vertex.
+            print("Graph", self.name, "no longer uses", self.metric, "distances after adding a vertex.")
+            self.metric = None
+            self.metricdata = None
+        self.distcache.Invalidate()
+
+    def Coordinates(self):
+        # Return the (N, 2) array of vertex coordinates. Row i is the position of self.vertices[i].
+        return self.coords[:len(self.vertices)]
+
+    def ReindexVertex(self, Vert, OldName, OldPosition):
+        # Called by a vertex of this graph whenever its name or position changes.
+        VertInd = self.nameindex.get(OldName)
+        if VertInd == None or self.vertices[VertInd] is not Vert:
+            return
+
+        del self.nameindex[OldName]
+        if self.posindex.get(OldPosition) == VertInd:
+            del self.posindex[OldPosition]
+        self.nameindex[Vert.GetName()] = VertInd
+        self.posindex[Vert.GetPosition()] = VertInd
+        if OldPosition != Vert.GetPosition():
+            self.distcache.Invalidate()
     
     def PositionOccupied(self, VertX, VertY):
         # Returns whether or not an (x, y) position in the graph is occupied by a vertex.
@@ -167,26 +397,32 @@ class TSPGraph:
     
     def GetVertexPosition(self, VertName):
         # Search the graph for a specific vertex. If found, return its position.
-        FoundVertPos = (None, None)
-        for V in self.vertices:
-            if V == VertName:
-                FoundVertPos = V.GetPosition()
+        # Accepts either a vertex object belonging to this graph or a vertex name.
+        if isinstance(VertName, TSPVertex):
+            FoundVert = self.SearchByName(VertName.GetName())
+            if FoundVert is not VertName:
+                return (None, None)
+        else:
+            FoundVert = self.SearchByName(VertName)
+            if FoundVert == None:
+                return (None, None)
 
-        return FoundVertPos
+        return FoundVert.GetPosition()
     
     def SearchByName(self, VertName):
         # Search for a vertex by name. Return the vertex if it exists in the graph.
-        FoundVert = None
-        for V in self.vertices:
-            if V.GetName() == VertName:
-                FoundVert = V
+        FoundInd = self.nameindex.get(VertName)
+        if FoundInd == None:
+            return None
 
-        return FoundVert
+        return self.vertices[FoundInd]
     
     def GenerateVertex(self,  NewName, VertX, VertY,):
         # Create a new vertex in the graph with the specified parameters if such a vertex does not already exist.
         # The position and name for each vertex in the graph must be unique.
         FoundVert = self.GetVertex(VertX, VertY)
+        if FoundVert == None:
+            FoundVert = self.SearchByName(NewName)
         if FoundVert != None:
             print("There is already a vertex in graph ", self.name, " with position", (VertX, VertY), " or name ", NewName)
         if FoundVert == None:
@@ -194,65 +430,271 @@ class TSPGraph:
                 NewVert = TSPVertex(NewName)
                 NewVert.SetPosition((VertX), (VertY))
                 NewVert.SetParentGraph(self)
-                self.vertices.append(NewVert)
+                self.IndexVertex(NewVert)
             else:
                 ("Could not create vertex with the given coordinates. Coordinates must be positive integers"
                 "between zero and", self.bound)
             
         
+    def AddVertices(self, Names, XCoords, YCoords):
+        # Bulk version of GenerateVertex for building a graph from parsed arrays. The bounds of every
+        # position are checked at once with NumPy and the names and positions are checked for
+        # duplicates in one pass over the hash indexes, so adding n vertices takes O(n) time.
+        # Vertices whose name or position is already taken, or whose position lies outside the bounds,
+        # are skipped. Returns the number of vertices added.
+        Positions = np.column_stack((np.asarray(XCoords, dtype=np.float64), np.asarray(YCoords, dtype=np.float64)))
+        InBounds = ((Positions >= 0) & (Positions < self.bound)).all(axis=1).tolist()
+        FirstInd = len(self.vertices)
+        NewInd = FirstInd
+        Kept = []
+        Duplicates = 0
+        OutOfBounds = 0
+        nameindex = self.nameindex
+        posindex = self.posindex
+
+        for i, (Name, Pos) in enumerate(zip(Names, map(tuple, Positions.tolist()))):
+            if InBounds[i] == False:
+                OutOfBounds += 1
+            elif Name in nameindex or Pos in posindex:
+                Duplicates += 1
+            else:
+                nameindex[Name] = NewInd
+                posindex[Pos] = NewInd
+                Kept.append(i)
+                NewInd += 1
+
+        if NewInd > len(self.coords):
+            NewCoords = np.zeros((max(NewInd, 2*len(self.coords)), 2), dtype=np.float64)
+            NewCoords[:FirstInd] = self.coords[:FirstInd]
+            self.coords = NewCoords
+        self.coords[FirstInd:NewInd] = Positions[Kept]
+
+        for Ind, i in enumerate(Kept, FirstInd):
+            NewVert = TSPVertex(Names[i])
+            NewVert.SetParentGraph(self)
+            NewVert.index = Ind
+            self.vertices.append(NewVert)
+
+        if Duplicates > 0:
+            print("Skipped", Duplicates, "vertices whose name or position is already in graph", self.name)
+        if OutOfBounds > 0:
+            print("Skipped", OutOfBounds, "vertices outside the bounds of graph", self.name, "(0 to", str(self.bound) + ")")
+        if len(Kept) > 0 and self.metricdata is not None:
+            print("Graph", self.name, "no longer uses", self.metric, "distances after adding vertices.")
+            self.metric = None
+            self.metricdata = None
+        self.distcache.Invalidate()
+
+        return len(Kept)
+
     def AddVertex(self, NewVert):
         # Add an existing vertex into the graph if there does not already exist a vertex in the graph
         # with the specified position or name.
         NewVertPos = NewVert.GetPosition()
         FoundVert = self.GetVertex(NewVertPos[0], NewVertPos[1])
-        FoundVertPos = self.GetVertexPosition(NewVert)
+        FoundVertPos = self.GetVertexPosition(NewVert.GetName())
         if FoundVert != None or FoundVertPos != (None, None):
             print("There is already a vertex in graph",self.name,"with position",NewVertPos,"or name",NewVert.GetName())
 
         if FoundVert == None and FoundVertPos == (None, None):
             NewVert.SetParentGraph(self)
-            self.vertices.append(NewVert)
+            self.IndexVertex(NewVert)
             print("Added vertex", NewVert.GetName(), "to", self.GetName())
 
     def RemoveVertex(self, VertName):
-        FoundVert = self.SearchByName(VertName)
+        FoundInd = self.nameindex.get(VertName)
         
-        if FoundVert == None or FoundVert not in self.vertices:
+        if FoundInd == None:
             print ("Could not find vertex", VertName, "in graph", self.name)
         else:
-            FoundVert.SetParentGraph(None)
-            self.vertices.remove(FoundVert)
+            FoundVert = self.vertices[FoundInd]
+            del self.nameindex[VertName]
+            if self.posindex.get(FoundVert.GetPosition()) == FoundInd:
+                self.posindex.pop(FoundVert.GetPosition(), None)
+            FoundVert.Detach()
+            self.vertices.pop(FoundInd)
+            # Every vertex after the removed one moves down one place in the list and in the
+            # coordinate array.
+            NumVerts = len(self.vertices)
+            self.coords[FoundInd:NumVerts] = self.coords[FoundInd+1:NumVerts+1]
+            for i in range(FoundInd, NumVerts):
+                V = self.vertices[i]
+                if V.GetGraph() is self:
+                    V.index = i
+                self.nameindex[V.GetName()] = i
+                self.posindex[V.GetPosition()] = i
+            if self.metric == "GEO":
+                self.metricdata = np.delete(self.metricdata, FoundInd, axis=0)
+            elif self.metric == "EXPLICIT":
+                self.metricdata = np.delete(np.delete(self.metricdata, FoundInd, axis=0), FoundInd, axis=1)
+            self.distcache.Invalidate()
             print ("Removed vertex", VertName, "from", self.name)
         
     def GetDistance(self, VertAName, VertBName, RoundBool):
         # Get the distance between any two vertices in the graph.
         # If RoundBool is True, then round up to the nearest integer value
-        AInGraph = self.NameInGraph(VertAName)
-        BInGraph = self.NameInGraph(VertAName)
+        VertA = self.SearchByName(VertAName)
+        VertB = self.SearchByName(VertBName)
         VertDist = None
 
-        if AInGraph == True and BInGraph == True:
-            VertA = self.SearchByName(VertAName)
-            VertB = self.SearchByName(VertBName)
+        if VertA != None and VertB != None:
             VertDist = VertA.GetDistance(VertB, RoundBool)
         
         return VertDist
+
+    def DistancesFrom(self, SourceInd, TargetInds, RoundBool):
+        # One-to-many distances from the vertex at index SourceInd to the vertices at the indices
+        # in TargetInds (or to every vertex if TargetInds is None), returned as a NumPy array.
+        # If RoundBool is True, round up to the nearest integer value.
+        if self.IsPlanar() == False:
+            return self.DistanceBlock([SourceInd], TargetInds, RoundBool)[0]
+
+        Coords = self.Coordinates()
+        if TargetInds is not None:
+            Coords = Coords[TargetInds]
+
+        DeltaX = Coords[:, 0] - self.coords[SourceInd, 0]
+        DeltaY = Coords[:, 1] - self.coords[SourceInd, 1]
+        Dists = PlanarWeights(np.sqrt(DeltaX*DeltaX + DeltaY*DeltaY), self.metric)
+        if RoundBool == True:
+            Dists = np.ceil(Dists)
+
+        return Dists
+
+    def PairDistances(self, IndsA, IndsB, RoundBool):
+        # Element-wise distances between the vertices at IndsA[i] and IndsB[i], e.g. for a list of edges.
+        if self.metric == "EXPLICIT":
+            Dists = self.metricdata[IndsA, IndsB]
+        elif self.metric == "GEO":
+            Dists = GeoWeights(self.metricdata[IndsA], self.metricdata[IndsB])
+            Dists[np.asarray(IndsA) == np.asarray(IndsB)] = 0.0
+        else:
+            Deltas = self.coords[IndsA] - self.coords[IndsB]
+            Dists = PlanarWeights(np.sqrt((Deltas*Deltas).sum(axis=1)), self.metric)
+        if RoundBool == True:
+            Dists = np.ceil(Dists)
+
+        return Dists
+
+    def DistanceFunction(self):
+        # Return a function D(i, j) giving the distance between the vertices at indices i and j.
+        # It works on plain Python lists, which is the fastest option for the scalar lookups made
+        # inside the local search loops in TSPAlgo.
+        if self.metric == "EXPLICIT":
+            Rows = self.metricdata.tolist()
+
+            def Dist(IndA, IndB):
+                return Rows[IndA][IndB]
+
+            return Dist
+
+        if self.metric == "GEO":
+            Latitudes = self.metricdata[:, 0].tolist()
+            Longitudes = self.metricdata[:, 1].tolist()
+            cos = math.cos
+            acos = math.acos
+
+            def Dist(IndA, IndB):
+                if IndA == IndB:
+                    return 0.0
+                Q1 = cos(Longitudes[IndA] - Longitudes[IndB])
+                Q2 = cos(Latitudes[IndA] - Latitudes[IndB])
+                Q3 = cos(Latitudes[IndA] + Latitudes[IndB])
+                Cosine = min(1.0, max(-1.0, 0.5*((1.0 + Q1)*Q2 - (1.0 - Q1)*Q3)))
+                return float(int(GEORADIUS*acos(Cosine) + 1.0))
+
+            return Dist
+
+        XCoords = self.Coordinates()[:, 0].tolist()
+        YCoords = self.Coordinates()[:, 1].tolist()
+        hypot = math.hypot
+        Metric = self.metric
+
+        if Metric == None:
+            def Dist(IndA, IndB):
+                return hypot(XCoords[IndA] - XCoords[IndB], YCoords[IndA] - YCoords[IndB])
+        else:
+            def Dist(IndA, IndB):
+                return PlanarWeight(hypot(XCoords[IndA] - XCoords[IndB], YCoords[IndA] - YCoords[IndB]), Metric)
+
+        return Dist
+
+    def DistanceRow(self, SourceInd, RoundBool):
+        # Distances from the vertex at index SourceInd to every vertex, served from the distance
+        # cache. The returned row is shared with the cache and must not be modified.
+        Row = self.distcache.Row(SourceInd)
+        if RoundBool == True:
+            Row = np.ceil(Row)
+
+        return Row
+
+    def NearestNeighbors(self, NumNeighbors):
+        # Return an (N, k) array whose i-th row holds the indices of the k vertices closest to
+        # vertex i, nearest first. The lists are cached until the vertices change.
+        return self.distcache.Neighbors(NumNeighbors)
+
+    def SpatialIndex(self):
+        # Return a new SpatialIndex over the vertices of this graph. It answers nearest vertex and
+        # k-nearest-neighbor queries and supports removing vertices, e.g. as they are visited.
+        # The index works on the vertex positions, so its answers only hold if IsPlanar() is True.
+        return SpatialIndex(self.Coordinates())
+
+    def GetDistanceCache(self):
+        return self.distcache
+
+    def SetCacheBudget(self, NewBudget):
+        # Set the number of bytes the distance cache may use. This clears the cache.
+        self.distcache = DistanceCache(self, NewBudget)
+
+    def CacheStats(self):
+        # Return the hit/miss statistics of the distance cache (see DistanceCache.Stats).
+        return self.distcache.Stats()
+
+    def DistanceBlock(self, RowInds, ColInds, RoundBool):
+        # Many-to-many distances. Entry [i][j] of the returned array is the distance from vertex
+        # RowInds[i] to vertex ColInds[j]. Passing None for either selects every vertex.
+        if self.IsPlanar() == False:
+            NumVerts = len(self.vertices)
+            RowInds = np.arange(NumVerts) if RowInds is None else np.asarray(RowInds)
+            ColInds = np.arange(NumVerts) if ColInds is None else np.asarray(ColInds)
+            if self.metric == "EXPLICIT":
+                Dists = self.metricdata[np.ix_(RowInds, ColInds)]
+            else:
+                Dists = GeoWeights(self.metricdata[RowInds][:, None, :], self.metricdata[ColInds][None, :, :])
+                Dists[RowInds[:, None] == ColInds[None, :]] = 0.0
+            if RoundBool == True:
+                Dists = np.ceil(Dists)
+            return Dists
+
+        Coords = self.Coordinates()
+        RowCoords = Coords if RowInds is None else Coords[RowInds]
+        ColCoords = Coords if ColInds is None else Coords[ColInds]
+
+        # The squares are accumulated in place to avoid allocating further temporary blocks.
+        Dists = RowCoords[:, 0, None] - ColCoords[None, :, 0]
+        DeltaY = RowCoords[:, 1, None] - ColCoords[None, :, 1]
+        Dists *= Dists
+        DeltaY *= DeltaY
+        Dists += DeltaY
+        np.sqrt(Dists, out=Dists)
+        PlanarWeights(Dists, self.metric)
+        if RoundBool == True:
+            Dists = np.ceil(Dists)
+
+        return Dists
     
     def GetEdges(self):
         # Return a list of all edges in the graph 
         # If the distance between two vertices is not a null value or zero,
         # then the vertices are adjacent.
         EdgeList = []
+        VertNames = self.GetVertexNames()
 
-        for X in self.vertices:
-            for Y in self.vertices:
-                if X != Y:
-                    XName = X.GetName()
-                    YName = Y.GetName()
-                    if (XName, YName) not in EdgeList and (YName, XName) not in EdgeList:
-                        VertDist = X.GetDistance(Y, False)
-                        if VertDist != None and VertDist != 0:
-                            EdgeList.append((XName, YName))
+        for i in range(0, len(VertNames)):
+            # Only look at the vertices after X so that each edge is listed once.
+            Adjacent = np.nonzero(self.DistancesFrom(i, np.arange(i+1, len(VertNames)), False))[0]
+            for j in Adjacent:
+                EdgeList.append((VertNames[i], VertNames[i+1+j]))
                     
         return (EdgeList)
 
@@ -275,35 +717,64 @@ class TSPGraph:
         # Returns the total weight of a path or walk within the graph.
         # The order of the vertex names determines the order in which the vertices are visited.
         # If RoundBool == True, round up to the nearest integer value.
+        # The names are converted to indices once and the weight is summed by IndexPathWeight.
+        return self.IndexPathWeight(self.PathIndices(VertexNames), RoundBool)
+
+    def PathIndices(self, VertexNames):
+        # Convert a list of vertex names into an int32 array of vertex indices. Names that are not in
+        # the graph become -1.
+        nameindex = self.nameindex
+        return np.array([nameindex.get(v, -1) for v in VertexNames], dtype=np.int32)
+
+    def PathNames(self, PathInds):
+        # Convert an array or list of vertex indices back into a list of vertex names.
+        Names = self.GetVertexNames()
+        return [Names[v] for v in np.asarray(PathInds).tolist()]
+
+    def IndexPathWeight(self, PathInds, RoundBool):
+        # Total weight of the walk through the vertex indices in PathInds, gathered and summed in one
+        # vectorized pass. Edges with an end of -1 (a vertex not in the graph) are skipped.
+        # If RoundBool == True, round the total up to the nearest integer value.
+        PathInds = np.asarray(PathInds)
         TotalWeight = 0
-        CurrentVert = None
-        PreviousVert = None
-        for i in range(0, len(VertexNames)):
-            if i > 0:
-                CurrentVert = self.SearchByName(VertexNames[i])
-                PreviousVert = self.SearchByName(VertexNames[i-1])
-                if PreviousVert != None and CurrentVert != None:
-                   TotalWeight += self.GetDistance(VertexNames[i-1], VertexNames[i], False)
-            
+        if len(PathInds) > 1:
+            Valid = (PathInds[:-1] >= 0) & (PathInds[1:] >= 0)
+            TotalWeight = float(self.PairDistances(PathInds[:-1][Valid], PathInds[1:][Valid], False).sum())
+
         if RoundBool == True:
             TotalWeight = math.ceil(TotalWeight)
 
         return TotalWeight
-    
+
+    def CycleWeight(self, PathInds, RoundBool):
+        # Weight of the cycle through PathInds, adding the edge back to the first vertex unless the
+        # path already ends where it started.
+        PathInds = np.asarray(PathInds)
+        if len(PathInds) > 1 and PathInds[0] != PathInds[-1]:
+            PathInds = np.append(PathInds, PathInds[0])
+
+        return self.IndexPathWeight(PathInds, RoundBool)
+
+    def OpenPathWeight(self, PathInds, RoundBool):
+        # Weight of the open path through PathInds, leaving out the final edge back to the first vertex
+        # if the path has been closed into a cycle.
+        PathInds = np.asarray(PathInds)
+        if len(PathInds) > 2 and PathInds[0] == PathInds[-1]:
+            PathInds = PathInds[:-1]
+
+        return self.IndexPathWeight(PathInds, RoundBool)
+
+    def IndexPath(self, VertexNames):
+        # Return the compact IndexPath for a list of vertex names.
+        return IndexPath(self, self.PathIndices(VertexNames))
+
     def CostMatrix(self, RoundBool):
         # Generate the cost matrix for the graph. The "cost" refers to the distance between
         # two vertices. The distance between any vertex and itself is 0.
-        CostMat = []
-
-        for V in self.vertices:
-            VertRow = []
-            for W in self.vertices:
-                VertDist = 0
-                if V != W:
-                    VertDist = V.GetDistance(W, RoundBool)
-                VertRow.append(VertDist)
-            
-            CostMat.append(VertRow)
+        # Row i and column j refer to self.vertices[i] and self.vertices[j].
+        # The matrix is computed in float64 so that its entries, rounded or not, match GetDistance.
+        # The distance cache keeps its own float32 copy for the algorithms' internal use.
+        CostMat = self.DistanceBlock(None, None, RoundBool)
         
         #print("Cost matrix for graph", self.name, ":")
         #for C in CostMat:
@@ -329,6 +800,631 @@ class TSPGraph:
 
 #   #   #   #   #   #   #   #   #   #
 
+# Default number of bytes a graph's distance cache may use. With float32 entries this allows a dense
+# matrix for graphs of up to 8192 vertices.
+DEFAULTCACHEBUDGET = 256*1024*1024
+
+class DistanceCache:
+    # Lazily computed distances between the vertices of a TSP graph.
+    # If a dense NxN matrix fits within the memory budget, the whole matrix is computed on first use
+    # and kept. Otherwise single rows are computed on demand and kept in a least-recently-used cache
+    # holding as many rows as the budget allows. The cache also keeps the k-nearest candidate
+    # neighbor lists used by the local search algorithms. Distances are stored unrounded.
+    def __init__(self, GraphObj, MemoryBudget, DType=np.float32):
+        self.graph = GraphObj
+        self.budget = MemoryBudget
+        self.dtype = np.dtype(DType)
+        self.matrix = None
+        self.rows = collections.OrderedDict()
+        self.neighbors = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def Invalidate(self):
+        # Forget every cached distance. Called by the graph whenever its vertices change.
+        self.matrix = None
+        self.rows = collections.OrderedDict()
+        self.neighbors = None
+
+    def DenseFits(self):
+        # Whether a full distance matrix for the graph fits inside the memory budget.
+        NumVerts = self.graph.NumVertices()
+        return NumVerts*NumVerts*self.dtype.itemsize <= self.budget
+
+    def RowCapacity(self):
+        # How many rows the LRU cache may hold (at least one).
+        NumVerts = max(1, self.graph.NumVertices())
+        return max(1, self.budget // (NumVerts*self.dtype.itemsize))
+
+    def Matrix(self):
+        # Return the full distance matrix, computed on first use and kept. It is filled a block of
+        # rows at a time so that no temporary float64 copy of the whole matrix is made. If the matrix
+        # does not fit inside the budget it is not built at all and None is returned.
+        if self.matrix is not None:
+            self.hits += 1
+            return self.matrix
+
+        if self.DenseFits() == False:
+            print("A full distance matrix for", self.graph.NumVertices(), "vertices does not fit in the cache budget of", self.budget, "bytes.")
+            return None
+
+        self.misses += 1
+        NumVerts = self.graph.NumVertices()
+        FullMatrix = np.zeros((NumVerts, NumVerts), dtype=self.dtype)
+        BlockSize = max(1, (8*1024*1024) // max(1, NumVerts))
+        for Start in range(0, NumVerts, BlockSize):
+            RowInds = np.arange(Start, min(NumVerts, Start+BlockSize))
+            FullMatrix[RowInds] = self.graph.DistanceBlock(RowInds, None, False)
+        self.matrix = FullMatrix
+
+        return FullMatrix
+
+    def Row(self, SourceInd):
+        # Return the distances from vertex SourceInd to every vertex.
+        if self.matrix is not None or self.DenseFits():
+            return self.Matrix()[SourceInd]
+
+        if SourceInd in self.rows:
+            self.hits += 1
+            self.rows.move_to_end(SourceInd)
+            return self.rows[SourceInd]
+
+        self.misses += 1
+        NewRow = self.graph.DistancesFrom(SourceInd, None, False).astype(self.dtype)
+        self.rows[SourceInd] = NewRow
+        if len(self.rows) > self.RowCapacity():
+            self.rows.popitem(last=False)
+            self.evictions += 1
+
+        return NewRow
+
+    def Distance(self, IndA, IndB):
+        # Distance between two vertices given by index.
+        return float(self.Row(IndA)[IndB])
+
+    def Block(self, RowInds, ColInds):
+        # Distances from each vertex in RowInds to each vertex in ColInds, built from cached rows.
+        if self.matrix is not None or self.DenseFits():
+            return self.Matrix()[np.ix_(RowInds, ColInds)]
+
+        return np.stack([self.Row(r)[ColInds] for r in RowInds])
+
+    def Neighbors(self, NumNeighbors):
+        # Return the indices of the k nearest vertices of every vertex, nearest first.
+        NumVerts = self.graph.NumVertices()
+        NumNeighbors = max(0, min(NumNeighbors, NumVerts-1))
+        if self.neighbors is not None and self.neighbors.shape[1] >= NumNeighbors:
+            self.hits += 1
+            return self.neighbors[:, :NumNeighbors]
+
+        self.misses += 1
+        NeighborArr = np.zeros((NumVerts, NumNeighbors), dtype=np.int32)
+        if NumVerts > DENSENEIGHBORLIMIT and self.graph.IsPlanar() == True:
+            # Planar distances rank vertices in the same order as the positions do.
+            NeighborArr = self.graph.SpatialIndex().AllNeighbors(NumNeighbors)
+        elif NumNeighbors > 0:
+            # Work through the graph a block of rows at a time so that the temporary distance block
+            # stays around 64 MB regardless of the size of the graph.
+            BlockSize = max(1, (8*1024*1024) // NumVerts)
+            for Start in range(0, NumVerts, BlockSize):
+                RowInds = np.arange(Start, min(NumVerts, Start+BlockSize))
+                Block = self.graph.DistanceBlock(RowInds, None, False)
+                Block[np.arange(len(RowInds)), RowInds] = np.inf
+                Nearest = np.argpartition(Block, NumNeighbors-1, axis=1)[:, :NumNeighbors]
+                NearestDists = np.take_along_axis(Block, Nearest, axis=1)
+                Order = np.argsort(NearestDists, axis=1, kind="stable")
+                NeighborArr[RowInds] = np.take_along_axis(Nearest, Order, axis=1)
+
+        self.neighbors = NeighborArr
+        return NeighborArr
+
+    def SetNeighbors(self, NeighborArr):
+        # Supply precomputed neighbor lists (an (N, k) array, nearest first), e.g. read back from a
+        # cached instance file, so that Neighbors does not have to compute them.
+        if NeighborArr is not None and len(NeighborArr) == self.graph.NumVertices():
+            self.neighbors = NeighborArr
+
+    def Stats(self):
+        # Return a dictionary describing how the cache is being used so that the budget can be sized.
+        UsedBytes = len(self.rows)*self.graph.NumVertices()*self.dtype.itemsize
+        if self.matrix is not None:
+            UsedBytes = self.matrix.nbytes
+        if self.neighbors is not None:
+            UsedBytes += self.neighbors.nbytes
+
+        Lookups = self.hits + self.misses
+        return {"mode": "dense" if self.DenseFits() else "rows",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitrate": self.hits/Lookups if Lookups > 0 else 0.0,
+                "evictions": self.evictions,
+                "cachedrows": len(self.rows),
+                "rowcapacity": self.RowCapacity(),
+                "bytes": UsedBytes,
+                "budget": self.budget}
+
+#   #   #   #   #   #   #   #   #   #
+
+# Graphs with up to this many vertices compute their neighbor lists from blocks of the distance
+# matrix. Larger graphs use a SpatialIndex.
+DENSENEIGHBORLIMIT = 1024
+
+class SpatialIndex:
+    # Uniform bucket grid over the vertices of a graph, used for nearest neighbor queries.
+    # The plane is cut into square cells holding about two vertices each, and the vertex indices are
+    # stored sorted by cell (row by row) so that a run of cells along a row is one contiguous slice.
+    # Vertices can be removed. Removed vertices stay in their cells and are skipped by queries until
+    # enough of them have gone that the grid is rebuilt over the remaining vertices, which keeps the
+    # cells dense and the queries near O(1) however many vertices have been removed.
+    def __init__(self, Coords):
+        self.coords = Coords
+        self.alive = np.ones(len(Coords), dtype=bool)
+        self.numalive = len(Coords)
+        self.Build()
+
+    def Build(self):
+        # (Re)build the grid over the vertices that are still present.
+        Members = np.flatnonzero(self.alive)
+        self.numbuilt = len(Members)
+        Coords = self.coords[Members]
+        if len(Members) > 0:
+            self.origin = Coords.min(axis=0)
+            Span = Coords.max(axis=0) - self.origin
+        else:
+            self.origin = np.zeros(2)
+            Span = np.zeros(2)
+
+        CellSize = math.sqrt(float(Span[0]*Span[1])*2.0/max(1, len(Members)))
+        CellSize = max(CellSize, float(Span.max())/max(1, 2*len(Members)), 1e-9)
+        self.cellsize = CellSize
+        self.width = int(Span[0] // CellSize) + 1
+        self.height = int(Span[1] // CellSize) + 1
+
+        CellX, CellY = self.CellOf(Coords)
+        CellIds = CellY*self.width + CellX
+        Order = np.argsort(CellIds, kind="stable")
+        self.cellpoints = Members[Order]
+        self.cellstart = np.searchsorted(CellIds[Order], np.arange(self.width*self.height + 1))
+
+    def CellOf(self, Points):
+        # Grid column and row of each point of an (N, 2) array, clipped to the grid.
+        Cells = ((Points - self.origin) // self.cellsize).astype(np.int64)
+        return np.clip(Cells[:, 0], 0, self.width-1), np.clip(Cells[:, 1], 0, self.height-1)
+
+    def NumAlive(self):
+        return self.numalive
+
+    def Remove(self, Ind):
+        # Remove vertex Ind from the index. The grid is rebuilt once three quarters of the vertices
+        # it was built over have been removed, so the rebuilds take O(n) time altogether.
+        if self.alive[Ind] == True:
+            self.alive[Ind] = False
+            self.numalive -= 1
+            if self.numalive > 0 and self.numalive*4 < self.numbuilt:
+                self.Build()
+
+    def RowSlice(self, Row, Col0, Col1):
+        # Vertex indices stored in the cells Col0..Col1 of grid row Row.
+        Start = Row*self.width
+        return self.cellpoints[self.cellstart[Start + Col0]:self.cellstart[Start + Col1 + 1]]
+
+    def Query(self, Point, NumNeighbors):
+        # Return the indices of the NumNeighbors remaining vertices closest to Point (an (x, y) pair),
+        # nearest first. Rings of cells are searched outwards from the cell holding Point. After ring r
+        # every unseen vertex is at least r cells away, so the search stops as soon as the k-th closest
+        # vertex found is no further than that.
+        NumNeighbors = min(NumNeighbors, self.numalive)
+        if NumNeighbors <= 0:
+            return np.zeros(0, dtype=np.int64)
+
+        PointArr = np.array([Point], dtype=np.float64)
+        CellX, CellY = self.CellOf(PointArr)
+        CellX = int(CellX[0])
+        CellY = int(CellY[0])
+        MaxRing = max(CellX, self.width-1-CellX, CellY, self.height-1-CellY)
+        Found = np.zeros(0, dtype=np.int64)
+        FoundDists = np.zeros(0)
+
+        for Ring in range(0, MaxRing+1):
+            Col0 = max(0, CellX-Ring)
+            Col1 = min(self.width-1, CellX+Ring)
+            Pieces = []
+            for Row in (CellY-Ring, CellY+Ring):
+                if 0 <= Row < self.height:
+                    Pieces.append(self.RowSlice(Row, Col0, Col1))
+                if Ring == 0:
+                    break
+            for Row in range(max(0, CellY-Ring+1), min(self.height, CellY+Ring)):
+                for Col in (CellX-Ring, CellX+Ring):
+                    if 0 <= Col < self.width:
+                        Pieces.append(self.RowSlice(Row, Col, Col))
+
+            if len(Pieces) > 0:
+                Candidates = np.concatenate(Pieces)
+                Candidates = Candidates[self.alive[Candidates]]
+                if len(Candidates) > 0:
+                    Deltas = self.coords[Candidates] - PointArr
+                    Found = np.concatenate((Found, Candidates))
+                    FoundDists = np.concatenate((FoundDists, np.sqrt((Deltas*Deltas).sum(axis=1))))
+                    if len(Found) > NumNeighbors:
+                        Keep = np.argpartition(FoundDists, NumNeighbors-1)[:NumNeighbors]
+                        Found = Found[Keep]
+                        FoundDists = FoundDists[Keep]
+
+            if len(Found) >= NumNeighbors and FoundDists.max() <= Ring*self.cellsize:
+                break
+
+        Order = np.argsort(FoundDists, kind="stable")
+        return Found[Order]
+
+    def Nearest(self, Point):
+        # Index of the remaining vertex closest to Point, or -1 if none remain.
+        Found = self.Query(Point, 1)
+        return int(Found[0]) if len(Found) > 0 else -1
+
+    def AllNeighbors(self, NumNeighbors):
+        # For every vertex the index was built over, return the indices of its NumNeighbors nearest
+        # other vertices, nearest first, as an (N, k) array. The grid is handled a tile of cells at a
+        # time: each tile's vertices are compared against the vertices of the tile widened by a margin
+        # of cells. A vertex whose k-th neighbor is further away than the edge of the widened tile
+        # might have a closer neighbor outside it, so those few vertices are checked against all of
+        # the vertices instead.
+        NumVerts = len(self.coords)
+        NeighborArr = np.zeros((NumVerts, NumNeighbors), dtype=np.int32)
+        if NumNeighbors <= 0 or self.numbuilt <= 1:
+            return NeighborArr
+
+        Tile = 8
+        Margin = max(2, int(math.ceil(math.sqrt(NumNeighbors))))
+        Unresolved = []
+        for TileY in range(0, self.height, Tile):
+            for TileX in range(0, self.width, Tile):
+                Rows = range(TileY, min(self.height, TileY+Tile))
+                Queries = np.concatenate([self.RowSlice(r, TileX, min(self.width, TileX+Tile)-1) for r in Rows])
+                if len(Queries) == 0:
+                    continue
+                Col0 = max(0, TileX-Margin)
+                Col1 = min(self.width-1, TileX+Tile-1+Margin)
+                Row0 = max(0, TileY-Margin)
+                Row1 = min(self.height-1, TileY+Tile-1+Margin)
+                Candidates = np.concatenate([self.RowSlice(r, Col0, Col1) for r in range(Row0, Row1+1)])
+                if len(Candidates) <= NumNeighbors:
+                    Unresolved.append(Queries)
+                    continue
+
+                QCoords = self.coords[Queries]
+                CCoords = self.coords[Candidates]
+                Dists = np.sqrt(((QCoords[:, None, :] - CCoords[None, :, :])**2).sum(axis=2))
+                Dists[Queries[:, None] == Candidates[None, :]] = np.inf
+                Nearest = np.argpartition(Dists, NumNeighbors-1, axis=1)[:, :NumNeighbors]
+                NearestDists = np.take_along_axis(Dists, Nearest, axis=1)
+                Order = np.argsort(NearestDists, axis=1, kind="stable")
+                NeighborArr[Queries] = Candidates[np.take_along_axis(Nearest, Order, axis=1)]
+
+                # Distance from each query vertex to the edge of the widened tile, ignoring the sides
+                # where it reaches the edge of the grid (nothing lies beyond those).
+                Low = self.origin + self.cellsize*np.array([Col0, Row0])
+                High = self.origin + self.cellsize*np.array([Col1+1, Row1+1])
+                Reach = np.full(len(Queries), np.inf)
+                if Col0 > 0:
+                    Reach = np.minimum(Reach, QCoords[:, 0] - Low[0])
+                if Row0 > 0:
+                    Reach = np.minimum(Reach, QCoords[:, 1] - Low[1])
+                if Col1 < self.width-1:
+                    Reach = np.minimum(Reach, High[0] - QCoords[:, 0])
+                if Row1 < self.height-1:
+                    Reach = np.minimum(Reach, High[1] - QCoords[:, 1])
+                Failed = NearestDists.max(axis=1) > Reach
+                if Failed.any():
+                    Unresolved.append(Queries[Failed])
+
+        if len(Unresolved) > 0:
+            Members = self.cellpoints
+            Unresolved = np.concatenate(Unresolved)
+            BlockSize = max(1, (8*1024*1024) // len(Members))
+            for Start in range(0, len(Unresolved), BlockSize):
+                Queries = Unresolved[Start:Start+BlockSize]
+                Deltas = self.coords[Queries][:, None, :] - self.coords[Members][None, :, :]
+                Dists = np.sqrt((Deltas*Deltas).sum(axis=2))
+                Dists[Queries[:, None] == Members[None, :]] = np.inf
+                Nearest = np.argpartition(Dists, NumNeighbors-1, axis=1)[:, :NumNeighbors]
+                Order = np.argsort(np.take_along_axis(Dists, Nearest, axis=1), axis=1, kind="stable")
+                NeighborArr[Queries] = Members[np.take_along_axis(Nearest, Order, axis=1)]
+
+        return NeighborArr
+
+class ArrayTour:
+    # Array representation of a cyclic tour over vertex indices 0..N-1, used by the local search
+    # algorithms in TSPAlgo. order[i] is the index of the i-th vertex visited and pos[v] is the place
+    # of vertex v in order, so successor, predecessor and betweenness queries take constant time and
+    # reversing a segment costs time proportional to the shorter side of the tour.
+    def __init__(self, Order):
+        self.order = np.array(Order, dtype=np.int32)
+        self.numverts = len(self.order)
+        self.pos = np.empty(self.numverts, dtype=np.int32)
+        self.pos[self.order] = np.arange(self.numverts, dtype=np.int32)
+
+    def NumVertices(self):
+        return self.numverts
+
+    def Next(self, V):
+        NextPos = self.pos[V] + 1
+        if NextPos == self.numverts:
+            NextPos = 0
+        return int(self.order[NextPos])
+
+    def Prev(self, V):
+        return int(self.order[self.pos[V] - 1])
+
+    def Between(self, A, B, C):
+        # Return True if B lies on the forward path from A to C (endpoints included).
+        PosA = self.pos[A]
+        PosB = self.pos[B]
+        PosC = self.pos[C]
+        if PosA <= PosC:
+            return PosA <= PosB and PosB <= PosC
+
+        return PosB >= PosA or PosB <= PosC
+
+    def Reverse(self, A, B):
+        # Reverse the forward path from A to B, so that the tour ... P A ... B N ... becomes
+        # ... P B ... A N .... When that path is longer than half the tour, the complementary path
+        # is reversed instead, which gives the same cycle for less work.
+        StartPos = int(self.pos[A])
+        EndPos = int(self.pos[B])
+        SegLen = (EndPos - StartPos) % self.numverts + 1
+        if 2*SegLen > self.numverts and SegLen < self.numverts:
+            StartPos, EndPos = (EndPos + 1) % self.numverts, (StartPos - 1) % self.numverts
+            SegLen = self.numverts - SegLen
+
+        if SegLen < 2:
+            return
+
+        if StartPos <= EndPos:
+            Inds = np.arange(StartPos, EndPos + 1)
+        else:
+            Inds = (StartPos + np.arange(SegLen)) % self.numverts
+
+        Segment = self.order[Inds][::-1]
+        self.order[Inds] = Segment
+        self.pos[Segment] = Inds
+
+    def Order(self, StartVert):
+        # Return the tour as a list of vertex indices beginning at StartVert (or at the first
+        # position if StartVert is None).
+        Order = self.order.tolist()
+        if StartVert != None:
+            StartPos = int(self.pos[StartVert])
+            Order = Order[StartPos:] + Order[:StartPos]
+
+        return Order
+
+class TwoLevelTour:
+    # Two-level doubly-linked list representation of a cyclic tour, with the same methods as
+    # ArrayTour. The tour is cut into about sqrt(N) segments. Each segment keeps its vertices in a
+    # Python list and a "reversed" flag saying whether the list is read backwards, and the segments
+    # themselves are kept in tour order. Reversing a path splits at most two segments and then reverses
+    # the order of the whole segments in between, flipping their flags, so it costs O(sqrt(N)) rather
+    # than O(N). Splits leave more and more short segments behind, so the lists are rebuilt into
+    # equal segments once there are twice as many segments as there should be.
+    def __init__(self, Order):
+        self.numverts = len(Order)
+        self.seg = [0]*self.numverts
+        self.idx = [0]*self.numverts
+        self.Rebuild(list(Order))
+
+    def Rebuild(self, Order):
+        # Cut the tour into equal segments of about sqrt(N) vertices.
+        SegSize = max(8, int(math.sqrt(self.numverts)))
+        self.segitems = []
+        self.segrev = []
+        for Start in range(0, self.numverts, SegSize):
+            SegId = len(self.segitems)
+            Items = Order[Start:Start+SegSize]
+            for i, V in enumerate(Items):
+                self.seg[V] = SegId
+                self.idx[V] = i
+            self.segitems.append(Items)
+            self.segrev.append(False)
+        self.segorder = list(range(0, len(self.segitems)))
+        self.segpos = list(range(0, len(self.segitems)))
+        self.maxsegs = 2*len(self.segitems) + 2
+
+    def NumVertices(self):
+        return self.numverts
+
+    def First(self, SegId):
+        Items = self.segitems[SegId]
+        return Items[-1] if self.segrev[SegId] else Items[0]
+
+    def Last(self, SegId):
+        Items = self.segitems[SegId]
+        return Items[0] if self.segrev[SegId] else Items[-1]
+
+    def Next(self, V):
+        SegId = self.seg[V]
+        i = self.idx[V]
+        if self.segrev[SegId]:
+            if i > 0:
+                return self.segitems[SegId][i-1]
+        elif i + 1 < len(self.segitems[SegId]):
+            return self.segitems[SegId][i+1]
+
+        NextPos = self.segpos[SegId] + 1
+        if NextPos == len(self.segorder):
+            NextPos = 0
+        return self.First(self.segorder[NextPos])
+
+    def Prev(self, V):
+        SegId = self.seg[V]
+        i = self.idx[V]
+        if self.segrev[SegId]:
+            if i + 1 < len(self.segitems[SegId]):
+                return self.segitems[SegId][i+1]
+        elif i > 0:
+            return self.segitems[SegId][i-1]
+
+        return self.Last(self.segorder[self.segpos[SegId] - 1])
+
+    def Position(self, V):
+        # (segment rank, place within the segment in tour order), which orders the vertices along
+        # the tour starting from the first segment.
+        SegId = self.seg[V]
+        if self.segrev[SegId]:
+            return (self.segpos[SegId], len(self.segitems[SegId]) - 1 - self.idx[V])
+        return (self.segpos[SegId], self.idx[V])
+
+    def Between(self, A, B, C):
+        # Return True if B lies on the forward path from A to C (endpoints included).
+        PosA = self.Position(A)
+        PosB = self.Position(B)
+        PosC = self.Position(C)
+        if PosA <= PosC:
+            return PosA <= PosB and PosB <= PosC
+
+        return PosB >= PosA or PosB <= PosC
+
+    def SplitBefore(self, V):
+        # Split V's segment so that V is the first vertex of a segment, in tour order. The part from
+        # V onwards becomes a new segment straight after the old one.
+        SegId = self.seg[V]
+        Items = self.segitems[SegId]
+        i = self.idx[V]
+        if self.segrev[SegId]:
+            if i == len(Items) - 1:
+                return
+            # Read backwards, the vertices before V are Items[i+1:] and V onwards are Items[:i+1].
+            Keep = Items[i+1:]
+            Moved = Items[:i+1]
+        else:
+            if i == 0:
+                return
+            Keep = Items[:i]
+            Moved = Items[i:]
+
+        NewId = len(self.segitems)
+        self.segitems[SegId] = Keep
+        self.segitems.append(Moved)
+        self.segrev.append(self.segrev[SegId])
+        for j, W in enumerate(Keep):
+            self.idx[W] = j
+        for j, W in enumerate(Moved):
+            self.seg[W] = NewId
+            self.idx[W] = j
+
+        InsertPos = self.segpos[SegId] + 1
+        self.segorder.insert(InsertPos, NewId)
+        self.segpos.append(0)
+        for Pos in range(InsertPos, len(self.segorder)):
+            self.segpos[self.segorder[Pos]] = Pos
+
+    def ReverseSegments(self, FirstPos, Count):
+        # Reverse the order of Count consecutive segments starting at rank FirstPos (wrapping round)
+        # and flip the direction of each one.
+        NumSegs = len(self.segorder)
+        Ranks = [(FirstPos + k) % NumSegs for k in range(0, Count)]
+        Segs = [self.segorder[r] for r in Ranks]
+        Segs.reverse()
+        for r, SegId in zip(Ranks, Segs):
+            self.segorder[r] = SegId
+            self.segpos[SegId] = r
+            self.segrev[SegId] = not self.segrev[SegId]
+
+    def Reverse(self, A, B):
+        # Reverse the forward path from A to B, so that the tour ... P A ... B N ... becomes
+        # ... P B ... A N .... When that path covers more segments than the rest of the tour, the
+        # complementary path is reversed instead, which gives the same cycle for less work.
+        if A == B:
+            return
+
+        SegA = self.seg[A]
+        if SegA == self.seg[B]:
+            IdxA = self.idx[A]
+            IdxB = self.idx[B]
+            Forward = (IdxA < IdxB) != self.segrev[SegA]
+            if Forward == False:
+                # The path from A to B runs all the way round the tour, so reverse the complement,
+                # which lies inside this segment between B and A.
+                A, B = self.Next(B), self.Prev(A)
+                if A == B or self.Next(B) == A:
+                    return
+                IdxA = self.idx[A]
+                IdxB = self.idx[B]
+            if self.seg[A] == SegA and self.seg[B] == SegA:
+                Low = min(IdxA, IdxB)
+                High = max(IdxA, IdxB)
+                Items = self.segitems[SegA]
+                Items[Low:High+1] = Items[Low:High+1][::-1]
+                for j in range(Low, High+1):
+                    self.idx[Items[j]] = j
+                return
+
+        self.SplitBefore(A)
+        self.SplitBefore(self.Next(B))
+        FirstPos = self.segpos[self.seg[A]]
+        NumSegs = len(self.segorder)
+        Count = (self.segpos[self.seg[B]] - FirstPos) % NumSegs + 1
+        if 2*Count > NumSegs:
+            FirstPos = (self.segpos[self.seg[B]] + 1) % NumSegs
+            Count = NumSegs - Count
+        self.ReverseSegments(FirstPos, Count)
+
+        if len(self.segorder) > self.maxsegs:
+            self.Rebuild(self.Order(None))
+
+    def Order(self, StartVert):
+        # Return the tour as a list of vertex indices beginning at StartVert (or at the first
+        # segment if StartVert is None).
+        Order = []
+        for SegId in self.segorder:
+            Items = self.segitems[SegId]
+            Order.extend(Items[::-1] if self.segrev[SegId] else Items)
+        if StartVert != None:
+            StartPos = Order.index(StartVert)
+            Order = Order[StartPos:] + Order[:StartPos]
+
+        return Order
+
+#   #   #   #   #   #   #   #   #   #
+
+class IndexPath:
+    # Compact representation of a path or tour: an int32 array of the indices of its vertices in the
+    # parent graph. A tour closed into a cycle repeats its first index at the end, like the lists of
+    # names the algorithms return. Names are only needed at the edges of the program, so conversion
+    # happens in GetNames and TSPGraph.IndexPath.
+    def __init__(self, GraphObj, PathInds):
+        self.parentgraph = GraphObj
+        self.inds = np.asarray(PathInds, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.inds)
+
+    def GetGraph(self):
+        return self.parentgraph
+
+    def GetIndices(self):
+        return self.inds
+
+    def GetNames(self):
+        return self.parentgraph.PathNames(self.inds)
+
+    def IsCycle(self):
+        # Whether the path ends at the vertex it started from.
+        return len(self.inds) > 1 and self.inds[0] == self.inds[-1]
+
+    def Weight(self, RoundBool):
+        # Weight of the path exactly as listed (see TSPGraph.IndexPathWeight).
+        return self.parentgraph.IndexPathWeight(self.inds, RoundBool)
+
+    def CycleWeight(self, RoundBool):
+        # Weight of the path closed into a cycle.
+        return self.parentgraph.CycleWeight(self.inds, RoundBool)
+
+    def OpenPathWeight(self, RoundBool):
+        # Weight of the path without any closing edge.
+        return self.parentgraph.OpenPathWeight(self.inds, RoundBool)
+
 class TSPSubgraph(TSPGraph):
     def __init__(self, parentgraph, subname):
         super().__init__(parentgraph.GetBounds(), parentgraph.GetName())
@@ -395,43 +1491,195 @@ class MinSpanningTree(TSPGraph):
 
         return NamedEdgeDict
     
-    def GenerateMinTree(self):
+    def GenerateMinTree(self, Method=None):
+        # Method is "prim" for the O(n^2) dense Prim's algorithm, "euclidean" for the candidate-graph
+        # Euclidean tree (see EuclideanTree) or None to pick Prim's for graphs of up to
+        # DENSEMSTLIMIT vertices and the Euclidean tree above that.
         rootvert = self.GetRootVert()
         graph = self.parentgraph
 
-        def CheckVerts(parentgraphverts):
-            fullbool = True
-            for v in parentgraphverts:
-                if v not in self.vertices:
-                    fullbool = False
-                
-            return fullbool
-
-
         if graph != None and isinstance(graph, TSPGraph) == True:
             if rootvert != None and isinstance(rootvert, TSPVertex) == True:
                 # check to see if the inputs are valid
                 graphverts = graph.GetVertices()
-                self.vertices.append(rootvert)
+                self.IndexVertex(rootvert)
                 # add the root to the set of vertices of the tree
                 self.bounds = graph.GetBounds()
-                while CheckVerts(graphverts) == False:
-                    mindistedge = (None, None, 99999999)
-                    for u in self.vertices:
-
-                        for v in graphverts:
-                            if v not in self.vertices:
-                                Dist = u.GetDistance(v, False)
-                                CandEdge = (u, v, Dist)
-                                if Dist < mindistedge[2]:
-                                    mindistedge = CandEdge
-
-
-                    if mindistedge[1] not in self.vertices:
-                        self.edges.append(mindistedge)
-                        self.vertices.append(mindistedge[1])
+                rootind = graph.GetVertexIndex(rootvert.GetName())
+                if Method == None:
+                    # The Euclidean tree relies on the vertex positions, so other metrics use Prim's.
+                    Method = "prim"
+                    if len(graphverts) > DENSEMSTLIMIT and graph.IsPlanar() == True:
+                        Method = "euclidean"
+                if Method == "euclidean":
+                    Link, Key, Order = EuclideanTree(graph, rootind)
+                else:
+                    Link, Key, Order = PrimTree(len(graphverts), lambda u: graph.DistanceRow(u, False), rootind)
+                for v in Order[1:]:
+                    # Vertices join the tree in the order Prim's algorithm picked them.
+                    mindistedge = (graphverts[Link[v]], graphverts[v], float(Key[v]))
+                    self.edges.append(mindistedge)
+                    self.IndexVertex(mindistedge[1])
 
                 print("Generated minimum spanning tree.")
+def PrimTree(NumVerts, RowFunc, RootInd):
+    # Prim's algorithm with key arrays, as used by MinSpanningTree and the branch-and-bound solver.
+    # RowFunc(u) returns the costs from vertex u to every vertex as a NumPy array (np.inf for a
+    # missing edge). Key[v] is the cost of the cheapest edge found so far joining v to the tree
+    # and Link[v] is the tree vertex at its other end. Each step adds the non-tree vertex with the
+    # smallest key and updates the keys from its row, so the whole tree takes O(n^2) time and O(n)
+    # memory. Returns (Link, Key, Order) where Order lists the vertices in the order they were
+    # added. If the graph is disconnected, Order only covers the root's component.
+    Link = np.full(NumVerts, -1, dtype=np.int64)
+    Key = np.full(NumVerts, np.inf)
+    InTree = np.zeros(NumVerts, dtype=bool)
+    # Keys of tree vertices are masked with infinity so that argmin only sees non-tree vertices.
+    Masked = np.full(NumVerts, np.inf)
+    Masked[RootInd] = 0.0
+    Key[RootInd] = 0.0
+    Order = []
+
+    for Step in range(0, NumVerts):
+        u = int(np.argmin(Masked))
+        if InTree[u] == True or Masked[u] == np.inf and Step > 0:
+            break
+        InTree[u] = True
+        Order.append(u)
+        Masked[u] = np.inf
+
+        Row = RowFunc(u)
+        Better = (Row < Key) & ~InTree
+        Key[Better] = Row[Better]
+        Link[Better] = u
+        Masked[Better] = Row[Better]
+
+    return Link, Key, Order
+
+# Graphs with more vertices than this get the Euclidean tree from GenerateMinTree by default.
+DENSEMSTLIMIT = 5000
+
+# Number of nearest neighbours per vertex used as candidate edges when SciPy is not available.
+MSTNEIGHBORS = 10
+
+class DisjointSet:
+    # Union-find over the integers 0..N-1 with union by size and path halving.
+    def __init__(self, NumItems):
+        self.parent = list(range(NumItems))
+        self.size = [1]*NumItems
+        self.numsets = NumItems
+
+    def Find(self, Item):
+        parent = self.parent
+        while parent[Item] != Item:
+            parent[Item] = parent[parent[Item]]
+            Item = parent[Item]
+        return Item
+
+    def Union(self, A, B):
+        # Merge the sets holding A and B. Returns False if they were already the same set.
+        RootA = self.Find(A)
+        RootB = self.Find(B)
+        if RootA == RootB:
+            return False
+        if self.size[RootA] < self.size[RootB]:
+            RootA, RootB = RootB, RootA
+        self.parent[RootB] = RootA
+        self.size[RootA] += self.size[RootB]
+        self.numsets -= 1
+        return True
+
+    def NumSets(self):
+        return self.numsets
+
+def CandidateEdges(GraphObj):
+    # Return (U, V) arrays of candidate edges with U < V and no duplicates. The Euclidean minimum
+    # spanning tree is a subgraph of the Delaunay triangulation, so with SciPy the candidates are the
+    # triangulation's edges. Without it they are the edges to each vertex's MSTNEIGHBORS nearest
+    # neighbours, which contain almost every tree edge in practice.
+    Coords = GraphObj.Coordinates()
+    NumVerts = len(Coords)
+    U = np.zeros(0, dtype=np.int64)
+    V = np.zeros(0, dtype=np.int64)
+    if Delaunay != None and NumVerts >= 4:
+        try:
+            Simplices = Delaunay(Coords).simplices.astype(np.int64)
+            U = np.concatenate((Simplices[:, 0], Simplices[:, 1], Simplices[:, 2]))
+            V = np.concatenate((Simplices[:, 1], Simplices[:, 2], Simplices[:, 0]))
+        except Exception:
+            # Degenerate inputs such as collinear points cannot be triangulated.
+            U = np.zeros(0, dtype=np.int64)
+    if len(U) == 0 and NumVerts > 1:
+        Neighbors = GraphObj.NearestNeighbors(MSTNEIGHBORS).astype(np.int64)
+        U = np.repeat(np.arange(NumVerts, dtype=np.int64), Neighbors.shape[1])
+        V = Neighbors.ravel()
+
+    Low = np.minimum(U, V)
+    High = np.maximum(U, V)
+    Keys = np.unique(Low*NumVerts + High)
+    return Keys // NumVerts, Keys % NumVerts
+
+def EuclideanTree(GraphObj, RootInd):
+    # Euclidean minimum spanning tree in O(n log n) for large planar instances. Kruskal's algorithm
+    # runs over the candidate edges from CandidateEdges. If the candidates leave the graph in several
+    # pieces, the pieces are joined by their shortest connecting edges. Returns (Link, Key, Order)
+    # in the same form as PrimTree, with Order a breadth-first order from the root.
+    Coords = GraphObj.Coordinates()
+    NumVerts = len(Coords)
+    U, V = CandidateEdges(GraphObj)
+    Weights = GraphObj.PairDistances(U, V, False)
+    Sorted = np.argsort(Weights, kind="stable")
+
+    Sets = DisjointSet(NumVerts)
+    TreeEdges = []
+    for EdgeInd in Sorted.tolist():
+        A = int(U[EdgeInd])
+        B = int(V[EdgeInd])
+        if Sets.Union(A, B) == True:
+            TreeEdges.append((A, B))
+            if len(TreeEdges) == NumVerts - 1:
+                break
+
+    while Sets.NumSets() > 1:
+        # Join the smallest remaining piece to the rest of the graph by its shortest outgoing edge.
+        Labels = np.array([Sets.Find(i) for i in range(0, NumVerts)])
+        RootLabels, Counts = np.unique(Labels, return_counts=True)
+        Piece = np.flatnonzero(Labels == RootLabels[np.argmin(Counts)])
+        Others = np.flatnonzero(Labels != RootLabels[np.argmin(Counts)])
+        BestDist = np.inf
+        BestEdge = None
+        BlockSize = max(1, (8*1024*1024) // len(Others))
+        for Start in range(0, len(Piece), BlockSize):
+            Block = GraphObj.DistanceBlock(Piece[Start:Start+BlockSize], Others, False)
+            Flat = int(np.argmin(Block))
+            if Block.flat[Flat] < BestDist:
+                BestDist = Block.flat[Flat]
+                BestEdge = (int(Piece[Start + Flat // len(Others)]), int(Others[Flat % len(Others)]))
+        Sets.Union(BestEdge[0], BestEdge[1])
+        TreeEdges.append(BestEdge)
+
+    Adjacent = [[] for i in range(0, NumVerts)]
+    for A, B in TreeEdges:
+        Adjacent[A].append(B)
+        Adjacent[B].append(A)
+
+    Link = np.full(NumVerts, -1, dtype=np.int64)
+    Key = np.full(NumVerts, np.inf)
+    Key[RootInd] = 0.0
+    Order = [RootInd]
+    Seen = [False]*NumVerts
+    Seen[RootInd] = True
+    for u in Order:
+        for v in Adjacent[u]:
+            if Seen[v] == False:
+                Seen[v] = True
+                Link[v] = u
+                Order.append(v)
+    Children = np.array(Order[1:], dtype=np.int64)
+    if len(Children) > 0:
+        Key[Children] = GraphObj.PairDistances(Children, Link[Children], False)
+
+    return Link, Key, Order
+
 #   #   #   #   #   #   #   #   #   #
 
 def ConvertVertexPos(GraphObj):
@@ -7,13 +7,30 @@ import TSP
 import ParseTSP
 import itertools
 import time
+import collections
+import heapq
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
 
 smallgraphverts = ["α", "β", "γ", "δ", "ε", "ζ"]
 mediumgraphverts = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
 largegraphverts = ["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12", "13", "14", "15"]
 
-def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound):
+# Number of nearest neighbors each vertex considers as candidates in the local search heuristics.
+NEIGHBORLISTSIZE = 10
+
+# Tours with more vertices than this are stored as a TSP.TwoLevelTour rather than a TSP.ArrayTour.
+TWOLEVELLIMIT = 10000
+
+# Number of seconds singletest gives the time-limited solvers.
+LKTIMELIMIT = 10
+
+def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound, Optimum=None):
     # Method intended to test the accuracy/reliability of TSP algorithms and heuristics.
+    # For cycles, the tour length is compared with the optimal tour length: Optimum if it is given,
+    # or else the known optimum of the TSPLIB instance named like the graph (see ParseTSP.KnownOptimum).
     print("Running test. Please wait. \n")
     #BFP = BruteForce(GraphObj, StartVertName, CycleBool)
     #BFPCost  = GraphObj.PathWeight(BFP, False)
@@ -41,6 +58,121 @@ def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound):
         endtime = time.perf_counter()
         AlgoCost = GraphObj.PathWeight(AlgoP, False)
 
+    if str(algoname).lower() in ["dt", "double tree", "double-tree", "doubletree"]:
+        HeuristicUsed= "Double Tree"
+        starttime = time.perf_counter()
+        AlgoP = DoubleTree(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["chr", "christofides"]:
+        HeuristicUsed= "Christofides"
+        starttime = time.perf_counter()
+        AlgoP = Christofides(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["ci", "cheapest insertion", "cheapest insert"]:
+        HeuristicUsed= "Cheapest Insertion"
+        starttime = time.perf_counter()
+        AlgoP = CheapestInsert(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["fi", "farthest insertion", "farthest insert"]:
+        HeuristicUsed= "Farthest Insertion"
+        starttime = time.perf_counter()
+        AlgoP = FarthestInsert(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["ri", "random insertion", "random insert"]:
+        HeuristicUsed= "Random Insertion"
+        starttime = time.perf_counter()
+        AlgoP = RandomInsert(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["ge", "greedy", "greedy edge", "greedy-edge"]:
+        HeuristicUsed= "Greedy Edge"
+        starttime = time.perf_counter()
+        AlgoP = GreedyEdge(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["cw", "savings", "clarke-wright", "clarke wright"]:
+        HeuristicUsed= "Clarke-Wright Savings"
+        starttime = time.perf_counter()
+        AlgoP = Savings(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["sfc", "hilbert", "space-filling curve", "space filling curve"]:
+        HeuristicUsed= "Space-Filling Curve"
+        starttime = time.perf_counter()
+        AlgoP = SpaceFillingCurve(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["ga", "genetic", "genetic algorithm"]:
+        HeuristicUsed= "Genetic Algorithm"
+        starttime = time.perf_counter()
+        AlgoP = Genetic(GraphObj, StartVertName, CycleBool, GAGENERATIONS)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["iga", "island ga", "island genetic", "island model"]:
+        HeuristicUsed= "Genetic Algorithm (Island Model)"
+        starttime = time.perf_counter()
+        AlgoP = Genetic(GraphObj, StartVertName, CycleBool, GAGENERATIONS, GAPOPULATION, None, os.cpu_count() or 1)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    # Simulated annealing from a nearest neighbor or nearest insertion start, given LKTIMELIMIT seconds.
+    if str(algoname).lower() in ["sa", "annealing", "simulated annealing", "sann"]:
+        HeuristicUsed= "Simulated Annealing (Nearest Neighbor Start)"
+        starttime = time.perf_counter()
+        AlgoP = SimulatedAnnealing(GraphObj, StartVertName, CycleBool, 1, LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["sani", "sa ni", "simulated annealing ni"]:
+        HeuristicUsed= "Simulated Annealing (Nearest Insertion Start)"
+        starttime = time.perf_counter()
+        AlgoP = SimulatedAnnealing(GraphObj, StartVertName, CycleBool, 2, LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["aco", "mmas", "ant colony", "max-min ant system"]:
+        HeuristicUsed= "MAX-MIN Ant System"
+        starttime = time.perf_counter()
+        AlgoP = AntColony(GraphObj, StartVertName, CycleBool, ACOITERATIONS, LKTIMELIMIT, "mmas", True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["as", "ant system"]:
+        HeuristicUsed= "Ant System"
+        starttime = time.perf_counter()
+        AlgoP = AntColony(GraphObj, StartVertName, CycleBool, ACOITERATIONS, LKTIMELIMIT, "as", False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    # Multi-start runs try every vertex as the start (so StartVertName is not used), spread over every
+    # CPU, for at most LKTIMELIMIT seconds.
+    if str(algoname).lower() in ["msnn", "multi-start nn", "multistart nearest neighbor"]:
+        HeuristicUsed= "Multi-Start Nearest Neighbor"
+        starttime = time.perf_counter()
+        AlgoP = MultiStart(GraphObj, NearestNeighbor, CycleBool, (), None, LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["ms2opt", "multi-start 2opt", "multistart 2-opt"]:
+        HeuristicUsed= "Multi-Start 2-Opt (Nearest Neighbor Starts)"
+        starttime = time.perf_counter()
+        AlgoP = MultiStart(GraphObj, TwoOpt, CycleBool, (1, False), None, LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
     if str(algoname).lower() == "bf" or str(algoname).lower() == "brute-force":
         HeuristicUsed= "Brute Force"
         starttime = time.perf_counter()
@@ -48,6 +180,20 @@ def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound):
         endtime = time.perf_counter()
         AlgoCost = GraphObj.PathWeight(AlgoP, False)
 
+    if str(algoname).lower() in ["hk", "held-karp", "held karp", "heldkarp", "exact"]:
+        HeuristicUsed= "Held-Karp"
+        starttime = time.perf_counter()
+        AlgoP = HeldKarp(GraphObj, StartVertName, CycleBool)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["bb", "bnb", "branch and bound", "branch-and-bound"]:
+        HeuristicUsed= "Branch and Bound"
+        starttime = time.perf_counter()
+        AlgoP = BranchAndBound(GraphObj, StartVertName, CycleBool, None, LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
     if str(algoname).lower() == "2opt" or str(algoname).lower() == "twoopt" or str(algoname).lower() == "2-opt":
         HeuristicUsed= "2-Opt"
         starttime = time.perf_counter()
@@ -68,6 +214,107 @@ def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound):
         AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 2, False)
         endtime = time.perf_counter()
         AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["2optdt", "twooptdt", "2-optdt", "double tree 2opt", "double tree 2-opt"]:
+        HeuristicUsed= "2-Opt (Double Tree Start)"
+        starttime = time.perf_counter()
+        AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 3, False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["2optchr", "twooptchr", "2-optchr", "christofides 2opt", "christofides 2-opt"]:
+        HeuristicUsed= "2-Opt (Christofides Start)"
+        starttime = time.perf_counter()
+        AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 4, False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["2optge", "twooptge", "2-optge", "greedy 2opt", "greedy 2-opt"]:
+        HeuristicUsed= "2-Opt (Greedy Edge Start)"
+        starttime = time.perf_counter()
+        AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 5, False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["2optcw", "twooptcw", "2-optcw", "savings 2opt", "savings 2-opt"]:
+        HeuristicUsed= "2-Opt (Savings Start)"
+        starttime = time.perf_counter()
+        AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 6, False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["2optsfc", "twooptsfc", "2-optsfc", "hilbert 2opt", "hilbert 2-opt"]:
+        HeuristicUsed= "2-Opt (Space-Filling Curve Start)"
+        starttime = time.perf_counter()
+        AlgoP = TwoOpt(GraphObj, StartVertName, CycleBool, 7, False)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    # Or-opt and restricted 3-opt are run together with 2-opt. The suffix selects the starting path.
+    if str(algoname).lower() in ["oropt", "or-opt", "2optoropt", "2-opt or-opt"]:
+        HeuristicUsed= "2-Opt + Or-Opt"
+        starttime = time.perf_counter()
+        AlgoP = OrOpt(GraphObj, StartVertName, CycleBool, 0, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["oroptnn", "or-optnn", "nnoropt", "nnor-opt", "nearest neighbor oropt", "nearest neighbor or-opt"]:
+        HeuristicUsed= "2-Opt + Or-Opt (Nearest Neighbor Start)"
+        starttime = time.perf_counter()
+        AlgoP = OrOpt(GraphObj, StartVertName, CycleBool, 1, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["oroptni", "or-optni", "nioropt", "nior-opt", "nearest insertion oropt", "nearest insertion or-opt"]:
+        HeuristicUsed= "2-Opt + Or-Opt (Nearest Insertion Start)"
+        starttime = time.perf_counter()
+        AlgoP = OrOpt(GraphObj, StartVertName, CycleBool, 2, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["or3opt", "or-3opt", "3opt", "3-opt", "threeopt"]:
+        HeuristicUsed= "2-Opt + Or-3Opt"
+        starttime = time.perf_counter()
+        AlgoP = OrThreeOpt(GraphObj, StartVertName, CycleBool, 0, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["or3optnn", "or-3optnn", "3optnn", "nnor3opt", "nn3opt", "nearest neighbor 3opt", "nearest neighbor or-3opt"]:
+        HeuristicUsed= "2-Opt + Or-3Opt (Nearest Neighbor Start)"
+        starttime = time.perf_counter()
+        AlgoP = OrThreeOpt(GraphObj, StartVertName, CycleBool, 1, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["or3optni", "or-3optni", "3optni", "nior3opt", "ni3opt", "nearest insertion 3opt", "nearest insertion or-3opt"]:
+        HeuristicUsed= "2-Opt + Or-3Opt (Nearest Insertion Start)"
+        starttime = time.perf_counter()
+        AlgoP = OrThreeOpt(GraphObj, StartVertName, CycleBool, 2, True)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    # Lin-Kernighan runs to a local optimum from a nearest neighbor start. The "chained" variant
+    # keeps kicking and re-optimising the tour for LKTIMELIMIT seconds.
+    if str(algoname).lower() in ["lk", "lin-kernighan", "lin kernighan", "linkernighan"]:
+        HeuristicUsed= "Lin-Kernighan"
+        starttime = time.perf_counter()
+        AlgoP = LinKernighan(GraphObj, StartVertName, CycleBool, 1, "nn", None)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["lkmst", "lk mst", "lin-kernighan mst"]:
+        HeuristicUsed= "Lin-Kernighan (MST Candidates)"
+        starttime = time.perf_counter()
+        AlgoP = LinKernighan(GraphObj, StartVertName, CycleBool, 1, "mst", None)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
+
+    if str(algoname).lower() in ["clk", "chained lk", "chained lin-kernighan", "chainedlk"]:
+        HeuristicUsed= "Chained Lin-Kernighan"
+        starttime = time.perf_counter()
+        AlgoP = LinKernighan(GraphObj, StartVertName, CycleBool, 1, "nn", LKTIMELIMIT)
+        endtime = time.perf_counter()
+        AlgoCost = GraphObj.PathWeight(AlgoP, False)
     
     elapsedtime = endtime-starttime
 
@@ -80,7 +327,17 @@ def singletest(algoname, GraphObj, StartVertName, CycleBool, CompTimeRound):
     print("Heuristic answer computed in", elapsedtime, "seconds.")
     print("Length of heuristic-generated tour:", AlgoCost)
 
-    return (GraphObj.GetName(), elapsedtime, AlgoCost)
+    # A solver that returns no tour (e.g. Held-Karp on too large a graph) gets no gap.
+    Gap = None
+    if CycleBool == True and len(AlgoP) > 0:
+        if Optimum == None:
+            Optimum = ParseTSP.KnownOptimum(GraphObj.GetName(), GraphObj)
+        Gap = ParseTSP.OptimalityGap(AlgoCost, Optimum)
+        if Gap != None:
+            print("Known optimal tour length:", Optimum)
+            print("Gap to optimum:", str(round(Gap, 2)) + "%")
+
+    return (GraphObj.GetName(), elapsedtime, AlgoCost, Gap)
 
 def RandomGraph(NameSet):
     # Generate a random graph with vertex names from the set "NameSet".
@@ -96,144 +353,643 @@ def BruteForce(GraphObj, StartVertName, CycleBool):
     # compare them to find the shortest one. Guarenteed to find an exact answer,
     # but computationally inefficient (O(n!) time completixty). If CycleBool == True, 
     # include the edge that gets us back to our starting vertex.
+    # The permutations are streamed and only the best one is kept, so memory use stays O(n).
+    # HeldKarp gives the same answer in O(n^2 2^n) time and is the one to use past ~10 vertices.
     finalpath = None
-    pathdict = {}
-    pathlist =[]
+    finalcost = None
     GraphVertexNames = GraphObj.GetVertexNames()
     GraphVertexNames.remove(StartVertName)
 
-    for p in itertools.permutations(GraphVertexNames):
-        # Get every unique path in the graph starting at the specified vertex.
-        # Add the starting vertex to the end of the path if neccessary to make it a cycle.
-        patharray = [StartVertName]
+    # The cost matrix is computed once, so every path length is a sum of lookups rather than of fresh
+    # distance computations. It is built in float64 from DistanceBlock, as in HeldKarp, so that near
+    # ties between paths are resolved exactly and both exact solvers agree.
+    CostMat = GraphObj.DistanceBlock(None, None, False).tolist()
+    StartInd = GraphObj.GetVertexIndex(StartVertName)
+    OtherInds = GraphObj.PathIndices(GraphVertexNames).tolist()
+
+    for p in itertools.permutations(range(0, len(OtherInds))):
+        # Get every unique path in the graph starting at the specified vertex, and its length.
+        # Add the edge back to the starting vertex if neccessary to make it a cycle.
+        pathlength = 0.0
+        previous = StartInd
         for t in p:
-            patharray.append(t)
+            pathlength += CostMat[previous][OtherInds[t]]
+            previous = OtherInds[t]
+
+        if CycleBool == True:
+            pathlength += CostMat[previous][StartInd]
+
+        if finalcost == None or pathlength < finalcost:
+            finalcost = pathlength
+            finalpath = [StartVertName] + [GraphVertexNames[t] for t in p]
+
+    if CycleBool == True:
+        finalpath.append(StartVertName)
+
+    return finalpath
+
+# Largest number of vertices HeldKarp will attempt. At 25 vertices it needs roughly 1 GB.
+MAXHELDKARP = 25
+# Number of subsets HeldKarp processes at once within a layer.
+HELDKARPCHUNK = 1 << 16
+
+def SubsetMembers(Masks, NumSet):
+    # For an array of bitmasks which all have NumSet bits set, return a (len, NumSet) uint8 array
+    # whose rows list the positions of the set bits in increasing order.
+    Members = np.empty((len(Masks), NumSet), dtype=np.uint8)
+    Remaining = Masks.copy()
+    for p in range(0, NumSet):
+        # Masks & -Masks isolates the lowest set bit, whose position is its base 2 logarithm.
+        Lowest = Remaining & -Remaining
+        Members[:, p] = np.log2(Lowest).astype(np.uint8)
+        Remaining ^= Lowest
+
+    return Members
+
+def HeldKarp(GraphObj, StartVertName, CycleBool):
+    # Exact solver using the Held-Karp dynamic program over subsets.
+    # Cost[S][j] is the length of the shortest path which starts at the start vertex, visits every
+    # vertex of the set S and ends at j (a member of S). It satisfies
+    #     Cost[S][j] = min over i in S - {j} of Cost[S - {j}][i] + d(i, j)
+    # so the table can be filled a layer (a subset size) at a time, in O(n^2 2^n) time.
+    # Each layer is computed with NumPy, one end vertex j at a time over every subset at once.
+    # To keep memory down only the costs of the previous layer are kept, stored compactly with one
+    # column per member of the subset; for every layer a uint8 table records the best predecessor,
+    # which is all that is needed to rebuild the optimal tour. If CycleBool == True the edge back
+    # to the start vertex is included. Returns an empty list if the graph has more than
+    # MAXHELDKARP vertices.
+    finalpath = []
+    if GraphObj.NameInGraph(StartVertName) == False:
+        return finalpath
+
+    GraphVertexNames = GraphObj.GetVertexNames()
+    StartInd = GraphObj.GetVertexIndex(StartVertName)
+    OtherInds = [v for v in range(0, len(GraphVertexNames)) if v != StartInd]
+    NumOther = len(OtherInds)
+    if NumOther + 1 > MAXHELDKARP:
+        print("Held-Karp is limited to", MAXHELDKARP, "vertices; graph", GraphObj.GetName(), "has", NumOther + 1)
+        return finalpath
+
+    finalpath = [StartVertName]
+    if NumOther > 0:
+        CostMat = GraphObj.DistanceBlock(None, None, False)
+        # Distances between the non-start vertices, and from the start vertex to each of them.
+        OtherDist = CostMat[np.ix_(OtherInds, OtherInds)]
+        StartDist = CostMat[StartInd, OtherInds]
+
+        # Rank[S] is the row of subset S within its layer, layers being ordered by increasing mask.
+        AllMasks = np.arange(1 << NumOther, dtype=np.int32)
+        Sizes = np.zeros(1 << NumOther, dtype=np.int8)
+        for b in range(0, NumOther):
+            Sizes += ((AllMasks >> b) & 1).astype(np.int8)
+        LayerOrder = np.argsort(Sizes, kind="stable").astype(np.int32)
+        LayerStarts = np.searchsorted(Sizes[LayerOrder], np.arange(NumOther + 2))
+        Rank = np.empty(1 << NumOther, dtype=np.int32)
+        for k in range(0, NumOther + 1):
+            Layer = LayerOrder[LayerStarts[k]:LayerStarts[k+1]]
+            Rank[Layer] = np.arange(len(Layer), dtype=np.int32)
+        del Sizes, AllMasks
+
+        # Layer 1: paths from the start vertex straight to j.
+        PrevMasks = LayerOrder[LayerStarts[1]:LayerStarts[2]]
+        PrevMembers = SubsetMembers(PrevMasks, 1)
+        PrevCost = StartDist[PrevMembers]
+        Parents = [np.full(PrevMembers.shape, 255, dtype=np.uint8)]
 
+        for k in range(2, NumOther + 1):
+            Masks = LayerOrder[LayerStarts[k]:LayerStarts[k+1]]
+            Members = SubsetMembers(Masks, k)
+            Cost = np.empty(Members.shape, dtype=np.float64)
+            Parent = np.empty(Members.shape, dtype=np.uint8)
+            # Work in chunks of subsets so that the temporary candidate arrays stay small.
+            for Chunk in range(0, len(Masks), HELDKARPCHUNK):
+                Rows = slice(Chunk, Chunk + HELDKARPCHUNK)
+                for Pos in range(0, k):
+                    # Every subset of the chunk, with its Pos-th member as the end vertex j.
+                    Ends = Members[Rows, Pos].astype(np.int32)
+                    PrevRows = Rank[Masks[Rows] ^ (np.int32(1) << Ends)]
+                    Candidates = PrevCost[PrevRows] + OtherDist[PrevMembers[PrevRows], Ends[:, None]]
+                    Best = np.argmin(Candidates, axis=1)
+                    Cost[Rows, Pos] = np.take_along_axis(Candidates, Best[:, None], axis=1)[:, 0]
+                    Parent[Rows, Pos] = np.take_along_axis(PrevMembers[PrevRows], Best[:, None], axis=1)[:, 0]
+            Parents.append(Parent)
+            PrevMembers = Members
+            PrevCost = Cost
+
+        # The last layer holds the single set of every non-start vertex.
+        FinalCost = PrevCost[0].copy()
         if CycleBool == True:
-            patharray.append(StartVertName)
+            FinalCost += StartDist[PrevMembers[0]]
+        End = int(PrevMembers[0][np.argmin(FinalCost)])
 
-        if patharray not in pathlist:
-            pathlist.append(patharray)
-            
+        # Walk the predecessor tables back from the last layer to rebuild the path.
+        Mask = (1 << NumOther) - 1
+        Reversed = []
+        for k in range(NumOther, 0, -1):
+            Reversed.append(End)
+            Pos = bin(Mask & ((1 << End) - 1)).count("1")
+            Previous = int(Parents[k-1][Rank[Mask], Pos])
+            Mask ^= 1 << End
+            End = Previous
 
-    for i in range(0, len(pathlist)):
-        # Get the length (total weight) of every path in pathlist
-        currentpath = pathlist[i]
-        pathlength = GraphObj.PathWeight(currentpath, False)
-        pathdict[i] = pathlength
+        finalpath += [GraphVertexNames[OtherInds[v]] for v in reversed(Reversed)]
 
-    # Return the path with the shortest length as our finalpath
-    finalpath = pathlist[min(pathdict, key=pathdict.get)]
+    if CycleBool == True:
+        finalpath.append(StartVertName)
 
     return finalpath
 
-def Genetic(GraphObj, StartVertName, CycleBool, MaxCycle):
-    # Implementation of a basic genetic algorithm for solving TSP
-    # Generates an initial "chromosome" which is just the list of the graph's vertices
-    # For each iteration in MaxCycle, generate mutations using Mutate(), evaluate
-    # each mutation's fitness using FitEval(), and select the most fit mutations via
-    # the Select() function. 
-
-    def Mutate(pathlist, mutnum):
-        # For each P in pathlist we generate M = mutnum mutations, so a total
-        # of PxM mutations will be generated
-
-        outputlist = []
-        for p in pathlist:
-            # We mutate a path by swapping the position of two random vertices in the path.
-            # For example, if we have a path {a, b, c, d, e} and mutnum = 2, we will get 2 paths 
-            # which are mutations of the original: maybe {a, b, d, c, e} and {a, b, c, e, d}
-            plen = len(p)
-            mutset = []
-            for i in range(0, mutnum):
-                
-                mutpath = p
-                SwapIndA = None
-                SwapIndB = None
-                
-                while SwapIndA == SwapIndB:
-                    SwapIndA = random.randint(0, plen-1)
-                    SwapIndB = random.randint(0, plen-1)
-
-                SwapElementA = mutpath[SwapIndA]
-                SwapElementB = mutpath[SwapIndB]
-                mutpath[SwapIndA] = SwapElementB
-                mutpath[SwapIndB] = SwapElementA
-                SwapIndA = None
-                SwapIndB = None
-                print(mutpath)
+# Settings for BranchAndBound: subgradient iterations spent on the root's Held-Karp bound and on
+# each child's bound (children start from their parent's multipliers, so need fewer).
+BBROOTITERATIONS = 300
+BBNODEITERATIONS = 40
 
-        
-        return outputlist
-    
-    def FitEval(path):
-        # Evaluate the total weight for the given path. Then, return a double consisting of
-        # the path itself and the path weight. For the sake of keeping things simple, our
-        # only measure of fit will be the path weight.
+def OneTreeBound(CostMat, Special, Pi, Included, Excluded, UpperBound, Iterations):
+    # Held-Karp lower bound on a tour, from minimum 1-trees improved by subgradient optimisation.
+    # A 1-tree is a spanning tree on every vertex but Special (built with TSP.PrimTree) plus the two
+    # cheapest edges at Special. Every tour is a 1-tree, so the cheapest 1-tree bounds the tour
+    # length from below. Adding a penalty Pi[v] to every edge at v changes every tour's length by
+    # 2*sum(Pi) but not the 1-trees', so each step raises Pi at vertices of degree above 2 and
+    # lowers it at leaves, pushing the 1-tree towards a tour. Included edges are forced into the
+    # 1-tree and Excluded edges are left out. Returns (Bound, Pi, Edges, Degrees) for the best
+    # iteration, where Edges lists the 1-tree edges; Bound is np.inf if no 1-tree exists.
+    NumVerts = len(CostMat)
+    Pi = Pi.copy()
+    Best = (-np.inf, Pi.copy(), [], None)
+    Lambda = 2.0
+    SinceImproved = 0
 
-        outputdoub = (path, GraphObj.PathWeight(path, False))
+    for Iteration in range(0, Iterations):
+        Weights = CostMat + Pi[:, None] + Pi[None, :]
+        Weights[Excluded] = np.inf
+        # Forced edges get a cost of minus infinity, so Prim takes them before anything else.
+        TreeWeights = np.where(Included, -np.inf, Weights)
+        TreeWeights[:, Special] = np.inf
 
-        return outputdoub
-    
-    def Select(doublist, selnum):
-        # sort each of the doubles based on path weight in ascended order, then select the paths
-        # from index 0 to index N = selum - 1. That way, we select the N "best" paths to proceed with.
-        selected = []
+        Root = 1 if Special == 0 else 0
+        Link, Key, Order = TSP.PrimTree(NumVerts, lambda u: TreeWeights[u], Root)
+        SpecialRow = TreeWeights[Special].copy()
+        SpecialRow[Special] = np.inf
+        Cheapest = np.argsort(SpecialRow, kind="stable")[:2]
+        if len(Order) < NumVerts - 1 or SpecialRow[Cheapest[1]] == np.inf:
+            # The constraints leave no 1-tree at all, whatever the multipliers.
+            return (np.inf, Pi, [], None)
+
+        Edges = [(int(Link[v]), v) for v in Order[1:]] + [(Special, int(Cheapest[0])), (Special, int(Cheapest[1]))]
+        Heads = np.array([E[0] for E in Edges])
+        Tails = np.array([E[1] for E in Edges])
+        Bound = float(Weights[Heads, Tails].sum() - 2.0*Pi.sum())
+        Degrees = np.bincount(np.concatenate((Heads, Tails)), minlength=NumVerts)
+
+        if Bound > Best[0]:
+            Best = (Bound, Pi.copy(), Edges, Degrees)
+            SinceImproved = 0
+        else:
+            SinceImproved += 1
+            if SinceImproved >= 5:
+                Lambda *= 0.5
+                SinceImproved = 0
+
+        Subgradient = Degrees - 2
+        Norm = float((Subgradient*Subgradient).sum())
+        if Norm == 0 or Bound >= UpperBound:
+            # The 1-tree is a tour (so the bound is exact) or the node can already be pruned.
+            break
+        Target = UpperBound if UpperBound < np.inf else 1.05*abs(Bound) + 1.0
+        Pi += Lambda*(Target - Bound)/Norm*Subgradient
+
+    return Best
 
-        return selected
+def PropagateBranch(Included, Excluded):
+    # Tighten the edge constraints of a branch-and-bound node in place. A vertex with two included
+    # edges can take no more, so its other edges are excluded; an included path may not be closed
+    # early into a subtour. Returns False if the constraints cannot be met by any tour.
+    NumVerts = len(Included)
+    Changed = True
+    while Changed == True:
+        Changed = False
+        IncDegree = Included.sum(axis=1)
+        if np.any(IncDegree > 2) or np.any((~Excluded).sum(axis=1) < 2):
+            return False
+        for v in np.nonzero(IncDegree == 2)[0]:
+            Free = ~Included[v] & ~Excluded[v]
+            if np.any(Free):
+                Excluded[v, Free] = True
+                Excluded[Free, v] = True
+                Changed = True
 
-    Gen = 0
-    GenOptimality = 0 
-    numverts = GraphObj.NumVertices()
-    print(numverts)
-    starterpath = []
+        # Follow each path of included edges from an end vertex and forbid the edge joining its ends.
+        Seen = np.zeros(NumVerts, dtype=bool)
+        for v in np.nonzero(IncDegree == 1)[0]:
+            if Seen[v] == True:
+                continue
+            Previous = -1
+            Current = int(v)
+            Length = 0
+            while True:
+                Seen[Current] = True
+                Following = [int(w) for w in np.nonzero(Included[Current])[0] if w != Previous]
+                if len(Following) == 0:
+                    break
+                Previous, Current = Current, Following[0]
+                Length += 1
+            Seen[Current] = True
+            if Length >= 2 and Length < NumVerts - 1 and Excluded[v, Current] == False:
+                Excluded[v, Current] = True
+                Excluded[Current, v] = True
+                Changed = True
+
+        # Any vertex of included degree 2 not reached from a path end lies on an included cycle.
+        if np.any((IncDegree == 2) & ~Seen) and Included.sum() < 2*NumVerts:
+            return False
+
+    return True
+
+def BranchAndBoundSearch(GraphObj, StartVertName, CycleBool, NodeLimit, TimeLimit):
+    # Best-first branch and bound for an exact tour, bounded with Held-Karp 1-trees (OneTreeBound).
+    # The incumbent is seeded with a 2-opt tour from a nearest neighbor start. Open nodes are kept
+    # in a heap ordered by lower bound. Each node branches on an edge at the vertex of highest
+    # degree in its 1-tree: one child excludes the edge and the other forces it in. The search
+    # stops when the heap runs out (the incumbent is optimal), or after NodeLimit nodes or TimeLimit
+    # seconds (either may be None). For a path (CycleBool False), a dummy vertex at no distance from
+    # every vertex is joined to the start vertex by a forced edge.
+    # Returns (finalpath, TourCost, LowerBound, NodesExplored).
+    finalpath = []
+    if GraphObj.NameInGraph(StartVertName) == False:
+        return (finalpath, None, None, 0)
+
+    Deadline = None
+    if TimeLimit != None:
+        Deadline = time.perf_counter() + TimeLimit
+
+    GraphVertexNames = GraphObj.GetVertexNames()
+    StartInd = GraphObj.GetVertexIndex(StartVertName)
+    NumVerts = len(GraphVertexNames)
+    CostMat = GraphObj.DistanceBlock(None, None, False)
+    if CycleBool == False:
+        CostMat = np.pad(CostMat, ((0, 1), (0, 1)))
+        NumVerts += 1
+    Excluded = np.eye(NumVerts, dtype=bool)
+    Included = np.zeros((NumVerts, NumVerts), dtype=bool)
+    if CycleBool == False:
+        Included[StartInd, NumVerts-1] = True
+        Included[NumVerts-1, StartInd] = True
+    # With integer edge weights, a node can be pruned once its bound is within 1 of the incumbent.
+    Slack = 1.0 - 1e-6 if np.all(CostMat == np.round(CostMat)) else 1e-9*max(1.0, float(CostMat.max()))
+
+    def TourWeight(Tour):
+        # Price a closed tour against the cost matrix. The 1-tree bound of a tour carries the
+        # float noise of its penalties, so only this is used as the incumbent cost.
+        return float(CostMat[Tour, np.roll(Tour, -1)].sum())
+
+    # Seed the incumbent with a 2-opt tour.
+    SeedPath = GraphObj.PathIndices(TwoOpt(GraphObj, StartVertName, CycleBool, 1, False)).tolist()
+    if CycleBool == True:
+        SeedPath.pop()
+    else:
+        SeedPath.append(NumVerts-1)
+    BestTour = SeedPath
+    BestCost = TourWeight(SeedPath)
+
+    def TourFromEdges(Edges):
+        # Order the vertices of a 1-tree in which every vertex has degree 2.
+        Adjacent = [[] for v in range(0, NumVerts)]
+        for A, B in Edges:
+            Adjacent[A].append(B)
+            Adjacent[B].append(A)
+        Order = [StartInd]
+        Previous = -1
+        while len(Order) < NumVerts:
+            Following = Adjacent[Order[-1]][0] if Adjacent[Order[-1]][0] != Previous else Adjacent[Order[-1]][1]
+            Previous = Order[-1]
+            Order.append(Following)
+        return Order
+
+    Nodes = 0
+    Counter = 0
+    Heap = []
+    LowerBound = np.inf
+    if NumVerts <= 3 or PropagateBranch(Included, Excluded) == False:
+        LowerBound = BestCost
+    else:
+        Bound, Pi, Edges, Degrees = OneTreeBound(CostMat, StartInd, np.zeros(NumVerts), Included, Excluded, BestCost, BBROOTITERATIONS)
+        if Degrees is not None and np.all(Degrees == 2) and Bound < BestCost:
+            Tour = TourFromEdges(Edges)
+            if TourWeight(Tour) < BestCost:
+                BestTour, BestCost = Tour, TourWeight(Tour)
+        elif Bound < BestCost - Slack:
+            heapq.heappush(Heap, (Bound, Counter, Included, Excluded, Pi, Edges, Degrees))
+        LowerBound = min(Bound, BestCost)
+
+    while len(Heap) > 0:
+        if (NodeLimit != None and Nodes >= NodeLimit) or DeadlinePassed(Deadline):
+            break
+        Bound, Ignored, Included, Excluded, Pi, Edges, Degrees = heapq.heappop(Heap)
+        if Bound >= BestCost - Slack:
+            # Best-first order: every remaining node is at least as bad, so the incumbent is optimal.
+            Heap = []
+            break
+        Nodes += 1
+
+        # Branch on the costliest free 1-tree edge at the vertex of highest degree.
+        Vertex = int(np.argmax(Degrees))
+        Free = [E for E in Edges if Vertex in E and Included[E[0], E[1]] == False]
+        A, B = max(Free, key=lambda E: CostMat[E[0], E[1]])
+        for ForceIn in (False, True):
+            ChildInc = Included.copy()
+            ChildExc = Excluded.copy()
+            if ForceIn == True:
+                ChildInc[A, B] = ChildInc[B, A] = True
+            else:
+                ChildExc[A, B] = ChildExc[B, A] = True
+            if PropagateBranch(ChildInc, ChildExc) == False:
+                continue
+
+            ChildBound, ChildPi, ChildEdges, ChildDegrees = OneTreeBound(CostMat, StartInd, Pi, ChildInc, ChildExc, BestCost, BBNODEITERATIONS)
+            if ChildBound >= BestCost - Slack:
+                continue
+            if np.all(ChildDegrees == 2):
+                # The child's 1-tree is itself a tour and may beat the incumbent.
+                Tour = TourFromEdges(ChildEdges)
+                if TourWeight(Tour) < BestCost:
+                    BestTour, BestCost = Tour, TourWeight(Tour)
+                continue
+            Counter += 1
+            heapq.heappush(Heap, (ChildBound, Counter, ChildInc, ChildExc, ChildPi, ChildEdges, ChildDegrees))
+
+    # The best bound still open (if any) bounds the optimum from below.
+    LowerBound = BestCost
+    if len(Heap) > 0:
+        LowerBound = min(BestCost, min(Node[0] for Node in Heap))
+
+    # Rotate the tour to the start vertex and convert it to names.
+    StartPos = BestTour.index(StartInd)
+    BestTour = BestTour[StartPos:] + BestTour[:StartPos]
+    if CycleBool == True:
+        finalpath = [GraphVertexNames[v] for v in BestTour] + [StartVertName]
+    else:
+        if BestTour[1] == NumVerts-1:
+            BestTour = [BestTour[0]] + BestTour[:0:-1]
+        finalpath = [GraphVertexNames[v] for v in BestTour if v != NumVerts-1]
+
+    return (finalpath, BestCost, LowerBound, Nodes)
+
+def BranchAndBound(GraphObj, StartVertName, CycleBool, NodeLimit, TimeLimit):
+    # Exact solver for mid-sized graphs (roughly 30 to 80 vertices) where HeldKarp runs out of
+    # memory. See BranchAndBoundSearch. Prints whether the tour is certified optimal or, if a
+    # limit was reached first, the remaining gap to the lower bound. Returns a list of vertex names.
+    finalpath, TourCost, LowerBound, Nodes = BranchAndBoundSearch(GraphObj, StartVertName, CycleBool, NodeLimit, TimeLimit)
+    if TourCost != None:
+        if LowerBound >= TourCost - 1e-9*max(1.0, TourCost):
+            print("Branch and bound: tour of length", TourCost, "is optimal (", Nodes, "nodes explored).")
+        else:
+            Gap = 100.0*(TourCost - LowerBound)/TourCost
+            print("Branch and bound: tour of length", TourCost, "is within", round(Gap, 3), "% of optimal (", Nodes, "nodes explored).")
+
+    return finalpath
+
+# Settings for the genetic algorithm: the population size, the number of generations singletest runs,
+# the number of contestants in each selection tournament, the number of best tours copied unchanged
+# into the next generation and the chances of each child being mutated by a swap and by an inversion.
+GAPOPULATION = 100
+GAGENERATIONS = 500
+GATOURNAMENT = 3
+GAELITE = 2
+GASWAPRATE = 0.1
+GAINVERTRATE = 0.3
+
+def PopulationCosts(CostMat, StartInd, CycleBool, Population):
+    # Evaluate a whole population at once. Each row of Population lists the vertices visited after the
+    # fixed start vertex, so the cost of row r is the path StartInd, Population[r, 0], ... (closed back
+    # to StartInd if CycleBool == True), read from the cost matrix in one fancy-indexing pass.
+    Costs = CostMat[StartInd, Population[:, 0]].astype(np.float64)
+    Costs += CostMat[Population[:, :-1], Population[:, 1:]].sum(axis=1)
+    if CycleBool == True:
+        Costs += CostMat[Population[:, -1], StartInd]
+
+    return Costs
+
+def OrderCrossover(ParentA, ParentB, Rng):
+    # Order crossover (OX): the child takes a random slice of ParentA in place and fills the remaining
+    # positions, starting after the slice, with the other vertices in the order they appear in ParentB.
+    Length = len(ParentA)
+    Cut = np.sort(Rng.choice(Length + 1, 2, replace=False))
+    Child = np.empty_like(ParentA)
+    Child[Cut[0]:Cut[1]] = ParentA[Cut[0]:Cut[1]]
+    InSlice = np.zeros(int(ParentA.max()) + 1, dtype=bool)
+    InSlice[ParentA[Cut[0]:Cut[1]]] = True
+    Rotated = np.roll(ParentB, -int(Cut[1]))
+    Child[(Cut[1] + np.arange(Length - (Cut[1] - Cut[0]))) % Length] = Rotated[~InSlice[Rotated]]
+
+    return Child
+
+def Mutate(Child, Rng):
+    # Swap mutation exchanges two random vertices. Inversion mutation reverses a random stretch of the
+    # path, which is a random 2-opt move. Each is applied with its own probability, in place.
+    Length = len(Child)
+    if Length < 2:
+        return Child
+    if Rng.random() < GASWAPRATE:
+        A, B = Rng.choice(Length, 2, replace=False)
+        Child[A], Child[B] = Child[B], Child[A]
+    if Rng.random() < GAINVERTRATE:
+        A, B = np.sort(Rng.choice(Length + 1, 2, replace=False))
+        Child[A:B] = Child[A:B][::-1]
+
+    return Child
+
+def EvolvePopulation(CostMat, StartInd, CycleBool, Population, Generations, Rng):
+    # Run the genetic algorithm on Population for the given number of generations and return the final
+    # population, sorted from best to worst. Every generation keeps the GAELITE best tours unchanged and
+    # breeds the rest from parents chosen by tournament selection.
+    Costs = PopulationCosts(CostMat, StartInd, CycleBool, Population)
+    PopSize = len(Population)
+    Elite = min(GAELITE, PopSize)
+
+    for Gen in range(0, Generations):
+        Ranked = np.argsort(Costs, kind="stable")
+        NewPopulation = np.empty_like(Population)
+        NewPopulation[:Elite] = Population[Ranked[:Elite]]
+
+        # Tournament selection: each parent is the best of GATOURNAMENT random members.
+        Contestants = Rng.integers(0, PopSize, size=(PopSize - Elite, 2, GATOURNAMENT))
+        Winners = np.take_along_axis(Contestants, np.argmin(Costs[Contestants], axis=2)[:, :, None], axis=2)[:, :, 0]
+        for ChildInd in range(Elite, PopSize):
+            ParentA, ParentB = Winners[ChildInd - Elite]
+            Child = OrderCrossover(Population[ParentA], Population[ParentB], Rng)
+            NewPopulation[ChildInd] = Mutate(Child, Rng)
+
+        Population = NewPopulation
+        Costs = PopulationCosts(CostMat, StartInd, CycleBool, Population)
+
+    Ranked = np.argsort(Costs, kind="stable")
+    return Population[Ranked]
+
+def InitialPopulation(GraphObj, StartVertName, PopSize, Rng):
+    # Random paths from the start vertex, plus one nearest neighbor path so the search does not have
+    # to start from scratch. Rows hold the vertex indices visited after the start vertex.
+    NumVerts = GraphObj.NumVertices()
+    StartInd = GraphObj.GetVertexIndex(StartVertName)
+    Others = np.array([v for v in range(0, NumVerts) if v != StartInd], dtype=np.int64)
+    Population = np.array([Rng.permutation(Others) for i in range(0, PopSize)])
+    Population[0] = GraphObj.PathIndices(NearestNeighbor(GraphObj, StartVertName, False)[1:])
+
+    return Population
+
+# Settings for the island model: the number of generations between migrations, the number of
+# best tours each island sends to the next one and the most bytes the shared cost matrix may use.
+GAMIGRATIONINTERVAL = 50
+GAMIGRANTS = 2
+GASHAREDBUDGET = TSP.DEFAULTCACHEBUDGET
+
+# Per-process state of an island worker, set up once by IslandWorkerInit.
+IslandState = {}
+
+def SharedCostMatrix(GraphObj):
+    # Create a shared memory block holding the graph's float32 cost matrix. It is filled a block of
+    # rows at a time, so apart from the shared matrix itself only one row block is ever allocated.
+    # Returns the SharedMemory object, which the caller must close and unlink.
+    NumVerts = GraphObj.NumVertices()
+    Block = shared_memory.SharedMemory(create=True, size=max(1, NumVerts*NumVerts*4))
+    CostMat = np.ndarray((NumVerts, NumVerts), dtype=np.float32, buffer=Block.buf)
+    RowsPerBlock = max(1, (8*1024*1024) // max(1, NumVerts))
+    for Start in range(0, NumVerts, RowsPerBlock):
+        RowInds = np.arange(Start, min(NumVerts, Start+RowsPerBlock))
+        CostMat[RowInds] = GraphObj.DistanceBlock(RowInds, None, False)
+    del CostMat
+
+    return Block
+
+def IslandWorkerInit(ShmName, NumVerts, StartInd, CycleBool):
+    # Runs once in each worker process. The cost matrix is used straight from the shared memory block,
+    # so all the workers share one copy of it. The block stays open for the life of the worker.
+    Block = shared_memory.SharedMemory(name=ShmName)
+    IslandState["block"] = Block
+    IslandState["costs"] = np.ndarray((NumVerts, NumVerts), dtype=np.float32, buffer=Block.buf)
+    IslandState["start"] = StartInd
+    IslandState["cycle"] = CycleBool
+
+def IslandEpoch(Task):
+    # Evolve one island's population for a number of generations in a worker process.
+    Population, Generations, Seed = Task
+    return EvolvePopulation(IslandState["costs"], IslandState["start"], IslandState["cycle"],
+                            Population, Generations, np.random.default_rng(Seed))
+
+def IslandGenetic(GraphObj, StartVertName, CycleBool, MaxCycle, PopSize, NumIslands, Seed):
+    # Island model genetic algorithm. NumIslands populations of PopSize tours each evolve side by side
+    # in a multiprocessing pool. Every GAMIGRATIONINTERVAL generations, each island's GAMIGRANTS best
+    # tours replace the worst tours of the next island round a ring. The cost matrix is built once in
+    # a shared memory block (see SharedCostMatrix), so the graph is never pickled for the workers and
+    # they do not each build their own matrix. Graphs whose float32 matrix would not fit within
+    # GASHAREDBUDGET bytes are rejected, and an empty list is returned.
+    finalpath = []
+    Names = GraphObj.GetVertexNames()
+    if len(Names)*len(Names)*4 > GASHAREDBUDGET:
+        print("A shared cost matrix for", len(Names), "vertices does not fit in the island budget of", GASHAREDBUDGET, "bytes.")
+        return finalpath
+
+    StartInd = GraphObj.GetVertexIndex(StartVertName)
+    Rng = np.random.default_rng(Seed)
+    Islands = [InitialPopulation(GraphObj, StartVertName, PopSize, Rng) for i in range(0, NumIslands)]
+    Migrants = min(GAMIGRANTS, PopSize - 1)
+
+    Block = SharedCostMatrix(GraphObj)
+    try:
+        NumWorkers = min(NumIslands, os.cpu_count() or 1)
+        with multiprocessing.Pool(NumWorkers, initializer=IslandWorkerInit,
+                                  initargs=(Block.name, len(Names), StartInd, CycleBool)) as Pool:
+            Gen = 0
+            while Gen < MaxCycle:
+                Generations = min(GAMIGRATIONINTERVAL, MaxCycle - Gen)
+                Tasks = [(Islands[i], Generations, int(Rng.integers(1 << 62))) for i in range(0, NumIslands)]
+                Islands = Pool.map(IslandEpoch, Tasks)
+                Gen += Generations
+
+                # Populations come back sorted from best to worst.
+                if Migrants > 0 and NumIslands > 1 and Gen < MaxCycle:
+                    Outgoing = [Pop[:Migrants].copy() for Pop in Islands]
+                    for i in range(0, NumIslands):
+                        Islands[(i + 1) % NumIslands][-Migrants:] = Outgoing[i]
+    finally:
+        Block.close()
+        Block.unlink()
+
+    # Only each island's best tour needs pricing here, so the graph's path weights are used rather
+    # than a second cost matrix.
+    Weight = GraphObj.CycleWeight if CycleBool == True else GraphObj.OpenPathWeight
+    Best = min((Pop[0] for Pop in Islands), key=lambda Row: Weight(np.concatenate(([StartInd], Row)), False))
+    finalpath = [StartVertName] + [Names[v] for v in Best.tolist()]
+    if CycleBool == True:
+        finalpath.append(StartVertName)
+
+    return finalpath
+
+def Genetic(GraphObj, StartVertName, CycleBool, MaxCycle, PopSize=GAPOPULATION, Seed=None, Islands=1):
+    # Implementation of a basic genetic algorithm for solving TSP.
+    # Each "chromosome" is a path from the fixed start vertex, and its fitness is the path weight
+    # (closed into a cycle if CycleBool == True), evaluated for the whole population at once from the
+    # graph's cost matrix. For each of the MaxCycle generations, parents are chosen by tournament
+    # selection, children are bred with order crossover and mutated with swaps and inversions, and the
+    # best tours are carried over unchanged (see EvolvePopulation). Seed seeds the random choices.
+    # If Islands > 1, that many populations evolve in parallel processes (see IslandGenetic).
+    finalpath = []
 
     if GraphObj.NameInGraph(StartVertName) == True:
-        starterpath = GraphObj.GetVertexNames()
-        
-        mutations = Mutate([starterpath], numverts)
-        print(mutations)
-            
+        Names = GraphObj.GetVertexNames()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        if len(Names) < 3:
+            return NearestNeighbor(GraphObj, StartVertName, CycleBool)
+        if Islands > 1:
+            return IslandGenetic(GraphObj, StartVertName, CycleBool, MaxCycle, max(2, PopSize), Islands, Seed)
+
+        Rng = np.random.default_rng(Seed)
+        CostMat = GraphObj.CostMatrix(False)
+        Population = InitialPopulation(GraphObj, StartVertName, max(2, PopSize), Rng)
+        Population = EvolvePopulation(CostMat, StartInd, CycleBool, Population, MaxCycle, Rng)
+
+        finalpath = [StartVertName] + [Names[v] for v in Population[0].tolist()]
+        if CycleBool == True:
+            finalpath.append(StartVertName)
+
+    return finalpath
+
 def NearestNeighbor(GraphObj, StartVertName, CycleBool):
     # Implementation of the "nearest neighbor" algorithm as described in Rosenkratz's paper.
     # Easy to implement and relatively fast, but doesn't always produce an optimal solution.
     # If CycleBool == True, include the edge that gets us back to our starting vertex.
+    # The candidate neighbor lists are sorted by distance, so the first unvisited vertex in the current
+    # vertex's list is its nearest unvisited vertex. Only when the whole list has been visited is the
+    # graph's spatial index asked for the nearest remaining vertex, which keeps the algorithm close to
+    # O(n log n) on the large TSPLIB instances. Graphs whose metric is not planar scan the distance
+    # row instead.
     finalpath = []
-    VisitedVertices = []
-    CurrentVert = None
-    PreviousVert = None
     GraphVertexNames = GraphObj.GetVertexNames()
 
     if GraphObj.NameInGraph(StartVertName) == True:
-        CurrentVert = StartVertName
+        CurrentInd = GraphObj.GetVertexIndex(StartVertName)
         finalpath.append(StartVertName)
-        for V in GraphVertexNames:
-            if len(finalpath) < len(GraphVertexNames):
-                VisitedVertices.append(CurrentVert)
-                VertDistances = {}
-                SortedDistances = {}
-
-            # Get the distances between the current vertex and every other vertex in the graph.
-            # Here, we make the distance between any vertex and itself an arbitarily high value.
-            # If a vertex has already been visited, we also make it an arbitrarily high value.
-                for W in GraphVertexNames:
-                    if CurrentVert == W or W in VisitedVertices:
-                        VertDistances[W] = 999999
-                    else:
-                        VertDistances[W] = GraphObj.GetDistance(CurrentVert, W, False)
-                
-            
-                SortedDistances = dict(sorted(VertDistances.items(), key=lambda item: item[1]))
-                PreviousVert = CurrentVert
+        Visited = np.zeros(len(GraphVertexNames), dtype=bool)
+        Visited[CurrentInd] = True
+        Neighbors = GraphObj.NearestNeighbors(NEIGHBORLISTSIZE).tolist()
+        Coords = GraphObj.Coordinates()
+        Planar = GraphObj.IsPlanar()
+        Unvisited = GraphObj.SpatialIndex()
+        Unvisited.Remove(CurrentInd)
 
-                if len(SortedDistances) > 0:
-                    CurrentVert = min(SortedDistances, key=SortedDistances.get)
-                    finalpath.append(CurrentVert)
-
-                else:
-                    for X in GraphVertexNames:
-                        if X in finalpath:
-                            GraphVertexNames.remove(X)
+        while len(finalpath) < len(GraphVertexNames):
+            NextInd = -1
+            for w in Neighbors[CurrentInd]:
+                if Visited[w] == False:
+                    NextInd = w
+                    break
+            if NextInd == -1 and Planar == True:
+                NextInd = Unvisited.Nearest(Coords[CurrentInd])
+            elif NextInd == -1:
+                NextInd = int(np.argmin(np.where(Visited, np.inf, GraphObj.DistanceRow(CurrentInd, False))))
+            CurrentInd = NextInd
+            Visited[CurrentInd] = True
+            Unvisited.Remove(CurrentInd)
+            finalpath.append(GraphVertexNames[CurrentInd])
                             
         if CycleBool == True:
             finalpath.append(StartVertName)
@@ -241,46 +997,131 @@ def NearestNeighbor(GraphObj, StartVertName, CycleBool):
     return finalpath
 
 def NearestInsert(GraphObj, StartVertName, CycleBool):
-    # Start with the starting vertex. At each step of the process, add
-    # to our "final path" the vertex with the lowest distance to any vertex
-    # already in our "final path". Repeat this until every vertex in the graph
-    # has been visited once. If CycleBool == True, add the starting vertex to the
-    # end of our path so it becomes a cycle.
+    # Start with the starting vertex. At each step of the process, add the vertex with the lowest
+    # distance to any vertex already in our tour, at the place in the tour where it adds the least
+    # length. Repeat this until every vertex in the graph has been visited once. If CycleBool == True,
+    # add the starting vertex to the end of our path so it becomes a cycle. See InsertionTour.
+    return InsertionTour(GraphObj, StartVertName, CycleBool, "nearest", None)
+
+def CheapestInsert(GraphObj, StartVertName, CycleBool):
+    # Like NearestInsert, but at each step add the vertex that adds the least length to the tour.
+    return InsertionTour(GraphObj, StartVertName, CycleBool, "cheapest", None)
+
+def FarthestInsert(GraphObj, StartVertName, CycleBool):
+    # Like NearestInsert, but at each step add the vertex furthest from the tour. Laying down the
+    # outline of the graph first usually gives the best tours of the insertion family.
+    return InsertionTour(GraphObj, StartVertName, CycleBool, "farthest", None)
+
+def RandomInsert(GraphObj, StartVertName, CycleBool, Seed=None):
+    # Like NearestInsert, but the vertices are added in a random order. Seed seeds the order.
+    return InsertionTour(GraphObj, StartVertName, CycleBool, "random", Seed)
+
+def InsertionTour(GraphObj, StartVertName, CycleBool, Rule, Seed):
+    # Shared insertion heuristic. The tour is kept as a cycle in the array Next (Next[a] is the vertex
+    # after a) and every vertex is inserted between the pair of neighbouring tour vertices (a, b) for
+    # which d(a, v) + d(v, b) - d(a, b) is smallest. Rule chooses the next vertex:
+    #   "nearest"  - the vertex closest to the tour,
+    #   "farthest" - the vertex furthest from the tour,
+    #   "cheapest" - the vertex with the cheapest insertion,
+    #   "random"   - a random vertex.
+    # ClosestDist[w] (the distance from w to the tour) and BestCost[w] (the cost of w's cheapest
+    # insertion) only need comparing against the newly inserted vertex or edges at each step. The next
+    # vertex is taken from a heap with lazy deletion: out of date entries are skipped or refreshed
+    # when they reach the top. Each step is O(n) array work, so the whole tour takes O(n^2) time.
     finalpath = []
-    
-    GraphVertices = GraphObj.GetVertexNames()
-    UnvisitedVertices = GraphObj.GetVertexNames()
 
     if GraphObj.NameInGraph(StartVertName) == True:
-        finalpath.append(StartVertName)
-        UnvisitedVertices.remove(StartVertName)
-
-        while len(UnvisitedVertices) > 0:
-            vertexdistances = []
-            closestvertdict = {}
-        # Each time we visit a vertex, we remove it from our list of unvisited vertices. Do the following
-        # until no vertices are unvisited:
-            for v in finalpath:
-                distdict = {}
-        # Construct dictionaries for each vertex in our final path using the distance between said vertec
-        # and every other vertex in the graph.
-                for w in GraphVertices:
-                    if w not in finalpath:
-                        distdict[w] = GraphObj.GetDistance(v, w, False)
-                    
-                vertexdistances.append(distdict)
-        # Take the vertex which is closest to any vertex in our "final path" and add it to our path.
-        # Remove it from the list of unvisited vertices
-                closestvert = min(distdict, key=distdict.get)
-                closestvertdict[closestvert] = distdict[closestvert]
-
-            mindist = min(closestvertdict, key=distdict.get)
-
-            UnvisitedVertices.remove(mindist)
-            finalpath.append(mindist)
+        NumVerts = GraphObj.NumVertices()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        Next = np.zeros(NumVerts, dtype=np.int64)
+        EdgeLen = np.zeros(NumVerts)
+        InTour = np.zeros(NumVerts, dtype=bool)
+        Next[StartInd] = StartInd
+        InTour[StartInd] = True
+        TourInds = [StartInd]
 
-    if CycleBool == True:
-        finalpath.append(StartVertName)
+        ClosestDist = GraphObj.DistancesFrom(StartInd, None, False)
+        Heap = []
+        if Rule == "nearest":
+            Heap = [(ClosestDist[w], w) for w in range(0, NumVerts) if w != StartInd]
+        elif Rule == "farthest":
+            Heap = [(-ClosestDist[w], w) for w in range(0, NumVerts) if w != StartInd]
+        elif Rule == "cheapest":
+            # Entries are (cost, w, version, a, b): inserting w between a and b costs "cost". An entry
+            # is out of date if w's version has moved on or (a, b) is no longer an edge of the tour.
+            BestCost = 2.0*ClosestDist
+            Version = np.zeros(NumVerts, dtype=np.int64)
+            Heap = [(BestCost[w], w, 0, StartInd, StartInd) for w in range(0, NumVerts) if w != StartInd]
+        else:
+            Order = [w for w in range(0, NumVerts) if w != StartInd]
+            random.Random(Seed).shuffle(Order)
+            Heap = [(i, w) for i, w in enumerate(Order)]
+        heapq.heapify(Heap)
+
+        while len(TourInds) < NumVerts:
+            Tail = -1
+            if Rule == "cheapest":
+                Cost, NewInd, EntryVersion, Tail, Head = heapq.heappop(Heap)
+                if InTour[NewInd] == True or EntryVersion != Version[NewInd]:
+                    continue
+                if Next[Tail] != Head:
+                    # The edge was split by an earlier insertion, so look for w's cheapest edge again.
+                    Tails = np.array(TourInds)
+                    Costs = (GraphObj.DistancesFrom(NewInd, Tails, False)
+                             + GraphObj.DistancesFrom(NewInd, Next[Tails], False) - EdgeLen[Tails])
+                    Best = int(np.argmin(Costs))
+                    Version[NewInd] += 1
+                    BestCost[NewInd] = Costs[Best]
+                    heapq.heappush(Heap, (float(Costs[Best]), NewInd, int(Version[NewInd]), int(Tails[Best]), int(Next[Tails[Best]])))
+                    continue
+            else:
+                Key, NewInd = heapq.heappop(Heap)
+                if InTour[NewInd] == True:
+                    continue
+                if Rule == "nearest" and Key != ClosestDist[NewInd]:
+                    continue
+                if Rule == "farthest" and -Key != ClosestDist[NewInd]:
+                    # The vertex has moved closer to the tour since this entry was pushed.
+                    heapq.heappush(Heap, (-ClosestDist[NewInd], NewInd))
+                    continue
+                Tails = np.array(TourInds)
+                Costs = (GraphObj.DistancesFrom(NewInd, Tails, False)
+                         + GraphObj.DistancesFrom(NewInd, Next[Tails], False) - EdgeLen[Tails])
+                Tail = int(Tails[np.argmin(Costs)])
+
+            # Insert NewInd between Tail and Head.
+            Head = int(Next[Tail])
+            NewRow = GraphObj.DistancesFrom(NewInd, None, False)
+            Next[Tail] = NewInd
+            Next[NewInd] = Head
+            EdgeLen[Tail] = NewRow[Tail]
+            EdgeLen[NewInd] = NewRow[Head]
+            InTour[NewInd] = True
+            TourInds.append(NewInd)
+
+            if Rule == "nearest" or Rule == "farthest":
+                Closer = np.flatnonzero((NewRow < ClosestDist) & ~InTour)
+                ClosestDist[Closer] = NewRow[Closer]
+                if Rule == "nearest":
+                    for w in Closer.tolist():
+                        heapq.heappush(Heap, (ClosestDist[w], w))
+            elif Rule == "cheapest":
+                # Only the two new edges (Tail, NewInd) and (NewInd, Head) can give cheaper insertions.
+                TailRow = GraphObj.DistancesFrom(Tail, None, False)
+                HeadRow = GraphObj.DistancesFrom(Head, None, False)
+                ViaTail = TailRow + NewRow - EdgeLen[Tail]
+                ViaHead = NewRow + HeadRow - EdgeLen[NewInd]
+                for Costs, A, B in ((ViaTail, Tail, NewInd), (ViaHead, NewInd, Head)):
+                    Cheaper = np.flatnonzero((Costs < BestCost) & ~InTour)
+                    BestCost[Cheaper] = Costs[Cheaper]
+                    Version[Cheaper] += 1
+                    for w in Cheaper.tolist():
+                        heapq.heappush(Heap, (float(Costs[w]), w, int(Version[w]), A, B))
+
+        Walk = [StartInd]
+        while len(Walk) < NumVerts:
+            Walk.append(int(Next[Walk[-1]]))
+        finalpath = ShortcutWalk(GraphObj, Walk, CycleBool)
 
     return finalpath
 
@@ -298,104 +1139,1348 @@ def GenMinTree(GraphObj, StartVertName, drawtree):
         
     return MinTree
 
-def TwoOpt(GraphObj, StartVertName, CycleBool, StartCond, NaiveBool):
-    # Start with an arbitary path through the graph. Then, for every two unique pairings of vertices,
-    # consider the cost of "swapping" edges between them. If the cost of this "swapping"
-    # results in less costly path, change the order of the vertices to reflect new arrangement.
+def TreeAdjacency(GraphObj, StartVertName):
+    # Build the minimum spanning tree rooted at the starting vertex (see GenMinTree) and return it as
+    # adjacency lists of vertex indices.
+    Adjacent = [[] for i in range(0, GraphObj.NumVertices())]
+    MinTree = GenMinTree(GraphObj, StartVertName, False)
+    for E in MinTree.GetEdges():
+        IndA = GraphObj.GetVertexIndex(E[0].GetName())
+        IndB = GraphObj.GetVertexIndex(E[1].GetName())
+        Adjacent[IndA].append(IndB)
+        Adjacent[IndB].append(IndA)
+
+    return Adjacent
+
+def ShortcutWalk(GraphObj, Walk, CycleBool):
+    # Turn a closed walk of vertex indices that begins at the starting vertex and visits every vertex
+    # into a path of vertex names by skipping vertices that were already visited. In a metric graph
+    # the shortcuts never make the tour longer. For a path (CycleBool == False) the cycle is read in
+    # whichever direction leaves the longer of the two edges at the starting vertex unused.
+    Seen = np.zeros(GraphObj.NumVertices(), dtype=bool)
+    PathInds = []
+    for v in Walk:
+        if Seen[v] == False:
+            Seen[v] = True
+            PathInds.append(v)
+
+    Names = GraphObj.GetVertexNames()
+    if CycleBool == False and len(PathInds) > 2:
+        DistFunc = GraphObj.DistanceFunction()
+        if DistFunc(PathInds[0], PathInds[1]) > DistFunc(PathInds[0], PathInds[-1]):
+            PathInds = [PathInds[0]] + PathInds[:0:-1]
+
+    finalpath = [Names[v] for v in PathInds]
+    if CycleBool == True:
+        finalpath.append(Names[PathInds[0]])
+
+    return finalpath
 
+def DoubleTree(GraphObj, StartVertName, CycleBool):
+    # Double-tree heuristic: walk around the minimum spanning tree (which uses every tree edge twice)
+    # and shortcut the repeated vertices, i.e. visit the vertices in depth-first preorder from the
+    # starting vertex. The tour is at most twice the optimal length in a metric graph.
     finalpath = []
-    workingpath = []
-    workingpathcost = 0
-
-    def PathSwap(originallist, swapA, swapB):
-        # Swap element "swapA" in the given list with element "swapB"
-        newpath = originallist.copy()
-        AInd = originallist.index(swapA)
-        BInd = originallist.index(swapB)
-        newpath[AInd], newpath[BInd] = newpath[BInd], newpath[AInd]
-        return newpath
-            
-    GraphVertices = GraphObj.GetVertexNames()
-    
-    # Start by generating an arbitary path through the graph.
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        Adjacent = TreeAdjacency(GraphObj, StartVertName)
+        Preorder = []
+        Stack = [GraphObj.GetVertexIndex(StartVertName)]
+        Visited = np.zeros(GraphObj.NumVertices(), dtype=bool)
+        while len(Stack) > 0:
+            u = Stack.pop()
+            if Visited[u] == False:
+                Visited[u] = True
+                Preorder.append(u)
+                Stack.extend(Adjacent[u][::-1])
+
+        finalpath = ShortcutWalk(GraphObj, Preorder, CycleBool)
+
+    return finalpath
+
+def SubsetNeighbors(GraphObj, Inds, NumNeighbors):
+    # For every vertex in the index array Inds, find its NumNeighbors nearest vertices among the other
+    # members of Inds. Returns an (len(Inds), k) array of positions into Inds, nearest first.
+    NumNeighbors = max(0, min(NumNeighbors, len(Inds)-1))
+    if GraphObj.IsPlanar() == False:
+        # The positions say nothing about these distances, so sort blocks of distance rows instead.
+        Inds = np.asarray(Inds, dtype=np.int64)
+        Neighbors = np.zeros((len(Inds), NumNeighbors), dtype=np.int64)
+        BlockSize = max(1, (8*1024*1024) // max(1, len(Inds)))
+        for Start in range(0, len(Inds), BlockSize):
+            Rows = np.arange(Start, min(len(Inds), Start+BlockSize))
+            Block = GraphObj.DistanceBlock(Inds[Rows], Inds, False)
+            Block[np.arange(len(Rows)), Rows] = np.inf
+            Neighbors[Rows] = np.argsort(Block, axis=1, kind="stable")[:, :NumNeighbors]
+        return Neighbors
+
+    return TSP.SpatialIndex(GraphObj.Coordinates()[Inds]).AllNeighbors(NumNeighbors).astype(np.int64)
+
+def GreedyMatching(GraphObj, Inds):
+    # Greedy minimum-weight perfect matching on an even number of vertices. The shortest candidate
+    # edges between near neighbours are taken first as long as both ends are still free. Any vertices
+    # left over are paired with their nearest free vertex. Returns a list of (IndA, IndB) pairs.
+    Inds = np.asarray(Inds, dtype=np.int64)
+    Pairs = []
+    if len(Inds) < 2:
+        return Pairs
+
+    Neighbors = SubsetNeighbors(GraphObj, Inds, NEIGHBORLISTSIZE)
+    Rows = np.repeat(np.arange(len(Inds)), Neighbors.shape[1])
+    Cols = Neighbors.ravel()
+    Weights = GraphObj.PairDistances(Inds[Rows], Inds[Cols], False)
+    Matched = np.zeros(len(Inds), dtype=bool)
+    for EdgeInd in np.argsort(Weights, kind="stable").tolist():
+        A = int(Rows[EdgeInd])
+        B = int(Cols[EdgeInd])
+        if Matched[A] == False and Matched[B] == False:
+            Matched[A] = True
+            Matched[B] = True
+            Pairs.append((int(Inds[A]), int(Inds[B])))
+
+    Free = Inds[~Matched].tolist()
+    while len(Free) > 1:
+        A = Free.pop()
+        Closest = int(np.argmin(GraphObj.DistancesFrom(A, Free, False)))
+        Pairs.append((A, Free.pop(Closest)))
+
+    return Pairs
+
+def EulerWalk(NumVerts, Edges, StartInd):
+    # Hierholzer's algorithm: return a closed walk from StartInd that uses every edge in the list
+    # Edges exactly once. Every vertex must have even degree and the edges must be connected.
+    Incident = [[] for i in range(0, NumVerts)]
+    for EdgeInd, (A, B) in enumerate(Edges):
+        Incident[A].append(EdgeInd)
+        Incident[B].append(EdgeInd)
+
+    Used = [False]*len(Edges)
+    Walk = []
+    Stack = [StartInd]
+    while len(Stack) > 0:
+        u = Stack[-1]
+        Edgelist = Incident[u]
+        while len(Edgelist) > 0 and Used[Edgelist[-1]] == True:
+            Edgelist.pop()
+        if len(Edgelist) == 0:
+            Walk.append(Stack.pop())
+        else:
+            EdgeInd = Edgelist.pop()
+            Used[EdgeInd] = True
+            A, B = Edges[EdgeInd]
+            Stack.append(B if A == u else A)
+
+    Walk.reverse()
+    return Walk
+
+def Christofides(GraphObj, StartVertName, CycleBool):
+    # Christofides' heuristic. Take the minimum spanning tree, match up its odd-degree vertices
+    # (greedily, see GreedyMatching, rather than with an exact minimum-weight matching), walk an Euler
+    # tour of the tree plus the matching and shortcut the repeated vertices. With an exact matching
+    # the tour is at most 1.5 times optimal; the greedy matching gives up that guarantee but keeps
+    # the construction fast enough for the large TSPLIB instances.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        NumVerts = GraphObj.NumVertices()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        Adjacent = TreeAdjacency(GraphObj, StartVertName)
+        Edges = [(u, v) for u in range(0, NumVerts) for v in Adjacent[u] if u < v]
+        OddInds = [u for u in range(0, NumVerts) if len(Adjacent[u]) % 2 == 1]
+        Edges.extend(GreedyMatching(GraphObj, OddInds))
+
+        finalpath = ShortcutWalk(GraphObj, EulerWalk(NumVerts, Edges, StartInd), CycleBool)
+
+    return finalpath
+
+def CandidatePairs(GraphObj, NumNeighbors):
+    # Edges between each vertex and its NumNeighbors nearest neighbors as (U, V) arrays with U < V and
+    # no duplicates.
+    NumVerts = GraphObj.NumVertices()
+    Neighbors = GraphObj.NearestNeighbors(NumNeighbors).astype(np.int64)
+    U = np.repeat(np.arange(NumVerts, dtype=np.int64), Neighbors.shape[1])
+    V = Neighbors.ravel()
+    Keys = np.unique(np.minimum(U, V)*NumVerts + np.maximum(U, V))
+
+    return Keys // NumVerts, Keys % NumVerts
+
+def JoinFragments(GraphObj, Adjacent, Members, FromInd):
+    # Join the paths ("fragments") formed by the edges in the adjacency lists Adjacent into one path
+    # through every vertex in the index array Members. Each vertex has at most two neighbours and a
+    # vertex with none is a fragment by itself. Starting from the fragment end closest to the vertex
+    # FromInd, walk to the fragment's other end and jump to the closest free end of another fragment,
+    # found with a SpatialIndex over the fragment ends (or by scanning the distances to the free ends
+    # if the graph's metric is not planar). Returns the vertex indices in path order.
+    Ends = np.array([v for v in Members if len(Adjacent[v]) < 2], dtype=np.int64)
+    EndIndex = TSP.SpatialIndex(GraphObj.Coordinates()[Ends])
+    EndPos = {}
+    for Pos, v in enumerate(Ends.tolist()):
+        EndPos[v] = Pos
+
+    Coords = GraphObj.Coordinates()
+    Planar = GraphObj.IsPlanar()
+    Free = np.ones(len(Ends), dtype=bool)
+
+    def NearestEnd(FromVert):
+        if Planar == True:
+            return EndIndex.Nearest(Coords[FromVert])
+        if Free.any() == False:
+            return -1
+        return int(np.argmin(np.where(Free, GraphObj.DistancesFrom(FromVert, Ends, False), np.inf)))
+
+    Joined = []
+    Current = int(Ends[NearestEnd(FromInd)])
+    while True:
+        Previous = -1
+        EndIndex.Remove(EndPos[Current])
+        Free[EndPos[Current]] = False
+        while True:
+            Joined.append(Current)
+            Following = [w for w in Adjacent[Current] if w != Previous]
+            if len(Following) == 0:
+                break
+            Previous, Current = Current, Following[0]
+        EndIndex.Remove(EndPos[Current])
+        Free[EndPos[Current]] = False
+
+        NextPos = NearestEnd(Current)
+        if NextPos == -1:
+            break
+        Current = int(Ends[NextPos])
+
+    return Joined
+
+def GreedyEdge(GraphObj, StartVertName, CycleBool):
+    # Greedy edge heuristic. Go through the candidate edges (each vertex to its nearest neighbors) from
+    # shortest to longest and keep an edge if both of its ends have fewer than two tour edges so far and
+    # it does not close a cycle (checked with a DisjointSet). The resulting paths are then joined up
+    # by JoinFragments.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        NumVerts = GraphObj.NumVertices()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        U, V = CandidatePairs(GraphObj, NEIGHBORLISTSIZE)
+        Order = np.argsort(GraphObj.PairDistances(U, V, False), kind="stable")
+
+        Adjacent = [[] for i in range(0, NumVerts)]
+        Sets = TSP.DisjointSet(NumVerts)
+        for A, B in zip(U[Order].tolist(), V[Order].tolist()):
+            if len(Adjacent[A]) < 2 and len(Adjacent[B]) < 2 and Sets.Union(A, B) == True:
+                Adjacent[A].append(B)
+                Adjacent[B].append(A)
+
+        Cycle = JoinFragments(GraphObj, Adjacent, range(0, NumVerts), StartInd)
+        Rotate = Cycle.index(StartInd)
+        finalpath = ShortcutWalk(GraphObj, Cycle[Rotate:] + Cycle[:Rotate], CycleBool)
+
+    return finalpath
+
+def Savings(GraphObj, StartVertName, CycleBool):
+    # Clarke-Wright savings heuristic with the starting vertex as the hub. Visiting i and j one after
+    # the other instead of returning to the hub in between saves d(h, i) + d(h, j) - d(i, j). Candidate
+    # pairs (nearest neighbors) are joined in order of decreasing savings, under the same degree and
+    # no-cycle rules as GreedyEdge. The routes are then joined into one path from the hub.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        NumVerts = GraphObj.NumVertices()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        U, V = CandidatePairs(GraphObj, NEIGHBORLISTSIZE)
+        Keep = (U != StartInd) & (V != StartInd)
+        U = U[Keep]
+        V = V[Keep]
+        HubDist = GraphObj.DistancesFrom(StartInd, None, False)
+        Saving = HubDist[U] + HubDist[V] - GraphObj.PairDistances(U, V, False)
+        Order = np.argsort(-Saving, kind="stable")
+
+        Adjacent = [[] for i in range(0, NumVerts)]
+        Sets = TSP.DisjointSet(NumVerts)
+        for A, B in zip(U[Order].tolist(), V[Order].tolist()):
+            if len(Adjacent[A]) < 2 and len(Adjacent[B]) < 2 and Sets.Union(A, B) == True:
+                Adjacent[A].append(B)
+                Adjacent[B].append(A)
+
+        Members = [v for v in range(0, NumVerts) if v != StartInd]
+        Walk = [StartInd]
+        if len(Members) > 0:
+            Walk += JoinFragments(GraphObj, Adjacent, Members, StartInd)
+        finalpath = ShortcutWalk(GraphObj, Walk, CycleBool)
+
+    return finalpath
+
+def HilbertKeys(Coords, Bits):
+    # Position of each point along a Hilbert curve over the bounding box of the points, with the box
+    # cut into a 2^Bits by 2^Bits grid. Points that are close on the curve are close in the plane.
+    Side = 1 << Bits
+    Low = Coords.min(axis=0)
+    Span = max(float(np.ptp(Coords, axis=0).max()), 1e-12)
+    X = ((Coords[:, 0] - Low[0])/Span*(Side-1)).astype(np.int64)
+    Y = ((Coords[:, 1] - Low[1])/Span*(Side-1)).astype(np.int64)
+    Keys = np.zeros(len(Coords), dtype=np.int64)
+
+    Step = Side >> 1
+    while Step > 0:
+        RX = (X & Step) > 0
+        RY = (Y & Step) > 0
+        Keys += Step*Step*((3*RX.astype(np.int64)) ^ RY.astype(np.int64))
+        # Rotate the quadrant so that the curve inside it has the standard orientation.
+        Flip = ~RY & RX
+        X[Flip] = Side-1 - X[Flip]
+        Y[Flip] = Side-1 - Y[Flip]
+        Swap = ~RY
+        X[Swap], Y[Swap] = Y[Swap], X[Swap].copy()
+        Step >>= 1
+
+    return Keys
+
+def SpaceFillingCurve(GraphObj, StartVertName, CycleBool):
+    # Visit the vertices in the order of a Hilbert curve through the plane. This takes O(n log n) time
+    # and is typically 25% longer than optimal, which makes it a quick start for the largest graphs.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        Cycle = np.argsort(HilbertKeys(GraphObj.Coordinates(), 16), kind="stable").tolist()
+        Rotate = Cycle.index(StartInd)
+        finalpath = ShortcutWalk(GraphObj, Cycle[Rotate:] + Cycle[:Rotate], CycleBool)
+
+    return finalpath
+
+class TourProblem:
+    # Index-based view of a graph which the local search engines work on. Vertices are referred to by
+    # their index in the graph, distances come from a scalar distance function and each vertex has a
+    # list of its nearest neighbors (its "candidates") in increasing order of distance.
+    # The engines only optimise cycles. If CycleBool is False (a path from a fixed start vertex), a
+    # dummy vertex is added at index N. Its edge to the start vertex costs nothing and its edge to any
+    # other vertex costs a large constant penalty, so every improving move keeps the dummy next to the
+    # start vertex and the cycle read from the dummy onwards is the best path from the start vertex.
+    def __init__(self, GraphObj, StartVertName, CycleBool, NumNeighbors):
+        self.graph = GraphObj
+        self.names = GraphObj.GetVertexNames()
+        self.startind = GraphObj.GetVertexIndex(StartVertName)
+        self.cyclebool = CycleBool
+        self.numverts = len(self.names)
+        self.neighbors = GraphObj.NearestNeighbors(NumNeighbors).tolist()
+        # For each vertex, the vertices that have it in their candidate list (see ReverseNeighbors).
+        self.reverseneighbors = None
+        BaseDist = GraphObj.DistanceFunction()
+
+        # Improvements smaller than eps are treated as rounding noise.
+        Diagonal = max(1.0, GraphObj.DistanceScale())
+        self.eps = 1e-9*Diagonal
+        self.dummy = None
+
+        if CycleBool == True:
+            self.dist = BaseDist
+        else:
+            Dummy = self.numverts
+            StartInd = self.startind
+            Penalty = 1000.0*Diagonal
+            self.dummy = Dummy
+            self.numverts += 1
+            self.neighbors.append([StartInd])
+
+            def Dist(IndA, IndB):
+                if IndA == Dummy:
+                    return 0.0 if IndB == StartInd else Penalty
+                if IndB == Dummy:
+                    return 0.0 if IndA == StartInd else Penalty
+                return BaseDist(IndA, IndB)
+
+            self.dist = Dist
+
+    def SetCandidates(self, CandidateLists):
+        # Replace the nearest neighbor candidate lists with other lists of vertex indices (one list
+        # per vertex of the graph, each sorted by increasing distance).
+        self.neighbors = [list(C) for C in CandidateLists]
+        if self.dummy != None:
+            self.neighbors.append([self.startind])
+        self.reverseneighbors = None
+
+    def ReverseNeighbors(self):
+        # Lists the vertices whose candidate lists contain each vertex. Built on first use.
+        if self.reverseneighbors == None:
+            Reverse = [[] for i in range(0, self.numverts)]
+            for V, Candidates in enumerate(self.neighbors):
+                for C in Candidates:
+                    Reverse[C].append(V)
+            self.reverseneighbors = Reverse
+
+        return self.reverseneighbors
+
+    def TourFromNames(self, PathNames):
+        # Convert a list of vertex names (optionally closed by repeating the first vertex) into an
+        # ArrayTour over vertex indices.
+        PathInds = self.graph.PathIndices(PathNames).tolist()
+        if len(PathInds) > 1 and PathInds[0] == PathInds[-1]:
+            PathInds.pop()
+        if self.dummy != None:
+            PathInds.append(self.dummy)
+
+        return self.NewTour(PathInds)
+
+    def NewTour(self, Order):
+        # Tour object for a cycle through the vertex indices in Order. Large tours use the two-level
+        # list, whose O(sqrt(n)) reversals beat the O(n) array copies of ArrayTour.
+        if len(Order) > TWOLEVELLIMIT:
+            return TSP.TwoLevelTour(Order)
+        return TSP.ArrayTour(Order)
+
+    def NamesFromTour(self, Tour):
+        # Convert an ArrayTour back into a list of vertex names beginning at the start vertex.
+        # Cycles are closed by repeating the start vertex, as the other algorithms in this file do.
+        PathInds = Tour.Order(self.startind)
+        if self.dummy != None:
+            if Tour.Next(self.startind) == self.dummy:
+                # The tour runs backwards from the start vertex, so read it the other way round.
+                PathInds = [PathInds[0]] + PathInds[:0:-1]
+            PathInds.remove(self.dummy)
+
+        finalpath = [self.names[v] for v in PathInds]
+        if self.cyclebool == True:
+            finalpath.append(self.names[self.startind])
+
+        return finalpath
+
+    def TourLength(self, Tour):
+        # Total weight of the cycle represented by Tour, using the problem's distance function.
+        Order = Tour.Order(None)
+        return sum(self.dist(Order[i-1], Order[i]) for i in range(0, len(Order)))
+
+def StartTour(GraphObj, StartVertName, StartCond):
+    # Generate the initial path that the improvement heuristics start from.
+    # If StartCond = 0, the vertices are visited in the order they were added to the graph.
     # If StartCond = 1, then this will be computed by the nearest neighbor algorithm.
     # If StartCond = 2, then this will be computed by nearest insertion algorithm.
-    if StartCond == 0:
-        workingpath = GraphVertices
+    # If StartCond = 3, then this will be computed by the double-tree heuristic.
+    # If StartCond = 4, then this will be computed by Christofides' heuristic.
+    # If StartCond = 5, then this will be computed by the greedy edge heuristic.
+    # If StartCond = 6, then this will be computed by the Clarke-Wright savings heuristic.
+    # If StartCond = 7, then the vertices are visited in the order of a Hilbert curve.
+    # The returned path begins at the starting vertex and is not closed into a cycle.
+    startpath = []
     if StartCond == 1:
-        #print ("Using Nearest Neighbor start")
-        workingpath = NearestNeighbor(GraphObj, StartVertName, CycleBool)
-    if StartCond == 2:
-        #print ("Using Nearest Insertion start")
-        workingpath = NearestInsert(GraphObj, StartVertName, CycleBool)
-
-
-
-    # Get the total cost of this initial path.
-    workingpathcost = GraphObj.PathWeight(workingpath, False)
-    #print("Initial path:", workingpath, workingpathcost)
-    #print("Initial path:", workingpath, "with cost", workingpathcost)
-
-    # Consider every unique pairing of verticies with those in our initial path
-    # We do this by changing the ordering of vertices in our workingpath list. 
-    # We only check disjoint edges (edges which do not share a vertex)
-    for i in range (1, len(workingpath)):
-        CurrentA = workingpath[i-1]
-        CurrentB = workingpath[i]
-        workingpathcost = GraphObj.PathWeight(workingpath, False)
-
-        for j in range (1, len(workingpath)):
-            CurrentC = GraphVertices[j-1]
-            CurrentD = GraphVertices[j]
-            # Check to make sure the edges are disjoint
-            if CurrentA not in [CurrentC, CurrentD] and CurrentB not in [CurrentC, CurrentD]:
-                # Check the costs of the swapped paths. Pick the lowest one among these,
-                # then swap the edges.
-                inprogpath = workingpath.copy()
-                MinCostPath = None
-                UnSwappedPath = [CurrentA, CurrentB, CurrentC, CurrentD]
-                UnSwappedPathCost = GraphObj.PathWeight(UnSwappedPath, False)
-                # Swap the second and third elements
-                SwappedPath1 = [CurrentA, CurrentC, CurrentB, CurrentD]
-                SwappedPath1Cost = GraphObj.PathWeight(SwappedPath1, False)
-                # Swap the second and last elements
-                SwappedPath2 = [CurrentA, CurrentD, CurrentC, CurrentB]
-                SwappedPath2Cost = GraphObj.PathWeight(SwappedPath2, False)
-
-                if SwappedPath1Cost <= UnSwappedPathCost and SwappedPath1Cost <= SwappedPath2Cost:
-                    MinCostPath = SwappedPath1
-                if SwappedPath2Cost <= UnSwappedPathCost and SwappedPath2Cost <= SwappedPath1Cost:
-                    MinCostPath = SwappedPath2
+        startpath = NearestNeighbor(GraphObj, StartVertName, False)
+    elif StartCond == 2:
+        startpath = NearestInsert(GraphObj, StartVertName, False)
+    elif StartCond == 3:
+        startpath = DoubleTree(GraphObj, StartVertName, False)
+    elif StartCond == 4:
+        startpath = Christofides(GraphObj, StartVertName, False)
+    elif StartCond == 5:
+        startpath = GreedyEdge(GraphObj, StartVertName, False)
+    elif StartCond == 6:
+        startpath = Savings(GraphObj, StartVertName, False)
+    elif StartCond == 7:
+        startpath = SpaceFillingCurve(GraphObj, StartVertName, False)
+    else:
+        startpath = GraphObj.GetVertexNames()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        startpath = startpath[StartInd:] + startpath[:StartInd]
+
+    return startpath
+
+def DeadlinePassed(Deadline):
+    # Deadline is a time.perf_counter() value, or None for no time limit.
+    return Deadline != None and time.perf_counter() > Deadline
+
+def TwoOptMove(Tour, A, B, C, D):
+    # Replace the edges (A, B) and (C, D) with (A, C) and (B, D). B must follow A and D must follow C
+    # in the same direction around the tour, but that direction may be either way round.
+    if Tour.Next(A) == B:
+        Tour.Reverse(B, C)
+    else:
+        Tour.Reverse(C, B)
+
+def MoveSegment(Tour, P, S1, S2, N, X, Y, Reversed):
+    # Move the segment S1 ... S2 (with P before it and N after it) between the vertices X and Y,
+    # where P, S1, S2, N, X, Y all run in the same direction around the tour. The result is
+    # P N ... X S1 ... S2 Y, or P N ... X S2 ... S1 Y if Reversed == True. Done as 2-opt moves.
+    TwoOptMove(Tour, P, S1, X, Y)
+    TwoOptMove(Tour, P, X, N, S2)
+    if Reversed == False:
+        TwoOptMove(Tour, X, S2, S1, Y)
+
+def TwoOptSearch(Problem, Tour, Deadline):
+    # 2-opt local search with neighbor lists and don't-look bits.
+    # A 2-opt move removes the edges (a, b) and (c, d) and reconnects the tour with (a, c) and (b, d),
+    # reversing the path between them. For each vertex a we only try vertices c from a's candidate
+    # list, and stop as soon as d(a, c) is no shorter than d(a, b) since no improving move can follow.
+    # Vertices whose neighborhood has not changed since they last failed to improve are skipped (their
+    # "don't-look bit" is set). After a move, the four ends of the changed edges are queued again, and
+    # so is every vertex with one of them in its candidate list, since the move may have made an
+    # improving move from that vertex possible. Reversing a segment also changes which of the two
+    # edges at each vertex inside it forms a valid 2-opt move with edges outside it, so a pass can
+    # still end with a few improving moves left. ImproveTourInPlace repeats the passes until one makes
+    # no move. Returns the number of improving moves made.
+    Dist = Problem.dist
+    Neighbors = Problem.neighbors
+    Reverse = Problem.ReverseNeighbors()
+    Eps = Problem.eps
+    Next = Tour.Next
+    Prev = Tour.Prev
+    Queue = collections.deque(Tour.Order(None))
+    Active = [True]*Tour.NumVertices()
+    Moves = 0
+    Steps = 0
+
+    while len(Queue) > 0:
+        Steps += 1
+        if Steps % 256 == 0 and DeadlinePassed(Deadline):
+            break
+
+        A = Queue.popleft()
+        Active[A] = False
+        Improved = True
+        while Improved == True:
+            Improved = False
+            for Forward in (True, False):
+                B = Next(A) if Forward else Prev(A)
+                DistAB = Dist(A, B)
+                for C in Neighbors[A]:
+                    DistAC = Dist(A, C)
+                    if DistAC >= DistAB - Eps:
+                        break
+                    D = Next(C) if Forward else Prev(C)
+                    if C == B or D == A:
+                        continue
+
+                    Delta = DistAC + Dist(B, D) - DistAB - Dist(C, D)
+                    if Delta < -Eps:
+                        # a b ... c d becomes a c ... b d (or the mirror image going backwards).
+                        if Forward:
+                            Tour.Reverse(B, C)
+                        else:
+                            Tour.Reverse(A, D)
+                        Moves += 1
+                        for End in (A, B, C, D):
+                            for V in [End] + Reverse[End]:
+                                if Active[V] == False:
+                                    Active[V] = True
+                                    Queue.append(V)
+                        Improved = True
+                        break
+
+                if Improved == True:
+                    break
+
+    return Moves
+
+def OrOptSearch(Problem, Tour, Deadline):
+    # Or-opt local search: move a segment of 1 to 3 consecutive vertices to another place in the
+    # tour, possibly reversing it. For a segment S1 ... S2 between P and N, removing it saves
+    # d(P, S1) + d(S2, N) - d(P, N). The new place is found by trying the candidate neighbors of S1
+    # and S2, stopping once the new edge to the neighbor costs more than that saving. Each move is
+    # priced in O(1) from the six edges involved. Uses don't-look bits like TwoOptSearch and returns
+    # the number of improving moves made.
+    Dist = Problem.dist
+    Neighbors = Problem.neighbors
+    Eps = Problem.eps
+    Queue = collections.deque(Tour.Order(None))
+    Active = [True]*Tour.NumVertices()
+    Moves = 0
+    Steps = 0
+
+    if Tour.NumVertices() < 5:
+        return Moves
+
+    while len(Queue) > 0:
+        Steps += 1
+        if Steps % 256 == 0 and DeadlinePassed(Deadline):
+            break
+
+        S1 = Queue.popleft()
+        Active[S1] = False
+        BestMove = None
+        for Forward in (True, False):
+            Succ = Tour.Next if Forward else Tour.Prev
+            Pred = Tour.Prev if Forward else Tour.Next
+            P = Pred(S1)
+            Segment = [S1]
+            for SegLen in range(1, 4):
+                if SegLen > 1:
+                    Segment.append(Succ(Segment[-1]))
+                S2 = Segment[-1]
+                N = Succ(S2)
+                if N == P or S2 == P:
+                    break
+
+                DistPN = Dist(P, N)
+                RemoveGain = Dist(P, S1) + Dist(S2, N) - DistPN
+                if RemoveGain <= Eps:
+                    continue
+
+                # Try to put S1 (then S2) next to one of its candidate neighbors C.
+                for End, Other in ((S1, S2), (S2, S1)):
+                    for C in Neighbors[End]:
+                        DistEndC = Dist(End, C)
+                        if DistEndC >= RemoveGain - Eps:
+                            break
+                        if C in Segment:
+                            continue
+
+                        for X, Y in ((C, Succ(C)), (Pred(C), C)):
+                            if X in Segment or Y in Segment:
+                                continue
+                            if Y == C:
+                                Delta = Dist(X, Other) + DistEndC - Dist(X, Y) - RemoveGain
+                            else:
+                                Delta = DistEndC + Dist(Other, Y) - Dist(X, Y) - RemoveGain
+                            if Delta < -Eps:
+                                # X S1 ... S2 Y keeps the segment's direction, X S2 ... S1 Y reverses it.
+                                StartsAtX = (End == S1) == (Y != C)
+                                BestMove = (P, S1, S2, N, X, Y, StartsAtX == False)
+                                break
+                        if BestMove != None:
+                            break
+                    if BestMove != None:
+                        break
+                if BestMove != None:
+                    break
+            if BestMove != None:
+                break
+
+        if BestMove != None:
+            P, S1, S2, N, X, Y, Reversed = BestMove
+            MoveSegment(Tour, P, S1, S2, N, X, Y, Reversed)
+            Moves += 1
+            for V in (P, S1, S2, N, X, Y):
+                if Active[V] == False:
+                    Active[V] = True
+                    Queue.append(V)
+
+    return Moves
+
+def OrThreeOptSearch(Problem, Tour, Deadline):
+    # Restricted 3-opt search using the "or-3opt" segment insertion move, which moves a segment of
+    # any length without reversing it. Going round the tour as A B ... C D ... E F ..., the edges
+    # (A, B), (C, D) and (E, F) are replaced by (A, D), (C, F) and (E, B), giving A D ... E B ... C F.
+    # D is taken from A's candidate list and F from C's, each step keeping the partial gain positive,
+    # so every move is found and priced in O(1) per candidate pair. Uses don't-look bits and returns
+    # the number of improving moves made.
+    Dist = Problem.dist
+    Neighbors = Problem.neighbors
+    Eps = Problem.eps
+    Queue = collections.deque(Tour.Order(None))
+    Active = [True]*Tour.NumVertices()
+    Moves = 0
+    Steps = 0
+
+    if Tour.NumVertices() < 6:
+        return Moves
+
+    while len(Queue) > 0:
+        Steps += 1
+        if Steps % 256 == 0 and DeadlinePassed(Deadline):
+            break
+
+        A = Queue.popleft()
+        Active[A] = False
+        BestMove = None
+        for Forward in (True, False):
+            Succ = Tour.Next if Forward else Tour.Prev
+            Pred = Tour.Prev if Forward else Tour.Next
+            B = Succ(A)
+            DistAB = Dist(A, B)
+            for D in Neighbors[A]:
+                Gain1 = DistAB - Dist(A, D)
+                if Gain1 <= Eps:
+                    break
+                if D == B:
+                    continue
+                C = Pred(D)
+
+                Gain2 = Gain1 + Dist(C, D)
+                for F in Neighbors[C]:
+                    DistCF = Dist(C, F)
+                    if DistCF >= Gain2 - Eps:
+                        break
+                    # F must lie on the part of the tour running from D back round to A.
+                    if F == D or (Forward and Tour.Between(D, F, A) == False) or (Forward == False and Tour.Between(A, F, D) == False):
+                        continue
+                    E = Pred(F)
+                    Delta = DistCF + Dist(E, B) - Dist(E, F) - Gain2
+                    if Delta < -Eps:
+                        BestMove = (A, B, C, D, E, F)
+                        break
+                if BestMove != None:
+                    break
+            if BestMove != None:
+                break
+
+        if BestMove != None:
+            A, B, C, D, E, F = BestMove
+            MoveSegment(Tour, A, B, C, D, E, F, False)
+            Moves += 1
+            for V in BestMove:
+                if Active[V] == False:
+                    Active[V] = True
+                    Queue.append(V)
+
+    return Moves
+
+def NaiveTwoOptSearch(Problem, Tour, Deadline):
+    # Exhaustive 2-opt: every pair of non-adjacent edges is tried, without neighbor lists or
+    # don't-look bits. Each pass is O(n^2). Useful as a reference for the faster TwoOptSearch.
+    Dist = Problem.dist
+    Eps = Problem.eps
+    Moves = 0
+    Improved = True
+
+    while Improved == True and DeadlinePassed(Deadline) == False:
+        Improved = False
+        for A in range(0, Tour.NumVertices()):
+            B = Tour.Next(A)
+            Order = Tour.Order(B)
+            DistAB = Dist(A, B)
+            # Order runs B, ..., A, so C takes every vertex strictly between B and A.
+            for j in range(1, len(Order) - 2):
+                C = Order[j]
+                D = Order[j+1]
+                Delta = Dist(A, C) + Dist(B, D) - DistAB - Dist(C, D)
+                if Delta < -Eps:
+                    Tour.Reverse(B, C)
+                    Moves += 1
+                    Improved = True
+                    break
+
+            if DeadlinePassed(Deadline):
+                break
+
+    return Moves
+
+def ImproveTour(GraphObj, StartVertName, CycleBool, StartCond, Engines, TimeLimit):
+    # Shared driver for the local search heuristics. Build a starting path (see StartTour), then run
+    # each search engine in Engines in turn until none of them can improve the tour any further or
+    # TimeLimit seconds have passed (None for no limit). Returns a list of vertex names.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        Deadline = None
+        if TimeLimit != None:
+            Deadline = time.perf_counter() + TimeLimit
+
+        Problem = TourProblem(GraphObj, StartVertName, CycleBool, NEIGHBORLISTSIZE)
+        Tour = Problem.TourFromNames(StartTour(GraphObj, StartVertName, StartCond))
+        ImproveTourInPlace(Problem, Tour, Engines, Deadline)
+
+        finalpath = Problem.NamesFromTour(Tour)
+
+    return finalpath
+
+def ImproveTourInPlace(Problem, Tour, Engines, Deadline):
+    # Run each search engine in Engines in turn on Tour until a full round of them makes no move, or
+    # the deadline passes. This holds for a single engine too, so the result is a local optimum even
+    # for an engine whose don't-look bits can miss a move.
+    Improved = True
+    while Improved == True and DeadlinePassed(Deadline) == False:
+        Improved = False
+        for Engine in Engines:
+            Moves = Engine(Problem, Tour, Deadline)
+            if Moves > 0:
+                Improved = True
+
+def TwoOpt(GraphObj, StartVertName, CycleBool, StartCond, NaiveBool, TimeLimit=None):
+    # Start with an arbitary path through the graph (see StartTour for the meaning of StartCond).
+    # Then repeatedly look for two edges (a, b) and (c, d) such that replacing them with (a, c) and
+    # (b, d), which reverses the path between them, gives a shorter tour. Each candidate move is
+    # priced from the four edges involved rather than by recomputing the whole path weight.
+    # If NaiveBool == True, every pair of edges is tried (NaiveTwoOptSearch). Otherwise only the
+    # nearest neighbors of each vertex are tried, using don't-look bits (TwoOptSearch), which scales
+    # to the large TSPLIB instances. Stops at a tour that no 2-opt move between candidate neighbors
+    # can improve (a 2-optimal tour if NaiveBool == True), or after TimeLimit seconds.
+    Engine = NaiveTwoOptSearch if NaiveBool == True else TwoOptSearch
+
+    return ImproveTour(GraphObj, StartVertName, CycleBool, StartCond, [Engine], TimeLimit)
+
+def OrOpt(GraphObj, StartVertName, CycleBool, StartCond, WithTwoOpt, TimeLimit=None):
+    # Or-opt: improve a starting path (see StartTour) by moving segments of 1 to 3 vertices to better
+    # places in the tour (OrOptSearch). If WithTwoOpt == True, 2-opt moves are interleaved with the
+    # Or-opt moves until neither finds an improvement, which is the usual way of running it.
+    Engines = [OrOptSearch]
+    if WithTwoOpt == True:
+        Engines = [TwoOptSearch, OrOptSearch]
+
+    return ImproveTour(GraphObj, StartVertName, CycleBool, StartCond, Engines, TimeLimit)
+
+def OrThreeOpt(GraphObj, StartVertName, CycleBool, StartCond, WithTwoOpt, TimeLimit=None):
+    # Restricted 3-opt: improve a starting path (see StartTour) with Or-opt moves and with the
+    # or-3opt segment insertion move (OrThreeOptSearch), which can move segments of any length.
+    # If WithTwoOpt == True, 2-opt moves are interleaved with them.
+    Engines = [OrOptSearch, OrThreeOptSearch]
+    if WithTwoOpt == True:
+        Engines = [TwoOptSearch, OrOptSearch, OrThreeOptSearch]
+
+    return ImproveTour(GraphObj, StartVertName, CycleBool, StartCond, Engines, TimeLimit)
+
+# Settings for the Lin-Kernighan search. LKMAXDEPTH bounds the number of flips in one move and
+# LKBREADTH is the number of alternatives tried for the first added edge before giving up on t1.
+LKMAXDEPTH = 50
+LKBREADTH = 5
+
+def JournalMove(Tour, Journal, A, B, C, D):
+    # Make a 2-opt move (see TwoOptMove) and record it in Journal so that it can be undone.
+    TwoOptMove(Tour, A, B, C, D)
+    Journal.append((A, B, C, D))
+
+def UndoJournal(Tour, Journal, KeepLen):
+    # Undo the moves recorded in Journal, newest first, until only the first KeepLen remain.
+    while len(Journal) > KeepLen:
+        A, B, C, D = Journal.pop()
+        # The move left A C ... B D, so swapping the edges back restores (A, B) and (C, D).
+        TwoOptMove(Tour, A, C, B, D)
+
+def LKMove(Problem, Tour, T1, Journal):
+    # Look for an improving Lin-Kernighan move starting at vertex T1, built from successive flips.
+    # One tour edge (T1, T2) is removed, leaving a Hamiltonian path from T2 to T1. At each step an
+    # edge (T2, T3) is added for T3 in T2's candidate list and the edge (T3, T4) is removed such that
+    # joining T4 to T1 closes a tour again; T4 then becomes the new T2. The cumulative gain must stay
+    # positive, added edges are never removed again and removed edges are never added back. The
+    # best closed tour seen along the chain is kept. Returns the gain of the move made (0 if none,
+    # in which case the tour is left unchanged) and the vertices whose edges changed.
+    Dist = Problem.dist
+    Neighbors = Problem.neighbors
+    Eps = Problem.eps
+    StartLen = len(Journal)
+
+    def Choices(T2, Gain, Added, Removed):
+        # Candidate (T3, T4) pairs for the next step, best lookahead gain first.
+        Forward = Tour.Next(T1) == T2
+        Found = []
+        for T3 in Neighbors[T2]:
+            Gain1 = Gain - Dist(T2, T3)
+            if Gain1 <= Eps:
+                break
+            if T3 == T1 or (min(T2, T3), max(T2, T3)) in Removed:
+                continue
+            T4 = Tour.Prev(T3) if Forward else Tour.Next(T3)
+            if T4 == T2 or (min(T3, T4), max(T3, T4)) in Added:
+                continue
+            Found.append((Gain1 + Dist(T3, T4), T3, T4))
+
+        Found.sort(reverse=True)
+        return Found
+
+    for T2 in (Tour.Next(T1), Tour.Prev(T1)):
+        FirstGain = Dist(T1, T2)
+        FirstRemoved = {(min(T1, T2), max(T1, T2))}
+        for First in Choices(T2, FirstGain, set(), FirstRemoved)[:LKBREADTH]:
+            Added = set()
+            Removed = set(FirstRemoved)
+            Touched = [T1, T2]
+            Step = First
+            CurrentT2 = T2
+            BestGain = 0.0
+            BestLen = StartLen
+            for Depth in range(0, LKMAXDEPTH):
+                Gain, T3, T4 = Step
+                JournalMove(Tour, Journal, T1, CurrentT2, T4, T3)
+                Added.add((min(CurrentT2, T3), max(CurrentT2, T3)))
+                Removed.add((min(T3, T4), max(T3, T4)))
+                Touched.extend((T3, T4))
+                ClosedGain = Gain - Dist(T4, T1)
+                if ClosedGain > BestGain:
+                    BestGain = ClosedGain
+                    BestLen = len(Journal)
+
+                CurrentT2 = T4
+                NextSteps = Choices(CurrentT2, Gain, Added, Removed)
+                if len(NextSteps) == 0:
+                    break
+                Step = NextSteps[0]
+
+            UndoJournal(Tour, Journal, BestLen)
+            if BestGain > Eps:
+                return BestGain, Touched
+
+    return 0.0, []
+
+def LKLocalSearch(Problem, Tour, Queue, Journal, Deadline):
+    # Apply Lin-Kernighan moves (LKMove) until none of the vertices in Queue can start one, using
+    # don't-look bits as in TwoOptSearch. Every flip is left in Journal. Returns the number of
+    # improving moves and their total gain.
+    Active = [False]*Tour.NumVertices()
+    for V in Queue:
+        Active[V] = True
+    Moves = 0
+    TotalGain = 0.0
+    Steps = 0
+
+    while len(Queue) > 0:
+        Steps += 1
+        if Steps % 64 == 0 and DeadlinePassed(Deadline):
+            break
+
+        T1 = Queue.popleft()
+        Active[T1] = False
+        Gain, Touched = LKMove(Problem, Tour, T1, Journal)
+        if Gain > 0:
+            Moves += 1
+            TotalGain += Gain
+            for V in Touched:
+                if Active[V] == False:
+                    Active[V] = True
+                    Queue.append(V)
+
+    return Moves, TotalGain
+
+def LinKernighanSearch(Problem, Tour, Deadline):
+    # Search engine for ImproveTour: run Lin-Kernighan moves from every vertex to a local optimum.
+    Journal = []
+    Moves, TotalGain = LKLocalSearch(Problem, Tour, collections.deque(Tour.Order(None)), Journal, Deadline)
+
+    return Moves
+
+def DoubleBridgeKick(Problem, Tour, Journal, Rng):
+    # Perturb the tour with a "double bridge" move that swaps two short neighboring segments:
+    # A [B ... C] [D ... E] F becomes A [D ... E] [B ... C] F. Keeping the segments short keeps the
+    # kick local and cheap. Done as three 2-opt moves recorded in Journal. Returns the vertices
+    # whose edges changed, or an empty list if the tour is too small.
+    NumVerts = Tour.NumVertices()
+    if NumVerts < 8:
+        return []
+
+    MaxLen = max(1, min(50, (NumVerts - 2)//3))
+    A = Rng.randrange(0, NumVerts)
+    B = Tour.Next(A)
+    C = B
+    for i in range(0, Rng.randint(1, MaxLen) - 1):
+        C = Tour.Next(C)
+    D = Tour.Next(C)
+    E = D
+    for i in range(0, Rng.randint(1, MaxLen) - 1):
+        E = Tour.Next(E)
+    F = Tour.Next(E)
+    if F == A:
+        return []
+
+    JournalMove(Tour, Journal, A, B, E, F)
+    JournalMove(Tour, Journal, A, E, D, C)
+    JournalMove(Tour, Journal, E, C, B, F)
+
+    return [A, B, C, D, E, F]
+
+def CandidateLists(GraphObj, StartVertName, CandidateSet, NumNeighbors):
+    # Build candidate lists for the local search algorithms.
+    # "nn" uses the NumNeighbors nearest neighbors of each vertex. "mst" adds each vertex's neighbors
+    # in the minimum spanning tree (see GenMinTree) to its full "nn" list, so its lists always contain
+    # the "nn" ones. Each list is sorted by distance.
+    Nearest = GraphObj.NearestNeighbors(NumNeighbors).tolist()
+    if str(CandidateSet).lower() != "mst":
+        return Nearest
+
+    MinTree = GenMinTree(GraphObj, StartVertName, False)
+    Candidates = [[] for v in Nearest]
+    for E in MinTree.GetNamedEdges():
+        IndA = GraphObj.GetVertexIndex(E[0])
+        IndB = GraphObj.GetVertexIndex(E[1])
+        Candidates[IndA].append(IndB)
+        Candidates[IndB].append(IndA)
+
+    Dist = GraphObj.DistanceFunction()
+    for V in range(0, len(Candidates)):
+        TreeNeighbors = set(Candidates[V])
+        Candidates[V].extend(W for W in Nearest[V] if W not in TreeNeighbors)
+        Candidates[V].sort(key=lambda W: Dist(V, W))
+
+    return Candidates
+
+def LinKernighan(GraphObj, StartVertName, CycleBool, StartCond, CandidateSet, TimeLimit, Seed=None):
+    # Lin-Kernighan style variable-depth search (see LKMove) on an array-based tour.
+    # The starting path is chosen by StartCond (see StartTour) and the candidate edges by
+    # CandidateSet ("nn" or "mst", see CandidateLists). The tour is first brought to a Lin-Kernighan
+    # local optimum. If TimeLimit (in seconds) is not None, the remaining time is spent on "chained"
+    # Lin-Kernighan: the tour is kicked with a random double bridge (DoubleBridgeKick), re-optimised
+    # around the kick, and the kick is kept only if the tour got shorter. Seed seeds the kicks.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        Deadline = None
+        if TimeLimit != None:
+            Deadline = time.perf_counter() + TimeLimit
+        Rng = random.Random(Seed)
+
+        Problem = TourProblem(GraphObj, StartVertName, CycleBool, NEIGHBORLISTSIZE)
+        Problem.SetCandidates(CandidateLists(GraphObj, StartVertName, CandidateSet, NEIGHBORLISTSIZE))
+        Tour = Problem.TourFromNames(StartTour(GraphObj, StartVertName, StartCond))
+        LinKernighanSearch(Problem, Tour, Deadline)
+
+        while Deadline != None and DeadlinePassed(Deadline) == False:
+            Journal = []
+            Touched = DoubleBridgeKick(Problem, Tour, Journal, Rng)
+            if len(Touched) == 0:
+                break
+
+            # Price the kick from the edges it changed, then let LK repair the tour around it.
+            KickCost = 0.0
+            for A, B, C, D in Journal:
+                KickCost += Problem.dist(A, C) + Problem.dist(B, D) - Problem.dist(A, B) - Problem.dist(C, D)
+            Moves, Gain = LKLocalSearch(Problem, Tour, collections.deque(Touched), Journal, Deadline)
+            if Gain - KickCost <= Problem.eps:
+                UndoJournal(Tour, Journal, 0)
+
+        finalpath = Problem.NamesFromTour(Tour)
+
+    return finalpath
+
+# Settings for simulated annealing. The starting temperature accepts an average uphill move with
+# probability SASTARTACCEPT and the final temperature is SAENDRATIO times the starting one. Without a
+# time limit the run makes SAMOVESPERVERTEX moves per vertex. SAOROPTRATE is the share of Or-opt moves.
+SASTARTACCEPT = 0.5
+SAENDRATIO = 1e-3
+SAMOVESPERVERTEX = 2000
+SAOROPTRATE = 0.3
+
+def CoolingTemperature(Schedule, StartTemp, EndTemp, Fraction):
+    # Temperature once the given fraction (0 to 1) of the run has been used.
+    # "geometric"   - falls by the same factor in every equal stretch of the run,
+    # "linear"      - falls by the same amount in every equal stretch of the run,
+    # "lundy-mees"  - Lundy and Mees' schedule T = T0 / (1 + K T0 f), which cools fast at first.
+    if Schedule == "linear":
+        return StartTemp + (EndTemp - StartTemp)*Fraction
+    if Schedule == "lundy-mees":
+        return StartTemp/(1.0 + (StartTemp/EndTemp - 1.0)*Fraction)
+    return StartTemp*(EndTemp/StartTemp)**Fraction
+
+def RandomTwoOpt(Problem, Tour, Rng):
+    # Propose a random 2-opt move between a vertex A and one of its candidate neighbors C. Returns
+    # (Delta, B, C) for the move that reverses B ... C, or None if the pair does not give a move.
+    A = Rng.randrange(0, Tour.NumVertices())
+    C = Rng.choice(Problem.neighbors[A])
+    B = Tour.Next(A)
+    D = Tour.Next(C)
+    if C == B or D == A or C == A:
+        return None
+    Dist = Problem.dist
+    return (Dist(A, C) + Dist(B, D) - Dist(A, B) - Dist(C, D), B, C)
+
+def RandomOrOpt(Problem, Tour, Rng):
+    # Propose moving a random segment of 1 to 3 vertices next to a candidate neighbor of its first
+    # vertex, possibly reversed. Returns (Delta, Move) with Move in the form MoveSegment takes, or None.
+    Next = Tour.Next
+    Prev = Tour.Prev
+    S1 = Rng.randrange(0, Tour.NumVertices())
+    Segment = [S1]
+    for i in range(1, Rng.randint(1, 3)):
+        Segment.append(Next(Segment[-1]))
+    P = Prev(S1)
+    S2 = Segment[-1]
+    N = Next(S2)
+    C = Rng.choice(Problem.neighbors[S1])
+    X, Y = (C, Next(C)) if Rng.random() < 0.5 else (Prev(C), C)
+    if P in Segment or N in Segment or X in Segment or Y in Segment:
+        return None
+
+    Dist = Problem.dist
+    Reversed = Rng.random() < 0.5
+    Delta = Dist(P, N) - Dist(P, S1) - Dist(S2, N) - Dist(X, Y)
+    if Reversed == True:
+        Delta += Dist(X, S2) + Dist(S1, Y)
+    else:
+        Delta += Dist(X, S1) + Dist(S2, Y)
+    return (Delta, (P, S1, S2, N, X, Y, Reversed))
+
+def SimulatedAnnealing(GraphObj, StartVertName, CycleBool, StartCond, TimeLimit, Schedule="geometric", Seed=None):
+    # Simulated annealing over random 2-opt and Or-opt moves between candidate neighbors. Every move
+    # is priced in O(1) from the edges it changes. Improving moves are always made, and a move that
+    # lengthens the tour by Delta is made with probability exp(-Delta / T). The temperature T falls
+    # from a starting value fitted to the tour's own move costs according to Schedule (see
+    # CoolingTemperature). The starting path is chosen by StartCond (see StartTour).
+    # If TimeLimit is not None, the run is spread over TimeLimit seconds, so the result improves with
+    # the time allowed. Otherwise it makes SAMOVESPERVERTEX moves per vertex, and with a fixed Seed
+    # the result is then reproducible. The best tour seen is finished with 2-opt and Or-opt.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        Rng = random.Random(Seed)
+        StartTime = time.perf_counter()
+        Problem = TourProblem(GraphObj, StartVertName, CycleBool, NEIGHBORLISTSIZE)
+        Tour = Problem.TourFromNames(StartTour(GraphObj, StartVertName, StartCond))
+        NumVerts = Tour.NumVertices()
+
+        if NumVerts >= 5:
+            # Fit the starting temperature to the average cost of uphill moves on the starting tour.
+            Uphill = []
+            for i in range(0, 1000):
+                Proposal = RandomTwoOpt(Problem, Tour, Rng)
+                # Moves that would detach the dummy vertex of a path (see TourProblem) are left out.
+                if Proposal != None and Proposal[0] > Problem.eps and Proposal[0] < Problem.eps*1e11:
+                    Uphill.append(Proposal[0])
+            StartTemp = max(Problem.eps, sum(Uphill)/max(1, len(Uphill))/math.log(1.0/SASTARTACCEPT))
+            EndTemp = StartTemp*SAENDRATIO
+
+            MaxMoves = SAMOVESPERVERTEX*NumVerts
+            Cost = Problem.TourLength(Tour)
+            BestCost = Cost
+            BestOrder = Tour.Order(None)
+            SavedAt = 0
+            Temp = StartTemp
+            Step = 0
+            while True:
+                if Step % 1000 == 0:
+                    if TimeLimit != None:
+                        Fraction = (time.perf_counter() - StartTime)/TimeLimit
+                    else:
+                        Fraction = Step/MaxMoves
+                    if Fraction >= 1.0:
+                        break
+                    Temp = CoolingTemperature(Schedule, StartTemp, EndTemp, Fraction)
+                Step += 1
+
+                if Rng.random() < SAOROPTRATE:
+                    Proposal = RandomOrOpt(Problem, Tour, Rng)
+                else:
+                    Proposal = RandomTwoOpt(Problem, Tour, Rng)
+                if Proposal == None:
+                    continue
+                Delta = Proposal[0]
+                if Delta > 0 and Rng.random() >= math.exp(-Delta/Temp):
+                    continue
+
+                if len(Proposal) == 3:
+                    Tour.Reverse(Proposal[1], Proposal[2])
                 else:
-                    MinCostPath = UnSwappedPath
-
-                
-                if MinCostPath != None and MinCostPath != UnSwappedPath:
-                    # if a lower-cost arrangement is found, perform the neccessary swap
-                    # operations.
-                    #print(UnSwappedPath, "=>" , MinCostPath)
-                    if SwappedPath1 == MinCostPath:
-                        inprogpath = PathSwap(workingpath, MinCostPath[1], MinCostPath[2])
-                    if SwappedPath2 == MinCostPath:
-                        inprogpath = PathSwap(workingpath, MinCostPath[1], MinCostPath[3])
-                    
-                    #print(inprogpath, GraphObj.PathWeight(inprogpath, False))
-
-                    # If NaiveBool != True, only change the workingpath if the entire path with
-                    # the swapped vertices has a lower overall cost than the current working path.
-                    if NaiveBool == True:
-                        workingpath = inprogpath
-                    #if NaiveBool != True and GraphObj.PathWeight(inprogpath, False) > workingpathcost:
-                        #print ("Working path longer than existing path. Skipping this...")
-                    if NaiveBool != True and GraphObj.PathWeight(inprogpath, False) < workingpathcost:
-                        workingpath = inprogpath
-
-        # update finalpath
-        finalpath = workingpath
+                    MoveSegment(Tour, *Proposal[1])
+                Cost += Delta
+                # Copying the tour costs O(n), so a better tour is saved at most once every n steps.
+                if Cost < BestCost - Problem.eps and Step - SavedAt >= NumVerts:
+                    BestCost = Cost
+                    BestOrder = Tour.Order(None)
+                    SavedAt = Step
+
+            if Problem.TourLength(Problem.NewTour(BestOrder)) < Problem.TourLength(Tour):
+                Tour = Problem.NewTour(BestOrder)
+            ImproveTourInPlace(Problem, Tour, [TwoOptSearch, OrOptSearch], None)
+
+        finalpath = Problem.NamesFromTour(Tour)
+
+    return finalpath
+
+# Settings for the ant colony solver: the number of ants, the number of candidate neighbors each vertex
+# keeps pheromone for, the weights of the pheromone (alpha) and of the inverse distance (beta), the
+# evaporation rates of the MAX-MIN and plain Ant System variants, the iterations singletest runs, and
+# MMAS' estimate of the chance of rebuilding the best tour once the search has converged.
+ACOANTS = 20
+ACONEIGHBORS = 15
+ACOALPHA = 1.0
+ACOBETA = 3.0
+ACORHO = 0.02
+ACORHOAS = 0.5
+ACOITERATIONS = 200
+ACOPBEST = 0.05
+
+def BuildAntTours(GraphObj, Candidates, Weights, Starts, Rng):
+    # Build one tour per ant, all ants stepping together. At each step every ant picks its next vertex
+    # from the unvisited vertices in its current vertex's candidate list, with probability proportional
+    # to Weights (pheromone^alpha * (1/distance)^beta). An ant whose candidates have all been visited
+    # moves to its nearest unvisited vertex instead, found with its own SpatialIndex (or from its
+    # distance row if the graph's metric is not planar).
+    NumAnts = len(Starts)
+    NumVerts = GraphObj.NumVertices()
+    AntRows = np.arange(NumAnts)
+    Tours = np.zeros((NumAnts, NumVerts), dtype=np.int64)
+    Visited = np.zeros((NumAnts, NumVerts), dtype=bool)
+    Tours[:, 0] = Starts
+    Visited[AntRows, Starts] = True
+    Coords = GraphObj.Coordinates()
+    Planar = GraphObj.IsPlanar()
+    Unvisited = [None]*NumAnts
+
+    for Step in range(1, NumVerts):
+        Current = Tours[:, Step-1]
+        Options = Candidates[Current]
+        Chances = np.where(Visited[AntRows[:, None], Options], 0.0, Weights[Current])
+        Cumulative = np.cumsum(Chances, axis=1)
+        Totals = Cumulative[:, -1]
+        Spin = (1.0 - Rng.random(NumAnts))*Totals
+        Picks = np.minimum((Cumulative < Spin[:, None]).sum(axis=1), Options.shape[1]-1)
+        NextInds = Options[AntRows, Picks]
 
+        for Ant in np.flatnonzero(Totals <= 0.0).tolist():
+            if Planar == False:
+                Row = GraphObj.DistanceRow(int(Current[Ant]), False)
+                NextInds[Ant] = int(np.argmin(np.where(Visited[Ant], np.inf, Row)))
+                continue
+            if Unvisited[Ant] == None:
+                Unvisited[Ant] = TSP.SpatialIndex(Coords)
+                for v in Tours[Ant, :Step].tolist():
+                    Unvisited[Ant].Remove(v)
+            NextInds[Ant] = Unvisited[Ant].Nearest(Coords[Current[Ant]])
+
+        Tours[:, Step] = NextInds
+        Visited[AntRows, NextInds] = True
+        for Ant in range(0, NumAnts):
+            if Unvisited[Ant] != None:
+                Unvisited[Ant].Remove(int(NextInds[Ant]))
+
+    return Tours
+
+def DepositPheromone(Pheromone, Candidates, Tour, CycleBool, Amount):
+    # Add Amount of pheromone to every edge of Tour (a row of vertex indices), in both directions.
+    # Edges that are not in the candidate lists have no pheromone entry and are skipped.
+    A = Tour[:-1]
+    B = Tour[1:]
     if CycleBool == True:
-        finalpath.append(StartVertName)
+        A = np.append(A, Tour[-1])
+        B = np.append(B, Tour[0])
+    for From, To in ((A, B), (B, A)):
+        Rows, Cols = np.nonzero(Candidates[From] == To[:, None])
+        Pheromone[From[Rows], Cols] += Amount
+
+def AntColony(GraphObj, StartVertName, CycleBool, Iterations, TimeLimit=None, Variant="mmas", LocalSearch=True, Seed=None):
+    # Ant colony optimisation. Pheromone and heuristic values are (N, k) NumPy arrays over each
+    # vertex's ACONEIGHBORS nearest neighbors, so memory stays O(nk) on large graphs. Each iteration
+    # the ants build tours together (see BuildAntTours), their lengths are computed in one pass, the
+    # pheromone evaporates and is then laid on good tours:
+    #   "mmas" - MAX-MIN Ant System. Only the iteration's best tour (every third iteration the best so
+    #            far) lays pheromone, and the pheromone is kept between MMAS' upper and lower limits.
+    #   "as"   - Ant System. Every ant lays pheromone in proportion to 1 / tour length.
+    # If LocalSearch == True, the iteration's best tour is improved with 2-opt and Or-opt first, as
+    # is usual for MMAS. Stops after Iterations iterations or TimeLimit seconds. In path mode every ant
+    # starts at the start vertex. Seed seeds the random choices.
+    finalpath = []
+
+    if GraphObj.NameInGraph(StartVertName) == True:
+        NumVerts = GraphObj.NumVertices()
+        StartInd = GraphObj.GetVertexIndex(StartVertName)
+        Names = GraphObj.GetVertexNames()
+        if NumVerts < 4:
+            return NearestNeighbor(GraphObj, StartVertName, CycleBool)
+
+        Deadline = None
+        if TimeLimit != None:
+            Deadline = time.perf_counter() + TimeLimit
+        Rng = np.random.default_rng(Seed)
+        Candidates = GraphObj.NearestNeighbors(ACONEIGHBORS).astype(np.int64)
+        Heuristic = 1.0/np.maximum(GraphObj.PairDistances(np.repeat(np.arange(NumVerts), Candidates.shape[1]), Candidates.ravel(), False), 1e-12)
+        Heuristic = Heuristic.reshape(Candidates.shape)**ACOBETA
+        Rho = ACORHO if Variant == "mmas" else ACORHOAS
+        Problem = None
+        if LocalSearch == True:
+            Problem = TourProblem(GraphObj, StartVertName, CycleBool, NEIGHBORLISTSIZE)
+
+        def TourCosts(Tours):
+            Costs = GraphObj.PairDistances(Tours[:, :-1].ravel(), Tours[:, 1:].ravel(), False).reshape(len(Tours), -1).sum(axis=1)
+            if CycleBool == True:
+                Costs += GraphObj.PairDistances(Tours[:, -1], Tours[:, 0], False)
+            return Costs
+
+        # Start from a nearest neighbor tour, which also sets the initial pheromone level.
+        BestTour = GraphObj.PathIndices(NearestNeighbor(GraphObj, StartVertName, False)).astype(np.int64)
+        BestCost = float(TourCosts(BestTour[None, :])[0])
+        Pheromone = np.full(Candidates.shape, 1.0/(Rho*BestCost) if Variant == "mmas" else Candidates.shape[0]/BestCost)
+
+        for Iteration in range(0, Iterations):
+            if DeadlinePassed(Deadline):
+                break
+            Starts = np.full(ACOANTS, StartInd) if CycleBool == False else Rng.integers(0, NumVerts, ACOANTS)
+            Tours = BuildAntTours(GraphObj, Candidates, Pheromone**ACOALPHA*Heuristic, Starts, Rng)
+            Costs = TourCosts(Tours)
+            IterBest = Tours[int(np.argmin(Costs))]
+            IterCost = float(Costs.min())
+
+            if Problem != None:
+                Tour = Problem.TourFromNames([Names[v] for v in IterBest.tolist()])
+                ImproveTourInPlace(Problem, Tour, [TwoOptSearch, OrOptSearch], Deadline)
+                IterBest = GraphObj.PathIndices(Problem.NamesFromTour(Tour)[:NumVerts]).astype(np.int64)
+                IterCost = float(TourCosts(IterBest[None, :])[0])
+            if IterCost < BestCost:
+                BestTour = IterBest
+                BestCost = IterCost
+
+            Pheromone *= 1.0 - Rho
+            if Variant == "mmas":
+                Depositor, DepositCost = (BestTour, BestCost) if Iteration % 3 == 2 else (IterBest, IterCost)
+                DepositPheromone(Pheromone, Candidates, Depositor, CycleBool, 1.0/DepositCost)
+                TauMax = 1.0/(Rho*BestCost)
+                Root = ACOPBEST**(1.0/NumVerts)
+                TauMin = TauMax*(1.0 - Root)/((Candidates.shape[1]/2.0 - 1.0)*Root)
+                np.clip(Pheromone, TauMin, TauMax, out=Pheromone)
+            else:
+                for Ant in range(0, len(Tours)):
+                    DepositPheromone(Pheromone, Candidates, Tours[Ant], CycleBool, 1.0/Costs[Ant])
 
-    #print("Final 2-opt path:", finalpath, "with cost", GraphObj.PathWeight(finalpath, False))
+        # Paths already begin at the start vertex. Cycles are rotated round to it.
+        BestTour = np.roll(BestTour, -int(np.flatnonzero(BestTour == StartInd)[0]))
+        finalpath = [Names[v] for v in BestTour.tolist()]
+        if CycleBool == True:
+            finalpath.append(StartVertName)
+
+    return finalpath
+
+# Per-process state of a multi-start worker, set up once by MultiStartInit.
+MultiStartState = {}
+
+def MultiStartInit(GraphObj, Algorithm, CycleBool, Args):
+    # Runs once in each worker process. Under the "fork" start method (see MultiStartContext) the graph
+    # is inherited from the parent process rather than pickled, and the workers only ever read it.
+    MultiStartState["graph"] = GraphObj
+    MultiStartState["algorithm"] = Algorithm
+    MultiStartState["cycle"] = CycleBool
+    MultiStartState["args"] = Args
+
+def MultiStartTask(StartVertName):
+    # Run the algorithm from one start vertex in a worker process and return (cost, vertex indices).
+    GraphObj = MultiStartState["graph"]
+    # The path goes back to the parent as a compact index array rather than a list of names.
+    Path = GraphObj.IndexPath(MultiStartState["algorithm"](GraphObj, StartVertName, MultiStartState["cycle"], *MultiStartState["args"]))
+    return (Path.Weight(False), Path.GetIndices())
+
+def MultiStartContext():
+    # The multiprocessing context for MultiStart. "fork" is asked for explicitly, since it is the only
+    # start method that lets the workers inherit the graph and its distance cache without copying
+    # them, and it is no longer the default everywhere. Where it is not available (e.g. Windows) the
+    # default context is used, and each worker then receives its own pickled copy of the graph.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context()
+
+def MultiStart(GraphObj, Algorithm, CycleBool, Args=(), Starts=None, TimeLimit=None, TargetCost=None, Workers=None, Seed=None):
+    # Run Algorithm(GraphObj, StartVertName, CycleBool, *Args) from many start vertices in a process
+    # pool and return the shortest path found. Algorithm is any of the solvers in this file, e.g.
+    # NearestNeighbor, or TwoOpt with Args = (1, False). Starts is a list of vertex names, a number of
+    # vertices to sample at random (seeded by Seed), or None for every vertex. The run is cut short
+    # once TimeLimit seconds have passed or a path of length TargetCost or less has been found; the
+    # pool is then terminated, cancelling the starts still running (if none had finished, the result
+    # is an empty list). Workers defaults to one per CPU. The workers share the graph read-only where
+    # the platform allows it (see MultiStartContext).
+    finalpath = []
+    Names = GraphObj.GetVertexNames()
+    if Starts == None:
+        Starts = Names
+    elif isinstance(Starts, int) == True:
+        Starts = random.Random(Seed).sample(Names, min(Starts, len(Names)))
+    Starts = [v for v in Starts if GraphObj.NameInGraph(v) == True]
+    if len(Starts) == 0:
+        return finalpath
+
+    Deadline = None
+    if TimeLimit != None:
+        Deadline = time.perf_counter() + TimeLimit
+    if Workers == None:
+        Workers = os.cpu_count() or 1
+
+    BestCost = None
+    Finished = 0
+    with MultiStartContext().Pool(min(Workers, len(Starts)), initializer=MultiStartInit,
+                              initargs=(GraphObj, Algorithm, CycleBool, tuple(Args))) as Pool:
+        Results = Pool.imap_unordered(MultiStartTask, Starts)
+        while Finished < len(Starts):
+            try:
+                if Deadline == None:
+                    Cost, Path = Results.next()
+                else:
+                    Cost, Path = Results.next(timeout=max(0.0, Deadline - time.perf_counter()))
+            except multiprocessing.TimeoutError:
+                break
+            Finished += 1
+            if BestCost == None or Cost < BestCost:
+                BestCost = Cost
+                finalpath = GraphObj.PathNames(Path)
+            if TargetCost != None and BestCost <= TargetCost:
+                break
+        # Leaving the "with" block terminates any starts that are still running.
 
+    print("Multi-start finished", Finished, "of", len(Starts), "starts. Best length:", BestCost)
     return finalpath